@@ -0,0 +1,94 @@
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+
+class AdaptiveEndpointer:
+    """
+    Silence durations after which the speech of a stream is considered finished.
+
+    After `speculative_silence_ms` of silence, the recording may already be transcribed speculatively. After
+    `silence_ms` of silence, the end of speech is committed. If adaptive, both durations follow the pauses the
+    speaker of the stream makes within utterances: the endpoint is set a margin above the 90th percentile of the
+    observed pauses, and the speculative endpoint at their median.
+
+    Only pauses shorter than the endpoint are observed, longer ones end the utterance. So the final silence of every
+    utterance is observed as well: if the recent pauses within `TRUNCATED_PAUSE_FRAMES` before it are at least half
+    as dense as the recent pauses on average, the pauses of the speaker are likely cut off by the endpoint, which
+    then grows by the margin instead.
+
+    Args:
+        frame_duration_ms (float): Duration of a VAD frame in milliseconds.
+        speculative_silence_ms (int): Initial silence duration of the speculative endpoint.
+        silence_ms (int): Initial silence duration of the endpoint.
+        min_silence_ms (int): Lower bound of the adapted endpoint.
+        max_silence_ms (int): Upper bound of the adapted endpoint.
+        adaptive (bool): Whether the durations adapt to the observed pauses.
+    """
+
+    MIN_OBSERVED_PAUSES: int = 5
+    PAUSE_HISTORY_SIZE: int = 50
+    ENDPOINT_MARGIN_MS: int = 100
+    MIN_SPECULATIVE_SILENCE_MS: int = 100
+    TRUNCATED_PAUSE_FRAMES: int = 2
+    RECENT_PAUSES: int = 10
+    TRUNCATED_PAUSE_DENSITY: float = 0.5
+
+    def __init__(
+        self,
+        frame_duration_ms: float,
+        speculative_silence_ms: int = 200,
+        silence_ms: int = 500,
+        min_silence_ms: int = 300,
+        max_silence_ms: int = 1200,
+        adaptive: bool = True,
+    ):
+        self.frame_duration_ms = frame_duration_ms
+        self.speculative_silence_ms = speculative_silence_ms
+        self.silence_ms = silence_ms
+        self.min_silence_ms = min_silence_ms
+        self.max_silence_ms = max_silence_ms
+        self.adaptive = adaptive
+        self.pauses_ms = deque(maxlen=self.PAUSE_HISTORY_SIZE)
+        self.final_silence_ms: Optional[float] = None  # Of the last utterance
+
+    @property
+    def speculative_silence_frames(self) -> int:
+        return max(1, int(self.speculative_silence_ms / self.frame_duration_ms))
+
+    @property
+    def silence_frames(self) -> int:
+        return max(1, int(self.silence_ms / self.frame_duration_ms))
+
+    def observe_pause(self, silence_frames: int) -> None:
+        """Records a pause within an utterance, i.e. a silence after which the speaker continued to speak."""
+        pause_ms = silence_frames * self.frame_duration_ms
+        if pause_ms < self.MIN_SPECULATIVE_SILENCE_MS:
+            return  # Gap between words
+        self.pauses_ms.append(pause_ms)
+        self._adapt()
+
+    def observe_endpoint(self, silence_frames: int) -> None:
+        """Records the final silence of an utterance, after which the end of speech was committed."""
+        self.final_silence_ms = silence_frames * self.frame_duration_ms
+        self._adapt()
+
+    def _adapt(self) -> None:
+        if not self.adaptive or len(self.pauses_ms) < self.MIN_OBSERVED_PAUSES:
+            return
+
+        median_pause_ms, long_pause_ms = np.percentile(self.pauses_ms, [50, 90])
+        silence_ms = long_pause_ms + self.ENDPOINT_MARGIN_MS
+        if self.final_silence_ms is not None and self.final_silence_ms > self.MIN_SPECULATIVE_SILENCE_MS:
+            recent_pauses_ms = list(self.pauses_ms)[-self.RECENT_PAUSES :]
+            band_ms = self.TRUNCATED_PAUSE_FRAMES * self.frame_duration_ms
+            band_count = sum(pause_ms >= self.final_silence_ms - band_ms for pause_ms in recent_pauses_ms)
+            # Expected count if the pauses were spread evenly up to the final silence
+            even_count = len(recent_pauses_ms) * band_ms / (self.final_silence_ms - self.MIN_SPECULATIVE_SILENCE_MS)
+            if band_count >= self.TRUNCATED_PAUSE_DENSITY * even_count:
+                silence_ms = max(silence_ms, self.final_silence_ms + self.ENDPOINT_MARGIN_MS)
+        self.silence_ms = int(np.clip(silence_ms, self.min_silence_ms, self.max_silence_ms))
+        self.speculative_silence_ms = int(
+            np.clip(median_pause_ms, self.MIN_SPECULATIVE_SILENCE_MS, self.silence_ms - self.frame_duration_ms)
+        )
@@ -0,0 +1,33 @@
+import logging
+import threading
+
+import numpy as np
+
+from .AudioListener import IAudioListener
+from .AudioRingBuffer import AudioRingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class AudioCaptureThread(threading.Thread):
+    """
+    Continuously reads audio frames from a listener into a ring buffer on a dedicated thread.
+
+    The capture thread does nothing but reading the audio device, so the device buffer is drained even while
+    the consumers of the ring buffer are busy (e.g. while a request is processed).
+    """
+
+    def __init__(self, listener: IAudioListener, ring_buffer: AudioRingBuffer):
+        super().__init__(name="audio-capture", daemon=True)
+        self.listener = listener
+        self.ring_buffer = ring_buffer
+        self.stop_event = threading.Event()
+
+    def run(self) -> None:
+        logger.debug("Audio capture started")
+        while not self.stop_event.is_set():
+            audio_chunk: bytes = self.listener.fetch_audio_frame()
+            self.ring_buffer.write(np.frombuffer(audio_chunk, dtype=np.int16))
+
+    def stop(self) -> None:
+        self.stop_event.set()
@@ -1,14 +1,22 @@
 import logging
-import time
-from typing import Callable, List, Type
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Optional, Type, Union
 
+import numpy as np
 import speech_recognition as sr
 
-from state_manager import State, StateManager
+from state_manager import StateManager
 
+from .AudioCaptureThread import AudioCaptureThread
 from .AudioKeywordDetector import IAudioKeywordDetector
 from .AudioListener import IAudioListener
-from .VoiceActivityDetector import IVoiceActivityDetector, SileroVAD, WebRTCVAD
+from .AudioRingBuffer import AudioRingBuffer, AudioRingBufferReader
+from .AudioStreamProcessor import AudioStreamProcessor
+from .VoiceActivityDetector import IVoiceActivityDetector, WebRTCVAD
+
+if TYPE_CHECKING:
+    from audio_transcription.AudioTranscriber import IAudioTranscriber, IStreamingAudioTranscriber
 
 logger = logging.getLogger(__name__)
 
@@ -20,11 +28,28 @@ class AudioDetectionManager:
     an audio processing pipeline in the `process_audio_stream` method.
 
     Args:
-        listener (IAudioListener): An object that implements the 'IAudioListener' interface to listen to audio.
-        detector (IAudioKeywordDetector): An object that implements the 'IAudioKeywordDetector' interface to detect keyword in audio.
+        listener (IAudioListener): An object that implements the 'IAudioListener' interface to listen to audio, or its class.
+        detector (IAudioKeywordDetector): An object that implements the 'IAudioKeywordDetector' interface to detect keyword in audio, or its class.
         transcriber (IAudioTranscriber): An object that implements the 'IAudioTranscriber' interface to transcribe audio data.
         transcription_callback (Callable[[str], None]): Function to be invoked after a successful transcription occurs. It must accept a single argument - the transcribed string.
-        vad (IVoiceActivityDetector): An object that detects presence of voice in the audio frame
+        vad_cls (IVoiceActivityDetector): An object that detects presence of voice in the audio frame, or its class.
+        threaded_capture (bool): If set, the microphone is read by a dedicated capture thread into a ring buffer and the
+                                 `recorded_audio_callback` is run on a separate request thread, so that audio is
+                                 never dropped and keywords are detected while a request is processed.
+        ring_buffer_duration_s (float): Amount of audio the ring buffer holds in seconds.
+        streaming_transcriber (IStreamingAudioTranscriber, optional): Transcribes the speech while it is recorded. The
+                                 result is passed as `transcription` keyword argument to the `recorded_audio_callback`.
+        speculative_transcriber (IAudioTranscriber, optional): Enables speculative endpointing. The speech is already
+                                 transcribed after a short silence, and the future of the transcription is passed as
+                                 `transcription` keyword argument to the `recorded_audio_callback`.
+        interrupt_callback (Callable[[], None], optional): Enables barge-in with threaded capture. If the keyword is
+                                 detected while a request is processed, the request is interrupted by this callback
+                                 (e.g. cancels its generation and stops the playback). A `threading.Event` that is set
+                                 on the interruption is passed as `interrupted` keyword argument to the
+                                 `recorded_audio_callback`. Without it, the next request is queued.
+
+    If the state manager traces the requests, the trace of the recorded request is passed as `trace` keyword argument
+    to the `recorded_audio_callback`, since the next keyword may start another trace while the request is processed.
 
     Raises:
         TypeError: Raises an exception when listener, detector, transcriber, vad attributes do not match their respective interfaces.
@@ -33,47 +58,75 @@ class AudioDetectionManager:
     Methods:
         process_audio_stream(): Initiates the audio processing pipeline, continuously listens to audio,
                                 detects keywords and, if detected, transcribes the remainder. Invokes the `transcription_callback` function with the transcription.
+        stop(): Stops the audio processing pipeline and waits for the pending request.
     """
 
-    KEYWORDS_FRAME_SIZE: int = 512
-    VAD_FRAME_SIZE: int = 320  # frame size for WebRTC VAD
-    # VAD_FRAME_SIZE: int = 512 # frame size for SileroVAD
-    SAMPLE_RATE: int = 16000
-
-    VOICE_START_MAX_WAIT_TIME_S = 5  # Amount of time to wait for user to speak after keyword detection in seconds
-    SILENCE_DURATION_IN_MS: int = 500
+    KEYWORDS_FRAME_SIZE: int = AudioStreamProcessor.KEYWORDS_FRAME_SIZE
+    SAMPLE_RATE: int = AudioStreamProcessor.SAMPLE_RATE
 
-    frame_duration = (VAD_FRAME_SIZE * 1.0) / SAMPLE_RATE
-    max_silence_frames = int(SILENCE_DURATION_IN_MS / 1000 / frame_duration)
-    frame_length = max(VAD_FRAME_SIZE, KEYWORDS_FRAME_SIZE)
+    frame_length = KEYWORDS_FRAME_SIZE
+    READ_TIMEOUT_S: float = 0.5
 
     def __init__(
         self,
-        listener_cls: Type[IAudioListener],
-        detector_cls: Type[IAudioKeywordDetector],
-        recorded_audio_callback: Callable[[sr.AudioData], None],
+        listener_cls: Union[Type[IAudioListener], IAudioListener],
+        detector_cls: Union[Type[IAudioKeywordDetector], IAudioKeywordDetector],
+        recorded_audio_callback: Callable[..., None],
         state_manager: StateManager,
-        vad_cls: Type[IVoiceActivityDetector] = WebRTCVAD,  # SileroVAD,
+        vad_cls: Union[Type[IVoiceActivityDetector], IVoiceActivityDetector] = WebRTCVAD,  # SileroVAD,
+        threaded_capture: bool = True,
+        ring_buffer_duration_s: float = 10.0,
+        streaming_transcriber: Optional["IStreamingAudioTranscriber"] = None,
+        speculative_transcriber: Optional["IAudioTranscriber"] = None,
+        interrupt_callback: Optional[Callable[[], None]] = None,
     ) -> None:
-        if not issubclass(listener_cls, IAudioListener):
+        if not isinstance(listener_cls, IAudioListener) and not issubclass(listener_cls, IAudioListener):
             raise TypeError("Listener must be a subclass of IAudioListener.")
-        if not issubclass(detector_cls, IAudioKeywordDetector):
+        if not isinstance(detector_cls, IAudioKeywordDetector) and not issubclass(detector_cls, IAudioKeywordDetector):
             raise TypeError("Detector must be a subclass of IAudioKeywordDetector.")
-        if not issubclass(vad_cls, IVoiceActivityDetector):
+        if not isinstance(vad_cls, IVoiceActivityDetector) and not issubclass(vad_cls, IVoiceActivityDetector):
             raise TypeError("Voice Activity Detector (VAD) must be a subclass of IVoiceActivityDetector.")
 
         if not callable(recorded_audio_callback):
             raise TypeError("recorded_audio_callback must be callable.")
 
-        self.listener: IAudioListener = listener_cls(sample_rate=self.SAMPLE_RATE, frame_length=self.frame_length)
-        self.detector: IAudioKeywordDetector = detector_cls()
-        self.recorded_audio_callback: Callable[[sr.AudioData], None] = recorded_audio_callback
+        if isinstance(listener_cls, IAudioListener):
+            self.listener: IAudioListener = listener_cls
+        else:
+            self.listener = listener_cls(sample_rate=self.SAMPLE_RATE, frame_length=self.frame_length)
+        self.detector: IAudioKeywordDetector = (
+            detector_cls if isinstance(detector_cls, IAudioKeywordDetector) else detector_cls()
+        )
+        self.recorded_audio_callback: Callable[..., None] = recorded_audio_callback
+        self.interrupt_callback: Optional[Callable[[], None]] = interrupt_callback
         self.state_manager: StateManager = state_manager
-        self.vad: IVoiceActivityDetector = vad_cls(sample_rate=self.SAMPLE_RATE)
+        self.vad: IVoiceActivityDetector = (
+            vad_cls if isinstance(vad_cls, IVoiceActivityDetector) else vad_cls(sample_rate=self.SAMPLE_RATE)
+        )
+        self.processor = AudioStreamProcessor(
+            self.detector,
+            self.vad,
+            self.dispatch_recorded_audio,
+            self.state_manager,
+            keyword_callback=self.keyword_detected_callback,
+            streaming_transcriber=streaming_transcriber,
+            speculative_transcriber=speculative_transcriber,
+        )
+
+        self.threaded_capture: bool = threaded_capture
+        self.ring_buffer_reader: Optional[AudioRingBufferReader] = None
+        self.pending_request: Optional[Future] = None
+        self.pending_request_interrupted: Optional[threading.Event] = None
+        self.stop_event = threading.Event()
+        if self.threaded_capture:
+            ring_buffer_frames = int(ring_buffer_duration_s * self.SAMPLE_RATE / self.frame_length)
+            self.ring_buffer = AudioRingBuffer(capacity=ring_buffer_frames * self.frame_length)
+            self.capture_thread = AudioCaptureThread(self.listener, self.ring_buffer)
+            self.request_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="request")
 
     def process_audio_stream(self) -> None:
         """
-        Runs the audio processing pipeline indefinitely.
+        Runs the audio processing pipeline until `stop` is called.
 
         The pipeline works as follows:
         1. Fetches a new audio chunk from the listener.
@@ -84,74 +137,71 @@ class AudioDetectionManager:
         6. Finally, resets the state variables for the next round of keyword detection and speech recording.
 
         If no voice activity is detected within a specified duration after keyword detection, it assumes a false alarm and resets the state variables.
+        The per-frame processing is done by the `AudioStreamProcessor`.
         """
 
-        found_keyword: bool = False
-        is_speaking: bool = False
-        audio_data: List[bytes] = []
-        silence_frames: int = 0
-        last_voice_detected_timestamp: float = 0.0
+        if self.threaded_capture:
+            self.ring_buffer_reader = self.ring_buffer.reader()
+            self.capture_thread.start()
 
-        while True:
+        while not self.stop_event.is_set():
             # Fetch and process an audio chunk
-            audio_chunk: bytes = self.listener.fetch_audio_frame()
-            audio_chunk_length: int = len(audio_chunk)
-
-            for i in range(0, audio_chunk_length, self.KEYWORDS_FRAME_SIZE):
-                end_index: int = 2 * (i + self.KEYWORDS_FRAME_SIZE)
-                if end_index > audio_chunk_length:
-                    break  # Skip incomplete frames
-
-                keywords_frame: bytes = audio_chunk[2 * i : end_index]
-
-                # If a keyword is detected, start or continue waiting for voice
-                if self.detector.detect_keyword(keywords_frame):
-                    # Keyword detected, start waiting for voice
-                    self.state_manager.set_state(State.KEYWORD_DETECTED, logger)
-                    found_keyword = True
-                    last_voice_detected_timestamp = time.time()
-
-                # Detect voice in all frames if keyword found
-                if found_keyword:
-                    for j in range(i, end_index, self.VAD_FRAME_SIZE):
-                        vad_end_index: int = 2 * (j + self.VAD_FRAME_SIZE)
-
-                        if vad_end_index <= audio_chunk_length:
-                            vad_frame: bytes = audio_chunk[2 * j : vad_end_index]
-                            if self.vad.is_speech(vad_frame):
-                                if not is_speaking:
-                                    self.state_manager.set_state(State.VOICE_DETECTED, logger)
-                                is_speaking = True
-                                silence_frames = 0
-                                last_voice_detected_timestamp = time.time()
-                            else:
-                                silence_frames += 1
-                            audio_data.append(keywords_frame)
-
-                            # If Voice has stopped, pass the audio data to the callback function
-                            if is_speaking and silence_frames >= self.max_silence_frames:
-                                self.state_manager.set_state(State.LONG_SILENCE_DETECTED, logger)
-
-                                speech_end_index = len(audio_data) - self.max_silence_frames
-                                clean_audio_data = audio_data[:speech_end_index]
-
-                                audio: sr.AudioData = sr.AudioData(
-                                    b"".join(clean_audio_data), sample_rate=self.SAMPLE_RATE, sample_width=2
-                                )
-                                self.recorded_audio_callback(audio)
-
-                                # Reset states for next detection
-                                found_keyword = False
-                                is_speaking = False
-                                audio_data[:] = []
-                                silence_frames = 0
-
-                # Time to wait after keyword detection is exceeded.
-                if found_keyword and time.time() - last_voice_detected_timestamp > self.VOICE_START_MAX_WAIT_TIME_S:
-                    self.state_manager.set_state(State.WAITING_TIME_EXCEEDED, logger)
-
-                    # Reset states for next detection
-                    found_keyword = False
-                    is_speaking = False
-                    audio_data[:] = []
-                    silence_frames = 0
+            audio_chunk: Optional[np.ndarray] = self.fetch_audio_chunk()
+            if audio_chunk is None:
+                continue
+
+            for i in range(0, len(audio_chunk) - self.KEYWORDS_FRAME_SIZE + 1, self.KEYWORDS_FRAME_SIZE):
+                self.processor.process_frame(audio_chunk[i : i + self.KEYWORDS_FRAME_SIZE])
+
+    def set_transcribers(
+        self,
+        streaming_transcriber: Optional["IStreamingAudioTranscriber"] = None,
+        speculative_transcriber: Optional["IAudioTranscriber"] = None,
+    ) -> None:
+        """Sets the transcribers after construction, e.g. once they are initialized while the stream is processed."""
+        self.processor.set_transcribers(streaming_transcriber, speculative_transcriber)
+
+    def keyword_detected_callback(self) -> None:
+        if self.pending_request is None or self.pending_request.done():
+            return
+
+        if self.interrupt_callback is None:
+            logger.info("Keyword detected while a request is still processed, queueing the next one")
+        elif self.pending_request.cancel():
+            logger.info("Keyword detected before the pending request was started, dropping it")
+        else:
+            logger.info("Keyword detected while a request is still processed, interrupting it")
+            self.pending_request_interrupted.set()
+            self.interrupt_callback()
+
+    def fetch_audio_chunk(self) -> Optional[np.ndarray]:
+        if self.ring_buffer_reader is None:
+            return np.frombuffer(self.listener.fetch_audio_frame(), dtype=np.int16)
+        # With a timeout, so that a stop is noticed even if the capture thread delivers no audio
+        return self.ring_buffer_reader.read(self.frame_length, timeout=self.READ_TIMEOUT_S)
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.processor.keyword_gate is not None:
+            logger.info("Keyword gate: %s", self.processor.keyword_gate.stats())
+        if self.threaded_capture:
+            self.capture_thread.stop()
+            self.request_executor.shutdown(wait=True)
+
+    def dispatch_recorded_audio(self, audio: sr.AudioData, **kwargs) -> None:
+        if self.state_manager.tracer is not None:
+            kwargs["trace"] = self.state_manager.tracer.current
+        if not self.threaded_capture:
+            self.recorded_audio_callback(audio, **kwargs)
+            return
+
+        if self.interrupt_callback is not None:
+            # A new event per request, so that an interruption never applies to the next request
+            self.pending_request_interrupted = kwargs["interrupted"] = threading.Event()
+        self.pending_request = self.request_executor.submit(self.recorded_audio_callback, audio, **kwargs)
+        self.pending_request.add_done_callback(self._log_request_exception)
+
+    @staticmethod
+    def _log_request_exception(future: Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Processing of the recorded audio failed", exc_info=future.exception())
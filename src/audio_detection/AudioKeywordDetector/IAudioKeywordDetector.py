@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 
 class IAudioKeywordDetector(ABC):
     @abstractmethod
@@ -7,5 +9,9 @@ class IAudioKeywordDetector(ABC):
         pass
 
     @abstractmethod
-    def detect_keyword(self, audio_frame: bytes) -> bool:
+    def detect_keyword(self, audio_frame: np.ndarray) -> bool:
+        pass
+
+    def skip(self, sample_count: int) -> None:
+        """Called with the number of samples that were not passed to the detector, e.g. by the `KeywordGate`."""
         pass
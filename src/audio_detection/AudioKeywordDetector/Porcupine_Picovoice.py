@@ -8,10 +8,6 @@ from .IAudioKeywordDetector import IAudioKeywordDetector
 
 load_dotenv()
 
-PORCUPINE_ACCESS_KEY = os.environ.get("PORCUPINE_ACCESS_KEY")
-if not PORCUPINE_ACCESS_KEY:
-    raise Exception("PORCUPINE_ACCESS_KEY not set in .env file. See .env.template for reference.")
-
 models_dir = os.path.join("models", "Porcupine_Picovoice")
 porcupine_params = os.path.join(models_dir, "porcupine_params_de.pv")
 fridolin_model = os.path.join(models_dir, "Fridolin_de_mac_v3_0_0.ppn")
@@ -19,15 +15,20 @@ fridolin_model = os.path.join(models_dir, "Fridolin_de_mac_v3_0_0.ppn")
 
 class Porcupine_Picovoice(IAudioKeywordDetector):
     def __init__(self):
+        access_key = os.environ.get("PORCUPINE_ACCESS_KEY")
+        if not access_key:
+            raise Exception("PORCUPINE_ACCESS_KEY not set in .env file. See .env.template for reference.")
+
         self.handle = pvporcupine.create(
-            access_key=PORCUPINE_ACCESS_KEY,
+            access_key=access_key,
             model_path=porcupine_params,
             keyword_paths=[fridolin_model],
         )
 
     def __del__(self):
-        self.handle.delete()
+        if hasattr(self, "handle"):
+            self.handle.delete()
 
-    def detect_keyword(self, audio_frame: bytes) -> bool:
-        is_keyword_detected = self.handle.process(np.frombuffer(audio_frame, dtype=np.int16))
+    def detect_keyword(self, audio_frame: np.ndarray) -> bool:
+        is_keyword_detected = self.handle.process(audio_frame)
         return is_keyword_detected >= 0
@@ -1,2 +1,15 @@
+from typing import TYPE_CHECKING
+
+from lazy_imports import lazy_attributes
+
 from .IAudioKeywordDetector import IAudioKeywordDetector
-from .Porcupine_Picovoice import Porcupine_Picovoice
+
+if TYPE_CHECKING:
+    from .Porcupine_Picovoice import Porcupine_Picovoice
+
+__getattr__ = lazy_attributes(
+    __name__,
+    {
+        "Porcupine_Picovoice": ".Porcupine_Picovoice",
+    },
+)
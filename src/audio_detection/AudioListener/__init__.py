@@ -1,2 +1,15 @@
+from typing import TYPE_CHECKING
+
+from lazy_imports import lazy_attributes
+
 from .IAudioListener import IAudioListener
-from .Porcupine_Listener import Porcupine_Listener
+
+if TYPE_CHECKING:
+    from .Porcupine_Listener import Porcupine_Listener
+
+__getattr__ = lazy_attributes(
+    __name__,
+    {
+        "Porcupine_Listener": ".Porcupine_Listener",
+    },
+)
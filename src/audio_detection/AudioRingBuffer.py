@@ -0,0 +1,108 @@
+import logging
+import threading
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class AudioRingBuffer:
+    """
+    Fixed-size ring buffer of 16 bit PCM samples with a single writer and any number of readers.
+
+    The writer never blocks and never waits for readers: it announces the end of its write in `writing_position`,
+    copies the samples into the preallocated array and only then advances the monotonic `write_position`. Every reader
+    keeps its own read position (see `AudioRingBufferReader`), so no lock is required around the sample data. A
+    condition is only used to wake up waiting readers. Readers that fall behind by more than `capacity` samples lose
+    the overwritten samples and skip ahead.
+
+    Args:
+        capacity (int): Number of samples the buffer holds.
+        samples (np.ndarray, optional): Preallocated int16 array of `capacity` samples to use as buffer, e.g. backed
+            by shared memory so that another process can read the samples.
+    """
+
+    def __init__(self, capacity: int, samples: Optional[np.ndarray] = None):
+        if samples is not None and (len(samples) != capacity or samples.dtype != np.int16):
+            raise ValueError(f"Samples must be an int16 array of {capacity} samples.")
+        self.capacity = capacity
+        self.samples = samples if samples is not None else np.zeros(capacity, dtype=np.int16)
+        self.write_position = 0
+        self.writing_position = 0  # End of the write in progress, samples before it minus `capacity` are overwritten
+        self.data_available = threading.Condition()
+
+    def write(self, samples: np.ndarray) -> None:
+        sample_count = len(samples)
+        if sample_count > self.capacity:
+            samples = samples[-self.capacity :]
+
+        self.writing_position = self.write_position + sample_count
+        start = (self.write_position + sample_count - len(samples)) % self.capacity
+        first_part = min(len(samples), self.capacity - start)
+        self.samples[start : start + first_part] = samples[:first_part]
+        self.samples[: len(samples) - first_part] = samples[first_part:]
+
+        self.write_position += sample_count
+
+        with self.data_available:
+            self.data_available.notify_all()
+
+    def reader(self, from_start: bool = False) -> "AudioRingBufferReader":
+        return AudioRingBufferReader(self, 0 if from_start else self.write_position)
+
+    def read(self, position: int, sample_count: int) -> np.ndarray:
+        """
+        Returns `sample_count` samples starting at the absolute sample position `position`. Contiguously stored
+        samples are returned as a view into the buffer, which must be consumed before the writer overwrites it.
+        Only samples that wrap around the end of the buffer are copied.
+        """
+        start = position % self.capacity
+        end = start + sample_count
+        if end <= self.capacity:
+            return self.samples[start:end]
+        return np.concatenate((self.samples[start:], self.samples[: end - self.capacity]))
+
+
+class AudioRingBufferReader:
+    def __init__(self, ring_buffer: AudioRingBuffer, position: int):
+        self.ring_buffer = ring_buffer
+        self.position = position
+        self.overruns = 0
+
+    def available(self) -> int:
+        return self.ring_buffer.write_position - self.position
+
+    def read(self, sample_count: int, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        Reads a copy of the next `sample_count` samples. Blocks until enough samples are available or the timeout
+        exceeds, in which case None is returned.
+
+        The samples are copied without a lock, so the writer may overwrite them while they are copied. In that case
+        the copy is discarded, and the reader skips the overwritten samples and reads again.
+        """
+        ring_buffer = self.ring_buffer
+        while True:
+            if self.available() < sample_count:
+                with ring_buffer.data_available:
+                    if not ring_buffer.data_available.wait_for(lambda: self.available() >= sample_count, timeout):
+                        return None
+            if self._skip_overwritten():
+                continue
+
+            samples = ring_buffer.read(self.position, sample_count)
+            if np.shares_memory(samples, ring_buffer.samples):
+                samples = samples.copy()
+            if not self._skip_overwritten():
+                self.position += sample_count
+                return samples
+
+    def _skip_overwritten(self) -> bool:
+        """Skips the samples the writer overwrites or already overwrote. Returns whether any were skipped."""
+        oldest_position = self.ring_buffer.writing_position - self.ring_buffer.capacity
+        if self.position >= oldest_position:
+            return False
+        self.overruns += 1
+        logger.warning("Audio reader fell behind, skipping %s samples", oldest_position - self.position)
+        self.position = oldest_position
+        return True
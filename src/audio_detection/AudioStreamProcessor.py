@@ -0,0 +1,266 @@
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Optional
+
+import numpy as np
+import speech_recognition as sr
+
+from state_manager import State, StateManager
+
+from .AdaptiveEndpointer import AdaptiveEndpointer
+from .AudioKeywordDetector import IAudioKeywordDetector
+from .KeywordGate import KeywordGate
+from .RecordingBuffer import RecordingBuffer
+from .SpeculationLimiter import SpeculationLimiter
+from .VoiceActivityDetector import IVoiceActivityDetector
+
+if TYPE_CHECKING:
+    from audio_transcription.AudioTranscriber import (
+        IAudioTranscriber,
+        IStreamingAudioTranscriber,
+        ITranscriptionStream,
+    )
+
+logger = logging.getLogger(__name__)
+
+
+class AudioStreamProcessor:
+    """
+    Keyword detection, voice activity detection and endpointing state of a single audio stream.
+
+    Frames of `KEYWORDS_FRAME_SIZE` samples are passed to `process_frame` as int16 arrays. The very same array is
+    handed to the keyword detector and copied once into the preallocated `RecordingBuffer`, whose views are
+    handed to the VAD in one call with all complete VAD frames. Time is measured in processed samples, so the
+    processor behaves the same for live and replayed audio.
+
+    Args:
+        detector (IAudioKeywordDetector): Keyword detector of the stream.
+        vad (IVoiceActivityDetector): Voice activity detector of the stream.
+        recorded_audio_callback (Callable[[sr.AudioData], None]): Invoked with the recorded speech after the user stopped speaking.
+        state_manager (StateManager): State manager the detection states are reported to.
+        keyword_callback (Callable[[], None], optional): Invoked whenever the keyword is detected.
+        streaming_transcriber (IStreamingAudioTranscriber, optional): If given, the recording is transcribed
+                                                                      incrementally while the user speaks, and the
+                                                                      transcription is passed to the callback as well.
+        speculative_transcriber (IAudioTranscriber, optional): If given, the recording is already transcribed after a
+                                                               short silence. If the user continues to speak, the
+                                                               speculative transcription is discarded. Otherwise, its
+                                                               future is passed to the callback as `transcription`.
+                                                               See `SpeculationLimiter` for the cost of discarded ones.
+        adaptive_endpointing (bool): Whether the silence durations of the endpointing adapt to the pauses of the speaker.
+        keyword_gate (bool): Whether the keyword detector only runs on frames that may contain speech (see `KeywordGate`).
+    """
+
+    KEYWORDS_FRAME_SIZE: int = 512
+    SAMPLE_RATE: int = 16000
+
+    VOICE_START_MAX_WAIT_TIME_S = 5  # Amount of time to wait for user to speak after keyword detection in seconds
+    SILENCE_DURATION_IN_MS: int = 500
+    MAX_RECORDING_DURATION_S: float = 30.0
+
+    def __init__(
+        self,
+        detector: IAudioKeywordDetector,
+        vad: IVoiceActivityDetector,
+        recorded_audio_callback: Callable[..., None],
+        state_manager: StateManager,
+        keyword_callback: Optional[Callable[[], None]] = None,
+        streaming_transcriber: Optional["IStreamingAudioTranscriber"] = None,
+        speculative_transcriber: Optional["IAudioTranscriber"] = None,
+        adaptive_endpointing: bool = True,
+        keyword_gate: bool = True,
+    ) -> None:
+        self.detector = detector
+        self.keyword_gate: Optional[KeywordGate] = (
+            KeywordGate(detector, self.KEYWORDS_FRAME_SIZE, self.SAMPLE_RATE) if keyword_gate else None
+        )
+        self.vad = vad
+        self.recorded_audio_callback = recorded_audio_callback
+        self.state_manager = state_manager
+        self.keyword_callback = keyword_callback
+        self.transcription_stream: Optional["ITranscriptionStream"] = None
+        self.partial_transcription: str = ""
+
+        self.speculative_transcriber: Optional["IAudioTranscriber"] = None
+        self.speculative_transcription: Optional[Future] = None
+        self.speculative_audio: Optional[sr.AudioData] = None
+        self.speculation_limiter = SpeculationLimiter()
+        self.set_transcribers(streaming_transcriber, speculative_transcriber)
+
+        self.vad_frame_size: int = vad.frame_size
+        self.endpointer = AdaptiveEndpointer(
+            frame_duration_ms=self.vad_frame_size * 1000.0 / self.SAMPLE_RATE,
+            silence_ms=self.SILENCE_DURATION_IN_MS,
+            adaptive=adaptive_endpointing,
+        )
+
+        self.recording = RecordingBuffer(self.MAX_RECORDING_DURATION_S, self.SAMPLE_RATE)
+
+        self.position: int = 0  # Number of samples processed
+        self.recording_start: int = 0  # Stream position of the first sample of the current recording
+        self.found_keyword: bool = False
+        self.is_speaking: bool = False
+        self.silence_frames: int = 0
+        self.vad_position: int = 0  # Position of the next VAD frame in the recording
+        self.speech_start: int = 0  # Position of the first speech frame in the recording
+        self.last_voice_position: int = 0
+
+    def set_transcribers(
+        self,
+        streaming_transcriber: Optional["IStreamingAudioTranscriber"] = None,
+        speculative_transcriber: Optional["IAudioTranscriber"] = None,
+    ) -> None:
+        """Sets the transcribers, also while the stream is processed. They apply from the next keyword on."""
+        if speculative_transcriber is not None and self.speculative_transcriber is None:
+            self.speculation_executor = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="speculative-transcription"
+            )
+        self.streaming_transcriber = streaming_transcriber
+        self.speculative_transcriber = speculative_transcriber
+
+    def process_frame(self, frame: np.ndarray) -> None:
+        self.position += len(frame)
+
+        # If a keyword is detected, start or continue waiting for voice
+        if self.detect_keyword(frame):
+            self.state_manager.set_state(State.KEYWORD_DETECTED, logger)
+            if self.keyword_callback:
+                self.keyword_callback()
+            self.reset()
+            self.found_keyword = True
+            self.recording_start = self.position - len(frame)
+            self.last_voice_position = self.position
+            if self.streaming_transcriber is not None:
+                self.transcription_stream = self.streaming_transcriber.start_stream(self.SAMPLE_RATE)
+
+        if not self.found_keyword:
+            return
+
+        # Detect voice in all recorded frames if keyword found
+        self.recording.append(frame)
+        self.transcribe_frame(frame)
+        self.process_vad_frames()
+
+        # Time to wait after keyword detection is exceeded.
+        if (
+            self.found_keyword
+            and self.position - self.last_voice_position > self.VOICE_START_MAX_WAIT_TIME_S * self.SAMPLE_RATE
+        ):
+            self.state_manager.set_state(State.WAITING_TIME_EXCEEDED, logger)
+            self.reset()
+
+    def detect_keyword(self, frame: np.ndarray) -> bool:
+        if self.keyword_gate is None:
+            return self.detector.detect_keyword(frame)
+        return self.keyword_gate.detect_keyword(frame)
+
+    def process_vad_frames(self) -> None:
+        vad_frame_count = (self.recording.length - self.vad_position) // self.vad_frame_size
+        vad_frames = self.recording.view(
+            self.vad_position, self.vad_position + vad_frame_count * self.vad_frame_size
+        ).reshape(vad_frame_count, self.vad_frame_size)
+
+        for is_speech in self.vad.is_speech_frames(vad_frames):
+            self.vad_position += self.vad_frame_size
+
+            if is_speech:
+                if not self.is_speaking:
+                    self.state_manager.set_state(State.VOICE_DETECTED, logger)
+                    self.speech_start = self.vad_position - self.vad_frame_size
+                elif self.silence_frames > 0:
+                    # Speech resumed after a pause
+                    self.endpointer.observe_pause(self.silence_frames)
+                    self.discard_speculative_transcription()
+                self.is_speaking = True
+                self.silence_frames = 0
+                self.last_voice_position = self.position
+            else:
+                self.silence_frames += 1
+
+            speech_end = self.vad_position - self.silence_frames * self.vad_frame_size
+
+            # If Voice has stopped for a short time, transcribe speculatively
+            if self.is_speaking and self.silence_frames >= self.endpointer.speculative_silence_frames:
+                self.start_speculative_transcription(speech_end)
+
+            # If Voice has stopped, pass the audio data to the callback function
+            if self.is_speaking and self.silence_frames >= self.endpointer.silence_frames:
+                self.state_manager.set_state(State.LONG_SILENCE_DETECTED, logger)
+                self.endpointer.observe_endpoint(self.silence_frames)
+                self.finish_recording(speech_end)
+                break
+
+        if self.found_keyword and self.recording.is_full():
+            logger.warning("Maximum recording duration of %s seconds reached", self.MAX_RECORDING_DURATION_S)
+            self.finish_recording(self.recording.length)
+
+    def recorded_audio(self, end: int) -> sr.AudioData:
+        """The recording up to `end`, with the bounds of the speech in it for the trimming before an upload."""
+        speech_end = self.vad_position - self.silence_frames * self.vad_frame_size if self.is_speaking else end
+        return self.recording.to_audio_data(end, self.speech_start, min(speech_end, end))
+
+    def transcribe_frame(self, frame: np.ndarray) -> None:
+        if self.transcription_stream is None:
+            return
+
+        self.transcription_stream.accept_audio(frame)
+        partial_transcription = self.transcription_stream.partial_result()
+        if partial_transcription != self.partial_transcription:
+            self.partial_transcription = partial_transcription
+            logger.debug("Partial transcription: %s", partial_transcription)
+
+    def start_speculative_transcription(self, speech_end: int) -> None:
+        if (
+            self.speculative_transcriber is None
+            or self.transcription_stream is not None
+            or self.speculative_transcription is not None
+            or not self.speculation_limiter.can_start()
+        ):
+            return
+
+        logger.debug("Short silence detected, starting speculative transcription")
+        self.speculative_audio = self.recorded_audio(speech_end)
+        self.speculative_transcription = self.speculation_executor.submit(
+            self.speculative_transcriber.transcribe, self.speculative_audio
+        )
+        self.speculation_limiter.started(self.speculative_transcription)
+
+    def discard_speculative_transcription(self) -> None:
+        if self.speculative_transcription is None:
+            return
+
+        logger.debug("Discarding speculative transcription")
+        self.speculation_limiter.discard(self.speculative_transcription)
+        self.speculative_transcription = None
+        self.speculative_audio = None
+
+    def finish_recording(self, speech_end: int) -> None:
+        kwargs = {}
+        if self.transcription_stream is not None:
+            audio: sr.AudioData = self.recorded_audio(speech_end)
+            kwargs["transcription"] = self.transcription_stream.finish()
+            self.transcription_stream = None
+        elif self.speculative_transcription is not None:
+            # Commit the speculative transcription, no speech was recorded since it was started
+            audio = self.speculative_audio
+            kwargs["transcription"] = self.speculative_transcription
+            self.speculative_transcription = None
+        else:
+            audio = self.recorded_audio(speech_end)
+
+        self.reset()
+        self.recorded_audio_callback(audio, **kwargs)
+
+    def reset(self) -> None:
+        self.found_keyword = False
+        self.is_speaking = False
+        self.silence_frames = 0
+        self.vad_position = 0
+        self.speech_start = 0
+        self.recording.reset()
+        self.vad.reset_states()
+        self.partial_transcription = ""
+        if self.transcription_stream is not None:
+            self.transcription_stream.cancel()
+            self.transcription_stream = None
+        self.discard_speculative_transcription()
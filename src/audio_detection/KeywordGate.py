@@ -0,0 +1,149 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+from .AudioKeywordDetector import IAudioKeywordDetector
+
+
+class KeywordGate:
+    """
+    Energy gate in front of a keyword detector, which only runs the detector on frames that may contain speech.
+
+    The level of every frame is compared with an adaptive noise floor. The floor follows quieter frames quickly and
+    louder frames slowly, so it settles on the background noise of the room but not on speech. A frame that is
+    `threshold_db` above the floor (and above `min_level_db`) opens the gate, and the gate stays open until
+    `hangover_ms` passed without such a frame, so that quieter syllables of the keyword are not cut off.
+
+    The floor is held while a frame opens the gate and never rises above `max_floor_db`. Otherwise sustained speech
+    like a TV or radio would raise it to the level of speech, and a keyword spoken at that level would be skipped.
+    Loud stationary noise therefore keeps the gate open, which costs detector time but no keywords.
+
+    While the gate is closed, the last `pre_roll_ms` of audio are kept. When it opens, they are passed to the
+    detector before the current frame, so that the onset of the keyword is not missed. All other skipped samples are
+    reported to the detector with `skip`. As the onset of speech in noise may stay below the threshold for a frame or
+    two, a keyword can be reported up to two frames later than by the ungated detector.
+
+    Args:
+        detector (IAudioKeywordDetector): Detector that is gated.
+        frame_size (int): Number of samples per frame.
+        sample_rate (int): Sample rate of the audio.
+        threshold_db (float): Level above the noise floor at which a frame opens the gate.
+        min_level_db (float): Level in dBFS below which a frame never opens the gate.
+        max_floor_db (float): Level in dBFS above which the noise floor never rises.
+        pre_roll_ms (float): Audio before the opening frame that is passed to the detector.
+        hangover_ms (float): Time the gate stays open after the last loud frame.
+        floor_fall_ms (float): Time constant at which the noise floor follows quieter frames.
+        floor_rise_ms (float): Time constant at which the noise floor follows louder frames.
+    """
+
+    def __init__(
+        self,
+        detector: IAudioKeywordDetector,
+        frame_size: int,
+        sample_rate: int,
+        threshold_db: float = 5.0,
+        min_level_db: float = -60.0,
+        max_floor_db: float = -45.0,
+        pre_roll_ms: float = 300.0,
+        hangover_ms: float = 1000.0,
+        floor_fall_ms: float = 200.0,
+        floor_rise_ms: float = 5000.0,
+    ):
+        self.detector = detector
+        self.frame_size = frame_size
+        self.threshold_db = threshold_db
+        self.min_level_db = min_level_db
+        self.max_floor_db = max_floor_db
+
+        frame_duration_ms = frame_size * 1000.0 / sample_rate
+        self.hangover_frames = int(np.ceil(hangover_ms / frame_duration_ms))
+        self.floor_fall = min(frame_duration_ms / floor_fall_ms, 1.0)
+        self.floor_rise = min(frame_duration_ms / floor_rise_ms, 1.0)
+
+        # Ring of the last skipped frames, preallocated so that skipping a frame is a single copy
+        self.pre_roll = np.zeros((int(np.ceil(pre_roll_ms / frame_duration_ms)), frame_size), dtype=np.int16)
+        self.pre_roll_count = 0  # Number of frames in the ring
+        self.pre_roll_index = 0  # Index of the next frame in the ring
+        self.unreported_samples = 0  # Skipped samples that were not passed to the detector yet
+
+        self.noise_floor_db: Optional[float] = None  # Starts at the level of the first frame
+        self.open_frames = 0  # Number of frames the gate stays open
+
+        self.frame_count = 0
+        self.skipped_count = 0
+        self.opening_count = 0
+
+    @property
+    def skipped_fraction(self) -> float:
+        return self.skipped_count / self.frame_count if self.frame_count else 0.0
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "frames": self.frame_count,
+            "skipped": self.skipped_count,
+            "skipped_fraction": self.skipped_fraction,
+            "openings": self.opening_count,
+            "noise_floor_db": self.noise_floor_db,
+        }
+
+    def level_db(self, frame: np.ndarray) -> float:
+        samples = frame.astype(np.float32)
+        mean_square = float(np.dot(samples, samples)) / max(len(samples), 1) / 32768.0**2
+        return 10 * np.log10(mean_square + 1e-12)
+
+    def detect_keyword(self, frame: np.ndarray) -> bool:
+        self.frame_count += 1
+        level_db = self.level_db(frame)
+        if self.noise_floor_db is None:
+            self.noise_floor_db = min(level_db, self.max_floor_db)
+        is_loud = level_db >= max(self.noise_floor_db + self.threshold_db, self.min_level_db)
+        if level_db < self.noise_floor_db:
+            self.noise_floor_db += self.floor_fall * (level_db - self.noise_floor_db)
+        elif not is_loud:
+            self.noise_floor_db = min(
+                self.noise_floor_db + self.floor_rise * (level_db - self.noise_floor_db), self.max_floor_db
+            )
+
+        if is_loud:
+            if self.open_frames == 0:
+                self.opening_count += 1
+                is_keyword_detected = self._flush_pre_roll()
+            else:
+                is_keyword_detected = False
+            self.open_frames = self.hangover_frames
+            return self.detector.detect_keyword(frame) or is_keyword_detected
+
+        if self.open_frames > 0:
+            self.open_frames -= 1
+            return self.detector.detect_keyword(frame)
+
+        self.skipped_count += 1
+        self._keep(frame)
+        return False
+
+    def _keep(self, frame: np.ndarray) -> None:
+        if len(self.pre_roll) == 0 or len(frame) != self.frame_size:
+            self.unreported_samples += len(frame)
+            return
+        if self.pre_roll_count == len(self.pre_roll):
+            # The oldest frame drops out of the pre-roll
+            self.unreported_samples += self.frame_size
+        else:
+            self.pre_roll_count += 1
+        self.pre_roll[self.pre_roll_index] = frame
+        self.pre_roll_index = (self.pre_roll_index + 1) % len(self.pre_roll)
+
+    def _flush_pre_roll(self) -> bool:
+        if self.unreported_samples:
+            self.detector.skip(self.unreported_samples)
+            self.unreported_samples = 0
+
+        is_keyword_detected = False
+        first = (self.pre_roll_index - self.pre_roll_count) % max(len(self.pre_roll), 1)
+        for i in range(self.pre_roll_count):
+            frame = self.pre_roll[(first + i) % len(self.pre_roll)]
+            # Counted as skipped before, but they reach the detector after all
+            self.skipped_count -= 1
+            is_keyword_detected = self.detector.detect_keyword(frame) or is_keyword_detected
+        self.pre_roll_count = 0
+        return is_keyword_detected
@@ -0,0 +1,64 @@
+from typing import Optional
+
+import numpy as np
+import speech_recognition as sr
+
+from audio_transcription.SpeechAudioData import SpeechAudioData
+
+
+class RecordingBuffer:
+    """
+    Preallocated buffer for a recording of 16 bit PCM samples.
+
+    The buffer is allocated once and reused for every recording. Frames are appended by copying them into the
+    buffer, and `view` returns slices of the recorded samples without copying, so that the keyword detector,
+    the VAD and the recorder work on the same samples.
+
+    Args:
+        max_duration_s (float): Maximum duration of a recording in seconds.
+        sample_rate (int): Sample rate of the recorded audio.
+    """
+
+    SAMPLE_WIDTH: int = 2
+
+    def __init__(self, max_duration_s: float, sample_rate: int):
+        self.sample_rate = sample_rate
+        self.buffer = np.zeros(int(max_duration_s * sample_rate), dtype=np.int16)
+        self.length = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.buffer)
+
+    def is_full(self) -> bool:
+        return self.length >= self.capacity
+
+    def append(self, samples: np.ndarray) -> None:
+        sample_count = min(len(samples), self.capacity - self.length)
+        self.buffer[self.length : self.length + sample_count] = samples[:sample_count]
+        self.length += sample_count
+
+    def view(self, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        end = self.length if end is None else min(end, self.length)
+        return self.buffer[start:end]
+
+    def to_audio_data(
+        self, end: Optional[int] = None, speech_start: int = 0, speech_end: Optional[int] = None
+    ) -> SpeechAudioData:
+        """
+        Copies the recorded samples once into an `AudioData` object that is handed to the transcriber.
+
+        Args:
+            speech_start (int): Index of the first sample of the speech, as found by the VAD.
+            speech_end (int, optional): Index after the last sample of the speech. Defaults to `end`.
+        """
+        return SpeechAudioData(
+            self.view(0, end).tobytes(),
+            sample_rate=self.sample_rate,
+            sample_width=self.SAMPLE_WIDTH,
+            speech_start=speech_start,
+            speech_end=speech_end,
+        )
+
+    def reset(self) -> None:
+        self.length = 0
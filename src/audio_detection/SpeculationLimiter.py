@@ -0,0 +1,51 @@
+import threading
+from concurrent.futures import Future
+from typing import Dict, List
+
+
+class SpeculationLimiter:
+    """
+    Bounds and counts the speculative transcriptions of a stream.
+
+    `Future.cancel()` only cancels a transcription that has not started yet. A discarded transcription that already
+    runs, e.g. an upload to a cloud service, keeps running and is paid for. So a new speculation is only started while
+    fewer than `max_running` transcriptions of the stream are still running, otherwise the recording is transcribed
+    once at the endpoint. Discarded transcriptions that could not be cancelled anymore are counted as wasted.
+
+    Args:
+        max_running (int): Maximum number of speculative transcriptions of the stream that run at the same time.
+    """
+
+    def __init__(self, max_running: int = 2):
+        self.max_running = max_running
+        self.running: List[Future] = []
+        self.lock = threading.Lock()
+
+        self.started_count = 0
+        self.discarded_count = 0
+        self.wasted_count = 0  # Discarded after it started, so it could not be cancelled
+
+    def can_start(self) -> bool:
+        with self.lock:
+            self.running = [future for future in self.running if not future.done()]
+            return len(self.running) < self.max_running
+
+    def started(self, transcription: Future) -> None:
+        with self.lock:
+            self.running.append(transcription)
+            self.started_count += 1
+
+    def discard(self, transcription: Future) -> None:
+        is_cancelled = transcription.cancel()
+        with self.lock:
+            self.discarded_count += 1
+            if not is_cancelled:
+                self.wasted_count += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "started": self.started_count,
+                "discarded": self.discarded_count,
+                "wasted": self.wasted_count,
+            }
@@ -1,12 +1,23 @@
 from abc import ABC, abstractmethod
-from typing import List
+
+import numpy as np
 
 
 class IVoiceActivityDetector(ABC):
+    frame_size: int  # Number of samples per frame the detector expects
+
     @abstractmethod
     def __init__(self, aggressiveness: int, sample_rate: int):
         pass
 
     @abstractmethod
-    def is_speech(self, audio_frame: List[int]) -> bool:
+    def is_speech(self, audio_frame: np.ndarray) -> bool:
         pass
+
+    def reset_states(self) -> None:
+        """Resets the internal state of stateful detectors before a new recording."""
+        pass
+
+    def is_speech_frames(self, audio_frames: np.ndarray) -> np.ndarray:
+        """Returns the speech decision of every consecutive frame of shape `(n, frame_size)`, in a single call."""
+        return np.array([self.is_speech(audio_frame) for audio_frame in audio_frames], dtype=bool)
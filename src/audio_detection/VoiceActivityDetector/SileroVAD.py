@@ -1,36 +1,171 @@
-import contextlib
+import importlib.util
 import logging
 import os
+from typing import Optional
 
 import numpy as np
-import torch
 
 from .IVoiceActivityDetector import IVoiceActivityDetector
 
 logger = logging.getLogger(__name__)
 
+models_dir = os.path.join("models", "SileroVAD")
+jit_model = os.path.join(models_dir, "silero_vad.jit")
+onnx_model = os.path.join(models_dir, "silero_vad.onnx")
+
 
 class SileroVAD(IVoiceActivityDetector):
-    def __init__(self, sample_rate: int = 16000):
-        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
-            model, _ = torch.hub.load(
-                repo_or_dir="snakers4/silero-vad", model="silero_vad", force_reload=True, onnx=False
-            )
-        logger.debug("Model and utils loaded from snakers4/silero-vad")
+    """
+    Silero VAD with a TorchScript (`backend="jit"`) or ONNX Runtime (`backend="onnx"`) backend.
+
+    The model is loaded from `model_path` (defaults to `models/SileroVAD/silero_vad.jit` or `.onnx`). If it does not
+    exist, the model bundled with the `silero-vad` package is used, and for the JIT backend a repository in the torch
+    hub cache. The model is never downloaded at startup.
+
+    `speech_probabilities` scores many consecutive windows per call. The recurrent state of the model (and for the
+    ONNX backend the last samples of the previous window, which the model expects as context) is carried across
+    windows and calls until `reset_states` is called. As every window depends on the state after the previous one,
+    the windows are not batched: every window is a forward pass of its own, a call only saves the per-call overhead
+    of the caller.
+
+    The JIT backend runs with the thread count of torch, which is a setting of the whole process (see
+    `torch.set_num_threads`), so it is not changed here. `num_threads` only applies to the ONNX Runtime session.
+
+    Args:
+        sample_rate (int): Sample rate of the audio, 16000 or 8000.
+        backend (str): "jit" or "onnx".
+        model_path (str, optional): Path of the model file.
+        probability_threshold (float): Speech probability above which a window is speech.
+        normalize_input (bool): Whether the int16 samples are scaled to [-1, 1], the range the model was trained on.
+            Off by default, as earlier versions passed the unscaled samples and the endpointing of existing setups is
+            tuned to that together with the default threshold.
+        num_threads (int): Number of threads of the ONNX Runtime session.
+    """
 
-        self.model = model
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        backend: str = "jit",
+        model_path: Optional[str] = None,
+        probability_threshold: float = 0.8,
+        normalize_input: bool = False,
+        num_threads: int = 1,
+    ):
         self.sample_rate = sample_rate
         self.window_size_samples = 512 if sample_rate == 16000 else 256
-        self.model.reset_states()
+        self.context_size_samples = 64 if sample_rate == 16000 else 32
+        self.frame_size = self.window_size_samples
+        self.probability_threshold = probability_threshold
+        self.input_scale = 1 / 32768.0 if normalize_input else 1.0
+        self.backend = backend
+
+        if backend == "jit":
+            self._load_jit_model(model_path or jit_model)
+        elif backend == "onnx":
+            self._load_onnx_model(model_path or onnx_model, num_threads)
+        else:
+            raise ValueError(f"Unknown SileroVAD backend '{backend}', choose from 'jit' or 'onnx'.")
+
+        self.reset_states()
+
+    def _load_jit_model(self, model_path: str) -> None:
+        import torch
+
+        path = model_path if os.path.isfile(model_path) else self._packaged_model("silero_vad.jit")
+        hub_repo = os.path.join(torch.hub.get_dir(), "snakers4_silero-vad_master")
+        if path is not None:
+            self.model = torch.jit.load(path, map_location="cpu")
+            logger.debug("Model loaded from %s", path)
+        elif os.path.isdir(hub_repo):
+            # Loaded from the local clone, torch hub contacts GitHub to validate a remote repository on every load
+            self.model, _ = torch.hub.load(repo_or_dir=hub_repo, model="silero_vad", source="local", onnx=False)
+            logger.debug("Model loaded from torch hub cache %s", hub_repo)
+        else:
+            raise FileNotFoundError(
+                f"SileroVAD model not found at '{model_path}'. Install the silero-vad package or place the model "
+                "there."
+            )
+        self.model.eval()
 
-    def is_speech(self, audio_frame: bytes, probability_threshold: float = 0.8) -> bool:
-        audio_array = np.frombuffer(audio_frame, dtype=np.int16)
-        audio_array = np.copy(audio_array)
-        audio_tensor = torch.from_numpy(audio_array).float()
+    def _load_onnx_model(self, model_path: str, num_threads: int) -> None:
+        import onnxruntime
 
-        if len(audio_array) != self.window_size_samples:
-            raise ValueError(f"Expected {self.window_size_samples} samples, but got {len(audio_array)} samples.")
+        path = model_path if os.path.isfile(model_path) else self._packaged_model("silero_vad.onnx")
+        if path is None:
+            raise FileNotFoundError(
+                f"SileroVAD ONNX model not found at '{model_path}'. Install the silero-vad package or place the model "
+                "there (https://github.com/snakers4/silero-vad/tree/master/src/silero_vad/data)."
+            )
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.onnx_input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.onnx_sample_rate = np.array(self.sample_rate, dtype=np.int64)
+        logger.debug("ONNX model loaded from %s", path)
+
+    @staticmethod
+    def _packaged_model(file_name: str) -> Optional[str]:
+        """Returns the path of a model bundled with the `silero-vad` package, if it is installed."""
+        # Found without importing the package, which imports torch and torchaudio
+        spec = importlib.util.find_spec("silero_vad")
+        if spec is None or not spec.submodule_search_locations:
+            return None
+        model_file = os.path.join(list(spec.submodule_search_locations)[0], "data", file_name)
+        return model_file if os.path.isfile(model_file) else None
+
+    def reset_states(self) -> None:
+        if self.backend == "jit":
+            self.model.reset_states()
+        elif "state" in self.onnx_input_names:
+            self.onnx_state = {"state": np.zeros((2, 1, 128), dtype=np.float32)}
+            # Silero VAD v5 expects the last samples of the previous window in front of every window
+            self.onnx_context: Optional[np.ndarray] = np.zeros((1, self.context_size_samples), dtype=np.float32)
+        else:
+            self.onnx_state = {"h": np.zeros((2, 1, 64), dtype=np.float32), "c": np.zeros((2, 1, 64), dtype=np.float32)}
+            self.onnx_context = None
+
+    def speech_probabilities(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Returns the speech probability of every window of the given int16 samples (shape `(n * window_size_samples,)`
+        or `(n, window_size_samples)`).
+        """
+        windows = np.reshape(audio, (-1, self.window_size_samples)).astype(np.float32) * self.input_scale
+
+        if self.backend == "jit":
+            return self._jit_probabilities(windows)
+        return self._onnx_probabilities(windows)
 
+    def _jit_probabilities(self, windows: np.ndarray) -> np.ndarray:
+        import torch
+
+        # One forward pass per window, as the recurrent state of a window is the input of the next
+        probabilities = np.empty(len(windows), dtype=np.float32)
         with torch.no_grad():
-            speech_prob = self.model(audio_tensor, self.sample_rate).item()
-        return speech_prob > probability_threshold
+            for i, window in enumerate(torch.from_numpy(windows)):
+                probabilities[i] = self.model(window, self.sample_rate).item()
+        return probabilities
+
+    def _onnx_probabilities(self, windows: np.ndarray) -> np.ndarray:
+        probabilities = np.empty(len(windows), dtype=np.float32)
+        state_names = list(self.onnx_state)
+        for i in range(len(windows)):
+            window = windows[i : i + 1]
+            if self.onnx_context is not None:
+                window = np.concatenate((self.onnx_context, window), axis=1)
+                self.onnx_context = window[:, -self.context_size_samples :]
+            outputs = self.session.run(None, {"input": window, "sr": self.onnx_sample_rate, **self.onnx_state})
+            probabilities[i] = outputs[0][0, 0] if outputs[0].ndim == 2 else outputs[0][0]
+            self.onnx_state = dict(zip(state_names, outputs[1:]))
+        return probabilities
+
+    def is_speech(self, audio_frame: np.ndarray, probability_threshold: Optional[float] = None) -> bool:
+        if len(audio_frame) != self.window_size_samples:
+            raise ValueError(f"Expected {self.window_size_samples} samples, but got {len(audio_frame)} samples.")
+
+        return bool(self.is_speech_frames(audio_frame, probability_threshold)[0])
+
+    def is_speech_frames(self, audio_frames: np.ndarray, probability_threshold: Optional[float] = None) -> np.ndarray:
+        threshold = self.probability_threshold if probability_threshold is None else probability_threshold
+        return self.speech_probabilities(audio_frames) > threshold
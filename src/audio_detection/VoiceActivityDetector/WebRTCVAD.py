@@ -1,3 +1,4 @@
+import numpy as np
 import webrtcvad
 
 from .IVoiceActivityDetector import IVoiceActivityDetector
@@ -7,6 +8,8 @@ class WebRTCVAD(IVoiceActivityDetector):
     def __init__(self, aggressiveness: int = 3, sample_rate: int = 16000):
         self.vad = webrtcvad.Vad(aggressiveness)
         self.sample_rate = sample_rate
+        self.frame_size = sample_rate // 50  # 20 ms frames
 
-    def is_speech(self, audio_frame: bytes) -> bool:
-        return self.vad.is_speech(audio_frame, self.sample_rate)
+    def is_speech(self, audio_frame: np.ndarray) -> bool:
+        # webrtcvad only accepts immutable bytes
+        return self.vad.is_speech(audio_frame.tobytes(), self.sample_rate)
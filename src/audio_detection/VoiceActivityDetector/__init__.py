@@ -1,3 +1,16 @@
+from typing import TYPE_CHECKING
+
+from lazy_imports import lazy_attributes
+
 from .IVoiceActivityDetector import IVoiceActivityDetector
-from .SileroVAD import SileroVAD
 from .WebRTCVAD import WebRTCVAD
+
+if TYPE_CHECKING:
+    from .SileroVAD import SileroVAD
+
+__getattr__ = lazy_attributes(
+    __name__,
+    {
+        "SileroVAD": ".SileroVAD",
+    },
+)
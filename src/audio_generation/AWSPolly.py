@@ -1,9 +1,13 @@
+from typing import Iterator
+
 import boto3
 
 from .IAudioGenerator import IAudioGenerator
 
 
 class AWSPolly(IAudioGenerator):
+    STREAM_CHUNK_BYTES: int = 4096
+
     def __init__(self, language_code: str, model_name: str):
         self.client = boto3.client("polly")
         self.language_code = language_code
@@ -12,13 +16,26 @@ class AWSPolly(IAudioGenerator):
     def get_sample_rate(self) -> int:
         return 16000
 
-    def generate_audio(self, text: str):
-        response = self.client.synthesize_speech(
+    def _synthesize_speech(self, text: str):
+        return self.client.synthesize_speech(
             LanguageCode=self.language_code,
             OutputFormat="pcm",
             Text=text,
             VoiceId=self.model_name,
         )
 
+    def generate_audio(self, text: str):
+        response = self._synthesize_speech(text)
+
         audio_data = response["AudioStream"].read()
         return audio_data
+
+    def generate_audio_stream(self, text: str) -> Iterator[bytes]:
+        # Polly sends the audio while it is synthesized, the chunks are yielded as they are received
+        audio_stream = self._synthesize_speech(text)["AudioStream"]
+        try:
+            for chunk in audio_stream.iter_chunks(self.STREAM_CHUNK_BYTES):
+                yield chunk
+        finally:
+            # Also if the playback is stopped, so that the connection is released
+            audio_stream.close()
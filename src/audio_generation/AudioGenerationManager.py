@@ -1,28 +1,201 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Optional
+
 import pyaudio
 
+from tracing import Trace, Tracer
+
 from .IAudioGenerator import IAudioGenerator
+from .JitterBuffer import JitterBuffer
+from .pcm import strip_wav_header
+from .SentenceSegmenter import SentenceSegmenter
+
+logger = logging.getLogger(__name__)
 
 
 class AudioGenerationManager:
-    def __init__(self, audio_generator: IAudioGenerator):
+    WRITE_CHUNK_FRAMES: int = 4096
+    STOP_POLL_INTERVAL_S: float = 0.05
+
+    def __init__(
+        self,
+        audio_generator: IAudioGenerator,
+        synthesis_workers: int = 2,
+        tracer: Optional[Tracer] = None,
+        output_stream=None,
+        jitter_buffer_ms: float = 100.0,
+        max_buffer_ms: float = 3000.0,
+    ):
         self.audio_generator = audio_generator
-        self.pa_instance = pyaudio.PyAudio()
-        self.stream = self.pa_instance.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=self.audio_generator.get_sample_rate(),
-            output=True,
-        )
+        self.tracer = tracer
+        # Audio that is buffered per segment before it is played and at most, 16 bit mono
+        self.prefill_bytes = int(2 * audio_generator.get_sample_rate() * jitter_buffer_ms / 1000)
+        self.max_buffer_bytes = int(2 * audio_generator.get_sample_rate() * max_buffer_ms / 1000)
+        self.synthesis_executor = ThreadPoolExecutor(max_workers=synthesis_workers, thread_name_prefix="tts")
+        self.playback_stop: Optional[threading.Event] = None  # Stops the playback of the current response
+
+        # Any object with the interface of a PyAudio output stream can be passed as output (e.g. for benchmarks)
+        self.pa_instance = None
+        self.stream = output_stream
+        if self.stream is None:
+            self.pa_instance = pyaudio.PyAudio()
+            self.stream = self.pa_instance.open(
+                format=pyaudio.paInt16,
+                channels=1,
+                rate=self.audio_generator.get_sample_rate(),
+                output=True,
+            )
 
     def generate_audio(self, text: str):
         return self.audio_generator.generate_audio(text)
 
+    def _synthesize(self, text: str, buffer: JitterBuffer, trace: Optional[Trace] = None) -> None:
+        """Streams the audio of a segment into its jitter buffer, stops once the buffer is cancelled."""
+        if buffer.cancelled:
+            buffer.close()
+            return
+
+        start = time.perf_counter()
+        try:
+            audio_stream = self.audio_generator.generate_audio_stream(text)
+            try:
+                for i, chunk in enumerate(audio_stream):
+                    if buffer.cancelled:
+                        break
+                    if i == 0 and self.tracer is not None:
+                        self.tracer.record_span("tts_first_chunk", start, time.perf_counter(), trace)
+                        self.tracer.mark("first_tts_audio", trace)
+                    buffer.put(chunk)
+            finally:
+                audio_stream.close()
+        except Exception as e:
+            buffer.close(e)
+        else:
+            buffer.close()
+        if self.tracer is not None:
+            self.tracer.record_span("tts_synthesis", start, time.perf_counter(), trace)
+
     def play(self, audio_data):
         self.stream.start_stream()
-        num_frames = len(audio_data) // 2
-        self.stream.write(audio_data, num_frames)
+        self._write(audio_data)
         self.stream.stop_stream()
 
+    async def speak(
+        self,
+        text_stream: AsyncIterator[str],
+        on_playback_start: Optional[Callable[[], None]] = None,
+        trace: Optional[Trace] = None,
+    ) -> str:
+        """
+        Synthesizes and plays a streamed text response segment by segment.
+
+        The text stream is cut into sentences by the `SentenceSegmenter`. Every complete sentence is handed to the
+        audio generator right away, while a player thread plays the synthesized segments in order. Thereby, the
+        first sentence is spoken while the following ones are still being generated by the LLM and synthesized.
+        The audio of a segment is streamed into a `JitterBuffer`, its playback starts once the first
+        `jitter_buffer_ms` of it arrived instead of the complete segment.
+
+        If the task is cancelled or `stop_playback` is called (e.g. on a barge-in), the playback stops after the
+        current chunk and all segments that are not synthesized yet are cancelled.
+
+        Args:
+            text_stream (AsyncIterator[str]): The streamed text chunks of the response.
+            on_playback_start (Callable[[], None], optional): Invoked once right before the first segment is played.
+            trace (Trace, optional): Trace of the request the synthesis is recorded in, defaults to the current one.
+
+        Returns:
+            str: The complete text of the response.
+        """
+        segmenter = SentenceSegmenter()
+        playback_queue: queue.Queue[Optional[JitterBuffer]] = queue.Queue()
+        stop = self.playback_stop = threading.Event()
+        player = threading.Thread(target=self._play_queue, args=(playback_queue, on_playback_start, stop), daemon=True)
+        player.start()
+        loop = asyncio.get_running_loop()
+
+        response = ""
+        try:
+            async for chunk in text_stream:
+                response += chunk
+                for segment in segmenter.push(chunk):
+                    playback_queue.put(self._submit_segment(segment, trace))
+
+            segment = segmenter.flush()
+            if segment:
+                playback_queue.put(self._submit_segment(segment, trace))
+            playback_queue.put(None)
+            await loop.run_in_executor(None, player.join)
+        except BaseException:
+            stop.set()
+            playback_queue.put(None)
+            # The next response must not be played while this one is still written. Joined without awaiting, as the
+            # task may be cancelled again, but the player stops after the current chunk.
+            player.join()
+            raise
+
+        return response
+
+    def stop_playback(self) -> None:
+        """Stops the playback of the current response, may be called from any thread."""
+        stop = self.playback_stop
+        if stop is not None:
+            stop.set()
+
+    def _submit_segment(self, text: str, trace: Optional[Trace] = None) -> JitterBuffer:
+        buffer = JitterBuffer(self.prefill_bytes, self.max_buffer_bytes)
+        self.synthesis_executor.submit(self._synthesize, text, buffer, trace)
+        return buffer
+
+    def _play_queue(
+        self, playback_queue: "queue.Queue[Optional[JitterBuffer]]", on_playback_start, stop: threading.Event
+    ) -> None:
+        started = False
+        while (buffer := playback_queue.get()) is not None:
+            try:
+                for chunk in buffer.read(stop, self.STOP_POLL_INTERVAL_S):
+                    if not started:
+                        started = True
+                        self.stream.start_stream()
+                        if on_playback_start:
+                            on_playback_start()
+
+                    self._write(chunk, stop)
+            except Exception:
+                logger.exception("Audio generation of a response segment failed")
+            finally:
+                if stop.is_set():
+                    # The synthesis of this and all following segments stops
+                    buffer.cancel()
+            if buffer.underruns:
+                logger.debug("Playback of a segment ran out of audio %s times", buffer.underruns)
+
+        if started:
+            self.stream.stop_stream()
+
+    def _write(self, audio_data, stop: Optional[threading.Event] = None):
+        if stop is None:
+            # The header of LINEAR16 responses would be played as a click
+            audio_data = strip_wav_header(audio_data)
+            if isinstance(audio_data, bytes):
+                self.stream.write(audio_data, len(audio_data) // 2)
+                return
+
+        # Memory-mapped audio (e.g. from the cache) is written in chunks, as PyAudio only accepts bytes. Between the
+        # chunks, a stop of the playback is noticed.
+        chunk_size = 2 * self.WRITE_CHUNK_FRAMES
+        for i in range(0, len(audio_data), chunk_size):
+            if stop is not None and stop.is_set():
+                return
+            chunk = bytes(audio_data[i : i + chunk_size])
+            self.stream.write(chunk, len(chunk) // 2)
+
     def close(self):
+        self.synthesis_executor.shutdown(wait=False, cancel_futures=True)
         self.stream.close()
-        self.pa_instance.terminate()
+        if self.pa_instance is not None:
+            self.pa_instance.terminate()
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+
+from .IAudioGenerator import IAudioGenerator
+from .pcm import AudioBuffer, strip_wav_header
+
+logger = logging.getLogger(__name__)
+
+
+class CachedAudioGenerator(IAudioGenerator):
+    """
+    Content-addressed cache around an `IAudioGenerator`.
+
+    The generated audio is cached under a key of provider, voice, language, speed and text. The cache has an
+    in-memory LRU tier and an on-disk tier, both limited in size. On disk, the raw PCM samples are stored in one
+    file per key, which is memory-mapped when it is read. Least recently used files are evicted first.
+
+    Args:
+        audio_generator (IAudioGenerator): The generator whose audio is cached.
+        cache_dir (str): Directory of the on-disk tier.
+        max_memory_bytes (int): Size limit of the in-memory tier.
+        max_disk_bytes (int): Size limit of the on-disk tier.
+    """
+
+    def __init__(
+        self,
+        audio_generator: IAudioGenerator,
+        cache_dir: str = os.path.join("sounds", "cache"),
+        max_memory_bytes: int = 32 * 1024 * 1024,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+    ):
+        self.audio_generator = audio_generator
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        self.memory_cache: OrderedDict[str, AudioBuffer] = OrderedDict()
+        self.memory_bytes = 0
+        self.lock = threading.Lock()
+
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get_sample_rate(self) -> int:
+        return self.audio_generator.get_sample_rate()
+
+    def cache_key(self, text: str) -> str:
+        key = [
+            type(self.audio_generator).__name__,
+            getattr(self.audio_generator, "model_name", None),
+            getattr(self.audio_generator, "language_code", None),
+            getattr(self.audio_generator, "speed", None),
+            # The audio is cached as raw PCM, which is only valid at the rate it was synthesized at
+            self.audio_generator.get_sample_rate(),
+            text.strip(),
+        ]
+        return hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+
+    def generate_audio(self, text: str) -> AudioBuffer:
+        key = self.cache_key(text)
+
+        audio_data = self._get_from_memory(key)
+        if audio_data is not None:
+            self.hits["memory"] += 1
+            return audio_data
+
+        audio_data = self._get_from_disk(key)
+        if audio_data is not None:
+            self.hits["disk"] += 1
+            self._put_in_memory(key, audio_data)
+            return audio_data
+
+        self.misses += 1
+        audio_data = strip_wav_header(self.audio_generator.generate_audio(text))
+        self._put_on_disk(key, audio_data)
+        self._put_in_memory(key, audio_data)
+        return audio_data
+
+    def generate_audio_stream(self, text: str) -> Iterator[AudioBuffer]:
+        """Streams cache misses from the wrapped generator, they are cached once the audio is complete."""
+        key = self.cache_key(text)
+
+        audio_data = self._get_from_memory(key)
+        if audio_data is not None:
+            self.hits["memory"] += 1
+            yield audio_data
+            return
+
+        audio_data = self._get_from_disk(key)
+        if audio_data is not None:
+            self.hits["disk"] += 1
+            self._put_in_memory(key, audio_data)
+            yield audio_data
+            return
+
+        self.misses += 1
+        chunks = []
+        for chunk in self.audio_generator.generate_audio_stream(text):
+            chunks.append(chunk)
+            yield chunk
+
+        # Not reached if the stream is closed early (e.g. the playback was stopped), incomplete audio is not cached
+        audio_data = b"".join(chunks)
+        self._put_on_disk(key, audio_data)
+        self._put_in_memory(key, audio_data)
+
+    def prefetch(self, phrases: Iterable[str], max_workers: int = 4) -> None:
+        """Synthesizes a bank of phrases in parallel, so that they are served from the cache later on."""
+        phrases = list(phrases)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts-prefetch") as executor:
+            for phrase, result in zip(phrases, executor.map(self._prefetch_phrase, phrases)):
+                if isinstance(result, Exception):
+                    logger.warning("Prefetching audio of '%s' failed: %s", phrase, result)
+
+    def _prefetch_phrase(self, phrase: str) -> Optional[Exception]:
+        try:
+            self.generate_audio(phrase)
+        except Exception as e:
+            return e
+        return None
+
+    def _get_from_memory(self, key: str) -> Optional[AudioBuffer]:
+        with self.lock:
+            audio_data = self.memory_cache.get(key)
+            if audio_data is not None:
+                self.memory_cache.move_to_end(key)
+            return audio_data
+
+    def _put_in_memory(self, key: str, audio_data: AudioBuffer) -> None:
+        if len(audio_data) > self.max_memory_bytes:
+            return
+
+        with self.lock:
+            if key in self.memory_cache:
+                return
+            self.memory_cache[key] = audio_data
+            self.memory_bytes += len(audio_data)
+
+            while self.memory_bytes > self.max_memory_bytes:
+                _, evicted = self.memory_cache.popitem(last=False)
+                self.memory_bytes -= len(evicted)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".pcm")
+
+    def _get_from_disk(self, key: str) -> Optional[memoryview]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio_data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            os.utime(path)  # Mark as recently used for the eviction
+        except (FileNotFoundError, ValueError):
+            # ValueError: empty file, which cannot be mapped
+            return None
+        return audio_data
+
+    def _put_on_disk(self, key: str, audio_data: AudioBuffer) -> None:
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(audio_data)
+        os.replace(temp_path, path)
+
+        self._evict_from_disk()
+
+    def _evict_from_disk(self) -> None:
+        with os.scandir(self.cache_dir) as entries:
+            files = [
+                (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                for entry in entries
+                if entry.name.endswith(".pcm")
+            ]
+
+        total_bytes = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total_bytes <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total_bytes -= size
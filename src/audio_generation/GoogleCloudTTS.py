@@ -1,13 +1,19 @@
-import io
+from typing import Iterator
 
 from google.cloud import texttospeech
 
 from .IAudioGenerator import IAudioGenerator
+from .pcm import strip_wav_header
 
 
 class GoogleCloudTTS(IAudioGenerator):
+    STREAM_CHUNK_BYTES: int = 8192
+
     def __init__(self, language_code: str = "en-US", model_name: str = "en-US-Journey-D", speed: float = 1.2):
         self.client = texttospeech.TextToSpeechClient()
+        self.language_code = language_code
+        self.model_name = model_name
+        self.speed = speed
         self.voice = texttospeech.VoiceSelectionParams(language_code=language_code, name=model_name)
         self.audio_config = texttospeech.AudioConfig(
             audio_encoding=texttospeech.AudioEncoding.LINEAR16, speaking_rate=speed
@@ -19,5 +25,10 @@ class GoogleCloudTTS(IAudioGenerator):
     def generate_audio(self, text: str):
         input = texttospeech.SynthesisInput(text=text)
         response = self.client.synthesize_speech(input=input, voice=self.voice, audio_config=self.audio_config)
-        audio_data = io.BytesIO(response.audio_content).getvalue()
-        return audio_data
+        return response.audio_content
+
+    def generate_audio_stream(self, text: str) -> Iterator[memoryview]:
+        # The unary API returns the complete audio, which is yielded in chunks of views without copying it
+        audio_data = strip_wav_header(memoryview(self.generate_audio(text)))
+        for i in range(0, len(audio_data), self.STREAM_CHUNK_BYTES):
+            yield audio_data[i : i + self.STREAM_CHUNK_BYTES]
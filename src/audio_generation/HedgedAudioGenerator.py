@@ -0,0 +1,185 @@
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from latency_stats import LatencyStats, adaptive_hedge_delay, latency_report, provider_names, rank_by_latency
+
+from .IAudioGenerator import IAudioGenerator
+from .pcm import AudioBuffer
+from .SynthesisAttempt import SynthesisAttempt
+
+logger = logging.getLogger(__name__)
+
+
+class HedgedAudioGenerator(IAudioGenerator):
+    """
+    Composite text-to-speech that hedges a synthesis across several providers.
+
+    The text is sent to the primary provider first. If its first audio has not arrived within the hedge delay (or it
+    failed), the text is sent to all other providers as well. The provider whose first audio arrives first is played,
+    the other syntheses are cancelled. If no provider delivers audio before the deadline, a `TimeoutError` is raised.
+
+    The providers have different sample rates (e.g. 24 kHz for Google, 16 kHz for Polly), so their audio is converted
+    to `sample_rate` by a `PolyphaseResampler`, and the output device is opened at this rate regardless of the
+    provider that answers.
+
+    The time to the first audio of every provider is tracked, for attempts that lost the race as the time until they
+    were cancelled. If adaptive, the provider with the lowest 90th percentile becomes the primary, and the hedge delay
+    follows the 95th percentile of the primary. The statistics are kept per provider, under the name of its class,
+    numbered if several providers are of the same class (e.g. "GoogleCloudTTS#1" and "GoogleCloudTTS#2").
+
+    Args:
+        providers (List[IAudioGenerator]): Providers in the order of preference.
+        sample_rate (int): Sample rate of the output.
+        hedge_delay_s (float): Maximum time to the first audio of the primary before the other providers are asked.
+        min_hedge_delay_s (float): Minimum adaptive hedge delay.
+        deadline_s (float): Maximum time to the first audio of any provider.
+        adaptive (bool): Whether the primary and the hedge delay adapt to the measured latencies.
+        min_samples (int): Number of measured latencies of a provider before they are used.
+        max_buffered_chunks (int): Number of chunks a provider may be ahead of the playback.
+    """
+
+    def __init__(
+        self,
+        providers: List[IAudioGenerator],
+        sample_rate: int = 24000,
+        hedge_delay_s: float = 0.8,
+        min_hedge_delay_s: float = 0.2,
+        deadline_s: float = 8.0,
+        adaptive: bool = True,
+        min_samples: int = 5,
+        max_buffered_chunks: int = 64,
+    ):
+        if not providers:
+            raise ValueError("At least one audio generator is required.")
+        self.providers = providers
+        self.sample_rate = sample_rate
+        self.hedge_delay_s = hedge_delay_s
+        self.min_hedge_delay_s = min_hedge_delay_s
+        self.deadline_s = deadline_s
+        self.adaptive = adaptive
+        self.min_samples = min_samples
+        self.max_buffered_chunks = max_buffered_chunks
+        # Part of the cache key of the `CachedAudioGenerator`
+        self.model_name = "+".join(getattr(p, "model_name", None) or type(p).__name__ for p in providers)
+
+        self.names = provider_names(providers)
+        self.named_providers: Dict[str, IAudioGenerator] = dict(zip(self.names, providers))
+
+        self.latency_stats: Dict[str, LatencyStats] = {}
+        self.errors: Dict[str, int] = {}
+        self.wins: Dict[str, int] = {}
+        self.lock = threading.Lock()  # Syntheses run concurrently, e.g. the segments of a response
+
+    def get_sample_rate(self) -> int:
+        return self.sample_rate
+
+    def generate_audio(self, text: str) -> bytes:
+        return b"".join(self.generate_audio_stream(text))
+
+    def generate_audio_stream(self, text: str) -> Iterator[AudioBuffer]:
+        winner = self._race(text)
+        try:
+            yield from winner.read()
+        finally:
+            winner.cancel()
+
+    def _race(self, text: str) -> SynthesisAttempt:
+        first_chunks: queue.Queue = queue.Queue()
+        deadline = time.monotonic() + self.deadline_s
+        primary, *secondaries = self.ranked_names()
+        hedge_time = time.monotonic() + self.hedge_delay(primary)
+
+        attempts = [self._start(primary, text, first_chunks)]
+        recorded: List[SynthesisAttempt] = []
+        winner: Optional[SynthesisAttempt] = None
+        try:
+            while winner is None:
+                now = time.monotonic()
+                if now >= deadline:
+                    raise TimeoutError(f"No synthesized audio within {self.deadline_s} seconds.")
+
+                failed = [attempt for attempt in attempts if attempt.error is not None]
+                if secondaries and (now >= hedge_time or len(failed) == len(attempts)):
+                    logger.info("Hedging synthesis to %s", ", ".join(secondaries))
+                    attempts += [self._start(name, text, first_chunks) for name in secondaries]
+                    secondaries = []
+                elif not secondaries and len(failed) == len(attempts):
+                    raise RuntimeError("All audio generators failed.") from failed[-1].error
+
+                timeout = (hedge_time if secondaries else deadline) - now
+                try:
+                    attempt = first_chunks.get(timeout=max(timeout, 0))
+                except queue.Empty:
+                    continue
+                self._record(attempt)
+                recorded.append(attempt)
+                if attempt.error is None:
+                    winner = attempt
+        finally:
+            for attempt in attempts:
+                if attempt is not winner:
+                    attempt.cancel()
+                if attempt not in recorded:
+                    self._record_lost(attempt, winner)
+
+        with self.lock:
+            self.wins[winner.name] = self.wins.get(winner.name, 0) + 1
+        return winner
+
+    def _start(self, name: str, text: str, first_chunks: queue.Queue) -> SynthesisAttempt:
+        provider = self.named_providers[name]
+        return SynthesisAttempt(provider, text, self.sample_rate, first_chunks, self.max_buffered_chunks, name)
+
+    def _record(self, attempt: SynthesisAttempt) -> None:
+        if attempt.error is not None:
+            logger.warning("Synthesis with %s failed: %s", attempt.name, attempt.error)
+            with self.lock:
+                self.errors[attempt.name] = self.errors.get(attempt.name, 0) + 1
+            # A failure counts as at least as slow as the hedge delay, so that a provider which fails fast is not
+            # ranked first
+            self._record_latency(attempt.name, max(time.monotonic() - attempt.start, self.hedge_delay_s))
+            return
+
+        self._record_latency(attempt.name, attempt.first_chunk_s)
+        logger.debug("First audio of %s after %s seconds", attempt.name, attempt.first_chunk_s)
+
+    def _record_lost(self, attempt: SynthesisAttempt, winner: Optional[SynthesisAttempt]) -> None:
+        """
+        Records an attempt that lost the race. Without audio yet, the time until it was cancelled is recorded as a
+        lower bound, otherwise a primary that became slow would always lose and never be demoted. This is only done
+        if the attempt started no later than the winner: an attempt that was hedged to after the primary would be
+        recorded faster than the winner, and a slow provider would be promoted again.
+        """
+        first_chunk_s = attempt.first_chunk_s
+        if attempt.error is not None:
+            self._record(attempt)
+        elif first_chunk_s is not None:
+            self._record_latency(attempt.name, first_chunk_s)
+        elif winner is None or attempt.start <= winner.start:
+            self._record_latency(attempt.name, time.monotonic() - attempt.start)
+
+    def _record_latency(self, name: str, latency_s: float) -> None:
+        with self.lock:
+            stats = self.latency_stats.setdefault(name, LatencyStats())
+        stats.add(latency_s)
+
+    def ranked_names(self) -> List[str]:
+        if not self.adaptive:
+            return list(self.names)
+        return rank_by_latency(self.names, self.latency_stats, self.min_samples)
+
+    def ranked_providers(self) -> List[IAudioGenerator]:
+        return [self.named_providers[name] for name in self.ranked_names()]
+
+    def hedge_delay(self, primary: str) -> float:
+        if not self.adaptive:
+            return self.hedge_delay_s
+        return adaptive_hedge_delay(
+            self.latency_stats, primary, self.hedge_delay_s, self.min_hedge_delay_s, self.min_samples
+        )
+
+    def latency_report(self) -> Dict[str, Dict[str, float]]:
+        return latency_report(self.latency_stats)
@@ -1,4 +1,7 @@
 from abc import ABC, abstractmethod
+from typing import Iterator
+
+from .pcm import AudioBuffer, strip_wav_header
 
 
 class IAudioGenerator(ABC):
@@ -10,6 +13,13 @@ class IAudioGenerator(ABC):
     def generate_audio(self, text: str) -> bytes:
         pass
 
+    def generate_audio_stream(self, text: str) -> Iterator[AudioBuffer]:
+        """
+        Yields the raw PCM samples of the synthesized text in chunks, as they arrive. Providers that stream their
+        response override this, by default the complete audio is yielded at once.
+        """
+        yield strip_wav_header(self.generate_audio(text))
+
     @abstractmethod
     def get_sample_rate(self) -> int:
         pass
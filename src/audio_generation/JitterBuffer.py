@@ -0,0 +1,91 @@
+import threading
+from collections import deque
+from typing import Deque, Iterator, Optional
+
+from .pcm import AudioBuffer
+
+
+class JitterBuffer:
+    """
+    Audio chunks of a segment that is played while it is still synthesized.
+
+    The synthesis puts the chunks as they arrive and closes the buffer at the end. The player only starts to read
+    once `prefill_bytes` are buffered (or the buffer is closed), so that an uneven arrival of the chunks does not
+    cause gaps in the playback. If the buffer runs empty while the segment is played (an underrun), the player waits
+    until it is filled again. Played chunks are released right away, and the synthesis is blocked while `max_bytes`
+    are buffered, so the memory of a segment is limited however long it is.
+
+    Args:
+        prefill_bytes (int): Amount of audio that is buffered before the playback starts.
+        max_bytes (int, optional): Amount of audio that is buffered at most. Unlimited by default.
+    """
+
+    def __init__(self, prefill_bytes: int, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.prefill_bytes = prefill_bytes if max_bytes is None else min(prefill_bytes, max_bytes)
+        self.chunks: Deque[AudioBuffer] = deque()
+        self.buffered_bytes = 0
+        self.closed = False
+        self.cancelled = False  # Set by the player, the synthesis stops
+        self.error: Optional[BaseException] = None
+        self.underruns = 0
+        self.condition = threading.Condition()
+
+    def put(self, chunk: AudioBuffer) -> None:
+        """Adds a chunk, blocks while the buffer is full."""
+        with self.condition:
+            while self.max_bytes is not None and self.buffered_bytes >= self.max_bytes and not self.cancelled:
+                self.condition.wait()
+            if self.cancelled:
+                return
+            self.chunks.append(chunk)
+            self.buffered_bytes += len(chunk)
+            if self.buffered_bytes >= self.prefill_bytes:
+                self.condition.notify_all()
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        """Marks the end of the segment, or its failure."""
+        with self.condition:
+            self.closed = True
+            self.error = error
+            self.condition.notify_all()
+
+    def cancel(self) -> None:
+        with self.condition:
+            self.cancelled = True
+            self.chunks.clear()
+            self.buffered_bytes = 0
+            self.condition.notify_all()
+
+    def read(self, stop: threading.Event, poll_interval_s: float = 0.05) -> Iterator[AudioBuffer]:
+        """
+        Yields the chunks of the segment until it is closed or `stop` is set. Raises the error of the synthesis.
+
+        Args:
+            stop (threading.Event): Stops the reading, checked at least every `poll_interval_s` seconds.
+        """
+        prefilled = False
+        while True:
+            with self.condition:
+                while (
+                    not stop.is_set()
+                    and not self.closed
+                    and (not self.chunks or self.buffered_bytes < self.prefill_bytes)
+                ):
+                    if prefilled and not self.chunks:
+                        self.underruns += 1
+                        prefilled = False
+                    if prefilled and self.chunks:
+                        break
+                    self.condition.wait(poll_interval_s)
+                if stop.is_set():
+                    return
+                if not self.chunks:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                prefilled = True
+                chunk = self.chunks.popleft()
+                self.buffered_bytes -= len(chunk)
+                self.condition.notify_all()
+            yield chunk
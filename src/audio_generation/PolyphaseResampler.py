@@ -0,0 +1,75 @@
+from math import gcd
+
+import numpy as np
+
+from .pcm import AudioBuffer
+
+
+class PolyphaseResampler:
+    """
+    Streaming sample rate conversion of 16 bit mono PCM by a rational factor.
+
+    The signal is conceptually upsampled by `up`, low-pass filtered and downsampled by `down`. Only the filter taps
+    that hit input samples are evaluated: the windowed-sinc filter is split into `up` phases of `taps_per_phase`
+    taps, and every output sample is the dot product of one phase with the most recent input samples. All output
+    samples of a chunk are computed at once with NumPy. The last input samples are kept between chunks, so that
+    a stream can be resampled chunk by chunk without discontinuities.
+
+    Args:
+        from_rate (int): Sample rate of the input.
+        to_rate (int): Sample rate of the output.
+        taps_per_phase (int): Filter length per phase, longer filters attenuate aliasing better.
+    """
+
+    def __init__(self, from_rate: int, to_rate: int, taps_per_phase: int = 32):
+        divisor = gcd(from_rate, to_rate)
+        self.up = to_rate // divisor
+        self.down = from_rate // divisor
+        self.taps_per_phase = taps_per_phase
+
+        # Kaiser-windowed sinc at the upsampled rate, cut off at 90% of the lower of both Nyquist frequencies, so that
+        # the transition band ends before it
+        length = taps_per_phase * self.up
+        cutoff = 0.45 / max(self.up, self.down)
+        t = np.arange(length) - (length - 1) / 2
+        taps = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(length, 8.0)
+        taps *= self.up / taps.sum()
+        # Phase p applies the taps p, p + up, p + 2 up, ... to the input samples i, i - 1, i - 2, ... They are
+        # reversed, so that they are applied to a window of the input in ascending order.
+        self.phases = taps.reshape(taps_per_phase, self.up).T[:, ::-1].astype(np.float32)
+
+        self.history = np.zeros(taps_per_phase - 1, dtype=np.float32)
+        self.remainder = b""  # Odd byte of the last chunk
+        self.input_count = 0  # Number of input samples consumed
+        self.output_count = 0  # Number of output samples produced
+
+    @property
+    def is_identity(self) -> bool:
+        return self.up == self.down
+
+    def process(self, audio_data: AudioBuffer) -> bytes:
+        """Resamples the next chunk of the stream and returns all output samples that can be computed yet."""
+        if self.is_identity:
+            return bytes(audio_data)
+
+        audio_data = self.remainder + bytes(audio_data)
+        usable = len(audio_data) - len(audio_data) % 2
+        self.remainder = audio_data[usable:]
+        samples = np.frombuffer(audio_data[:usable], dtype=np.int16).astype(np.float32)
+
+        window = np.concatenate((self.history, samples))
+        input_count = self.input_count + len(samples)
+        # Output sample n is computed from the input samples up to i = n * down // up
+        output_end = -(-input_count * self.up // self.down)
+        n = np.arange(self.output_count, output_end, dtype=np.int64)
+        position = n * self.down
+        phase = position % self.up
+        # Index of the window of input sample i, the window array starts `taps_per_phase - 1` samples earlier
+        start = position // self.up - self.input_count
+        windows = np.lib.stride_tricks.sliding_window_view(window, self.taps_per_phase)[start]
+        output = np.einsum("nk,nk->n", self.phases[phase], windows)
+
+        self.history = window[len(window) - (self.taps_per_phase - 1) :]
+        self.input_count = input_count
+        self.output_count = output_end
+        return np.clip(np.rint(output), -32768, 32767).astype(np.int16).tobytes()
@@ -0,0 +1,99 @@
+import re
+from typing import List, Optional
+
+SENTENCE_END = re.compile(r"[.!?…]+[\"'»«“”)\]]*\s+")
+CLAUSE_END = re.compile(r"[,;:–—]\s+")
+ABBREVIATIONS = {
+    "bzw",
+    "ca",
+    "dr",
+    "etc",
+    "evtl",
+    "ggf",
+    "inkl",
+    "mr",
+    "mrs",
+    "nr",
+    "prof",
+    "st",
+    "usw",
+    "vgl",
+    "z.b",
+    "d.h",
+    "u.a",
+}
+
+
+class SentenceSegmenter:
+    """
+    Cuts a streamed text response into speakable segments at sentence boundaries.
+
+    Text chunks are pushed as they arrive from the LLM. A segment is released as soon as a sentence
+    boundary is found. If a sentence grows longer than `max_length`, it is cut at the last clause
+    boundary (or whitespace) instead, so that the audio generation never waits for overly long sentences.
+
+    Args:
+        min_length (int): Minimum number of characters of a segment. Shorter sentences are merged with the next one.
+        max_length (int): Maximum number of characters to buffer before forcing a cut at a clause boundary.
+    """
+
+    def __init__(self, min_length: int = 10, max_length: int = 200):
+        self.min_length = min_length
+        self.max_length = max_length
+        self.buffer = ""
+
+    def push(self, text: str) -> List[str]:
+        self.buffer += text
+
+        segments = []
+        while (segment := self._next_segment()) is not None:
+            segments.append(segment)
+        return segments
+
+    def flush(self) -> Optional[str]:
+        segment = self.buffer.strip()
+        self.buffer = ""
+        return segment or None
+
+    def _next_segment(self) -> Optional[str]:
+        """Returns the next non-empty segment, or None if the buffer holds no complete segment."""
+        while True:
+            cut_index = self._find_sentence_end()
+
+            if cut_index is None and len(self.buffer) > self.max_length:
+                cut_index = self._find_forced_cut()
+
+            if cut_index is None:
+                return None
+
+            segment = self.buffer[:cut_index].strip()
+            self.buffer = self.buffer[cut_index:]
+            # Segments of whitespace only are dropped, the rest of the buffer may still hold segments
+            if segment:
+                return segment
+
+    def _find_sentence_end(self) -> Optional[int]:
+        for match in SENTENCE_END.finditer(self.buffer):
+            if match.start() + 1 < self.min_length:
+                continue
+            if self.buffer[match.start()] == "." and self._is_abbreviation(match.start()):
+                continue
+            return match.end()
+        return None
+
+    def _find_forced_cut(self) -> int:
+        window = self.buffer[: self.max_length]
+
+        clause_ends = [match.end() for match in CLAUSE_END.finditer(window) if match.start() + 1 >= self.min_length]
+        if clause_ends:
+            return clause_ends[-1]
+
+        last_space = window.rfind(" ")
+        return last_space + 1 if last_space >= self.min_length else self.max_length
+
+    def _is_abbreviation(self, index: int) -> bool:
+        words = self.buffer[:index].split()
+        if not words:
+            return False
+        word = words[-1].lower().strip("(\"'»«“”")
+        return word.isdigit() or len(word) == 1 or word in ABBREVIATIONS
@@ -0,0 +1,85 @@
+import queue
+import threading
+import time
+from typing import Iterator, Optional
+
+from .IAudioGenerator import IAudioGenerator
+from .PolyphaseResampler import PolyphaseResampler
+
+
+class SynthesisAttempt:
+    """
+    Synthesis of a text by one provider on its own thread. The chunks are resampled to the output rate and queued.
+    The attempt reports itself to `first_chunks` once its first chunk arrived or it failed.
+    """
+
+    END = object()  # Queued after the last chunk
+
+    def __init__(
+        self,
+        provider: IAudioGenerator,
+        text: str,
+        sample_rate: int,
+        first_chunks: queue.Queue,
+        max_chunks: int,
+        name: Optional[str] = None,
+    ):
+        self.provider = provider
+        self.name = name or type(provider).__name__
+        self.text = text
+        self.resampler = PolyphaseResampler(provider.get_sample_rate(), sample_rate)
+        self.first_chunks = first_chunks
+        self.chunks: queue.Queue = queue.Queue(maxsize=max_chunks)
+        self.cancelled = threading.Event()
+        self.start = time.monotonic()
+        self.first_chunk_s: Optional[float] = None
+        self.error: Optional[Exception] = None
+        self.thread = threading.Thread(target=self.run, name=f"tts-{self.name}", daemon=True)
+        self.thread.start()
+
+    def run(self) -> None:
+        try:
+            audio_stream = self.provider.generate_audio_stream(self.text)
+            try:
+                for chunk in audio_stream:
+                    chunk = self.resampler.process(chunk)
+                    if not chunk:
+                        continue
+                    if self.first_chunk_s is None:
+                        self.first_chunk_s = time.monotonic() - self.start
+                        self.first_chunks.put(self)
+                    if not self._put(chunk):
+                        return
+            finally:
+                audio_stream.close()
+        except Exception as e:
+            self.error = e
+            if self.first_chunk_s is None:
+                self.first_chunks.put(self)
+            self._put(e)
+            return
+
+        if self.first_chunk_s is None:
+            # No audio at all, e.g. for an empty text
+            self.first_chunk_s = time.monotonic() - self.start
+            self.first_chunks.put(self)
+        self._put(self.END)
+
+    def _put(self, item) -> bool:
+        # Blocks while the consumer is behind, unless the attempt is cancelled
+        while not self.cancelled.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read(self) -> Iterator[bytes]:
+        while (item := self.chunks.get()) is not self.END:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def cancel(self) -> None:
+        self.cancelled.set()
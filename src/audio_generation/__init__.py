@@ -1,4 +1,22 @@
+from typing import TYPE_CHECKING
+
+from lazy_imports import lazy_attributes
+
 from .AudioGenerationManager import AudioGenerationManager
-from .AWSPolly import AWSPolly
-from .GoogleCloudTTS import GoogleCloudTTS
+from .CachedAudioGenerator import CachedAudioGenerator
+from .HedgedAudioGenerator import HedgedAudioGenerator
 from .IAudioGenerator import IAudioGenerator
+from .PolyphaseResampler import PolyphaseResampler
+from .SentenceSegmenter import SentenceSegmenter
+
+if TYPE_CHECKING:
+    from .AWSPolly import AWSPolly
+    from .GoogleCloudTTS import GoogleCloudTTS
+
+__getattr__ = lazy_attributes(
+    __name__,
+    {
+        "AWSPolly": ".AWSPolly",
+        "GoogleCloudTTS": ".GoogleCloudTTS",
+    },
+)
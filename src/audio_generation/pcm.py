@@ -0,0 +1,20 @@
+import wave
+from typing import Union
+
+AudioBuffer = Union[bytes, memoryview]
+
+
+def strip_wav_header(audio_data: AudioBuffer) -> AudioBuffer:
+    """Returns the raw PCM samples of LINEAR16 responses (e.g. Google), which come with a RIFF header."""
+    if bytes(audio_data[:4]) != b"RIFF":
+        return audio_data
+    data_index = bytes(audio_data[:1024]).find(b"data", 12)
+    return audio_data if data_index < 0 else audio_data[data_index + 8 :]
+
+
+def write_wav(path: str, audio_data: AudioBuffer, sample_rate: int) -> None:
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(strip_wav_header(audio_data))
@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import speech_recognition as sr
+
+from latency_stats import LatencyStats
+
+from .IAudioTranscriber import IAudioTranscriber
+
+logger = logging.getLogger(__name__)
+
+
+class CascadingTranscriber(IAudioTranscriber):
+    """
+    Transcribes with a cascade of transcribers, e.g. a local recognizer first and a cloud service as fallback.
+
+    The transcription of a tier is accepted if its confidence (see `transcribe_with_confidence`) reaches
+    `min_confidence`. Otherwise, or if it is empty or failed, the audio is escalated to the next tier. The last tier
+    is always accepted. Short, common commands are usually recognized confidently by a local recognizer like Vosk,
+    so only unclear audio pays the round trip to the cloud.
+
+    The number of requests every tier served and escalated and the time every tier took are recorded, `report`
+    returns them.
+
+    Args:
+        tiers (List[IAudioTranscriber]): Transcribers in the order they are tried.
+        min_confidence (float): Minimum confidence at which a transcription is accepted before the last tier.
+        accept_without_confidence (bool): Whether transcriptions of tiers that report no confidence are accepted.
+    """
+
+    def __init__(
+        self, tiers: List[IAudioTranscriber], min_confidence: float = 0.8, accept_without_confidence: bool = False
+    ):
+        if not tiers:
+            raise ValueError("At least one transcriber is required.")
+        self.tiers = tiers
+        self.min_confidence = min_confidence
+        self.accept_without_confidence = accept_without_confidence
+
+        self.served: Dict[str, int] = {}
+        self.escalated: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.latency_stats: Dict[str, LatencyStats] = {}
+        self.lock = threading.Lock()
+
+    def transcribe(self, audio_data: sr.AudioData) -> Optional[str]:
+        return self.transcribe_with_confidence(audio_data)[0]
+
+    def transcribe_with_confidence(self, audio_data: sr.AudioData) -> Tuple[Optional[str], Optional[float]]:
+        start = time.perf_counter()
+        for i, tier in enumerate(self.tiers):
+            name = type(tier).__name__
+            is_last = i == len(self.tiers) - 1
+            tier_start = time.perf_counter()
+            try:
+                transcription, confidence = tier.transcribe_with_confidence(audio_data)
+            except Exception as e:
+                if is_last:
+                    raise
+                logger.warning("Transcription with %s failed, escalating: %s", name, e)
+                self._count(self.errors, name)
+                continue
+            finally:
+                self._record_latency(name, time.perf_counter() - tier_start)
+
+            if is_last or self._is_accepted(transcription, confidence):
+                self._count(self.served, name)
+                logger.info(
+                    "Transcription served by %s with confidence %s in %.3f seconds",
+                    name,
+                    "unknown" if confidence is None else f"{confidence:.2f}",
+                    time.perf_counter() - start,
+                )
+                return transcription, confidence
+
+            logger.debug("Escalating transcription '%s' of %s with confidence %s", transcription, name, confidence)
+            self._count(self.escalated, name)
+
+    def _is_accepted(self, transcription: Optional[str], confidence: Optional[float]) -> bool:
+        if not transcription:
+            return False
+        if confidence is None:
+            return self.accept_without_confidence
+        return confidence >= self.min_confidence
+
+    def _count(self, counts: Dict[str, int], name: str) -> None:
+        with self.lock:
+            counts[name] = counts.get(name, 0) + 1
+
+    def _record_latency(self, name: str, latency_s: float) -> None:
+        with self.lock:
+            stats = self.latency_stats.setdefault(name, LatencyStats())
+        stats.add(latency_s)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Requests served, escalated and failed by every tier, and the percentiles of its durations in seconds."""
+        report = {}
+        for tier in self.tiers:
+            name = type(tier).__name__
+            with self.lock:
+                stats = self.latency_stats.get(name)
+                report[name] = {
+                    "served": self.served.get(name, 0),
+                    "escalated": self.escalated.get(name, 0),
+                    "errors": self.errors.get(name, 0),
+                }
+            # Guarded by the lock of the stats
+            report[name].update(stats.percentiles() if stats is not None else {})
+        return report
@@ -2,6 +2,9 @@ import logging
 from typing import Optional
 
 import speech_recognition as sr
+from google.cloud import speech
+
+from audio_transcription.UploadEncoder import UploadEncoder
 
 from .IAudioTranscriber import IAudioTranscriber
 
@@ -9,13 +12,38 @@ logger = logging.getLogger(__name__)
 
 
 class GoogleCloudSpeech(IAudioTranscriber):
-    def __init__(self):
-        self.recognizer = sr.Recognizer()
+    """
+    Transcribes with the Google Cloud Speech-to-Text API.
+
+    The client is created once and reused for all requests.
+
+    Args:
+        language (str): BCP-47 code of the spoken language.
+        codec (str): Codec of the uploaded audio, "flac", "opus" or "wav" (see `UploadEncoder`).
+        trim_silence (bool): Whether the silence around the speech is trimmed before the upload.
+    """
+
+    ENCODINGS = {
+        "flac": speech.RecognitionConfig.AudioEncoding.FLAC,
+        "opus": speech.RecognitionConfig.AudioEncoding.OGG_OPUS,
+        "wav": speech.RecognitionConfig.AudioEncoding.LINEAR16,
+    }
+
+    def __init__(self, language: str = "de-DE", codec: str = "flac", trim_silence: bool = True):
+        self.client = speech.SpeechClient()
+        self.language = language
+        self.encoder = UploadEncoder(codec, trim_silence)
 
     def transcribe(self, audio_data: sr.AudioData) -> Optional[str]:
-        try:
-            transcription = self.recognizer.recognize_google_cloud(audio_data, language="de-DE")
-        except sr.UnknownValueError:
+        config = speech.RecognitionConfig(
+            encoding=self.ENCODINGS[self.encoder.codec],
+            sample_rate_hertz=audio_data.sample_rate,
+            language_code=self.language,
+        )
+        response = self.client.recognize(
+            config=config, audio=speech.RecognitionAudio(content=self.encoder.encode(audio_data))
+        )
+        if not response.results:
             return None
 
-        return transcription
+        return " ".join(result.alternatives[0].transcript.strip() for result in response.results)
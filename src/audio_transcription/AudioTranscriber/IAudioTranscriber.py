@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Optional, Tuple
 
 
 class IAudioTranscriber(ABC):
@@ -10,3 +10,10 @@ class IAudioTranscriber(ABC):
     @abstractmethod
     def transcribe(self, audio_data: bytes) -> Optional[str]:
         pass
+
+    def transcribe_with_confidence(self, audio_data: bytes) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Returns the transcription and its confidence between 0 and 1. Transcribers that report no confidence return
+        None as confidence.
+        """
+        return self.transcribe(audio_data), None
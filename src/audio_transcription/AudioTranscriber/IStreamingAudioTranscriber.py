@@ -0,0 +1,32 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import numpy as np
+
+from .IAudioTranscriber import IAudioTranscriber
+
+
+class ITranscriptionStream(ABC):
+    """A single utterance that is transcribed incrementally while it is being recorded."""
+
+    @abstractmethod
+    def accept_audio(self, audio_frame: np.ndarray) -> None:
+        pass
+
+    @abstractmethod
+    def partial_result(self) -> str:
+        pass
+
+    @abstractmethod
+    def finish(self) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def cancel(self) -> None:
+        pass
+
+
+class IStreamingAudioTranscriber(IAudioTranscriber):
+    @abstractmethod
+    def start_stream(self, sample_rate: int) -> ITranscriptionStream:
+        pass
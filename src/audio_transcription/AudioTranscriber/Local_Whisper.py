@@ -0,0 +1,93 @@
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+import speech_recognition as sr
+import torch
+import whisper
+
+from .IAudioTranscriber import IAudioTranscriber
+
+logger = logging.getLogger(__name__)
+
+
+class Local_Whisper(IAudioTranscriber):
+    """
+    Runs an OpenAI Whisper model in-process on the CPU.
+
+    The model is loaded once and warmed up with a decode of silence, so the first request does not pay for lazy
+    initialization. With `compute_type="int8"`, the linear layers are dynamically quantized to int8, which
+    considerably speeds up CPU inference. The raw PCM samples of the recording are passed to the model directly.
+
+    Args:
+        model_name (str): Name of the Whisper model, e.g. "tiny", "base", "small".
+        language (str): Language of the speech.
+        compute_type (str): "int8" for dynamically quantized linear layers or "float32".
+        num_threads (int, optional): Number of CPU threads used by torch. Defaults to the torch default.
+        warm_up (bool): Whether to run a warm-up decode after loading the model.
+    """
+
+    SAMPLE_RATE: int = 16000
+
+    def __init__(
+        self,
+        model_name: str = "base",
+        language: str = "de",
+        compute_type: str = "int8",
+        num_threads: Optional[int] = None,
+        warm_up: bool = True,
+    ):
+        if compute_type not in ("int8", "float32"):
+            raise ValueError(f"Unknown compute type '{compute_type}', choose from 'int8' or 'float32'.")
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        self.language = language
+        self.model = whisper.load_model(model_name, device="cpu")
+        if compute_type == "int8":
+            self.model = torch.quantization.quantize_dynamic(
+                self._to_torch_linear(self.model), {torch.nn.Linear}, dtype=torch.qint8
+            )
+        self.model.eval()
+        logger.debug("Whisper model '%s' loaded (%s, %s threads)", model_name, compute_type, torch.get_num_threads())
+
+        if warm_up:
+            start = time.time()
+            self.transcribe_samples(np.zeros(self.SAMPLE_RATE, dtype=np.float32))
+            logger.debug("Whisper warm-up took %s seconds", time.time() - start)
+
+    @classmethod
+    def _to_torch_linear(cls, module: torch.nn.Module) -> torch.nn.Module:
+        # Whisper uses a subclass of nn.Linear, which is not picked up by the dynamic quantization
+        for name, child in module.named_children():
+            if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+                linear = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+                linear.load_state_dict(child.state_dict())
+                setattr(module, name, linear)
+            else:
+                cls._to_torch_linear(child)
+        return module
+
+    def transcribe(self, audio_data: sr.AudioData) -> Optional[str]:
+        if audio_data.sample_rate == self.SAMPLE_RATE and audio_data.sample_width == 2:
+            pcm = audio_data.frame_data
+        else:
+            pcm = audio_data.get_raw_data(convert_rate=self.SAMPLE_RATE, convert_width=2)
+
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        return self.transcribe_samples(samples) or None
+
+    def transcribe_samples(self, samples: np.ndarray) -> str:
+        start = time.time()
+        with torch.inference_mode():
+            result = self.model.transcribe(
+                samples, language=self.language, fp16=False, temperature=0.0, condition_on_previous_text=False
+            )
+        duration = time.time() - start
+        logger.debug(
+            "Whisper decode took %s seconds (real-time factor %.2f)",
+            duration,
+            duration / (len(samples) / self.SAMPLE_RATE),
+        )
+        return result["text"].strip()
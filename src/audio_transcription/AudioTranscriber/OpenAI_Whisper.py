@@ -5,6 +5,8 @@ import speech_recognition as sr
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from audio_transcription.UploadEncoder import UploadEncoder
+
 from .IAudioTranscriber import IAudioTranscriber
 
 logger = logging.getLogger(__name__)
@@ -13,11 +15,20 @@ load_dotenv(".env")
 
 
 class OpenAI_Whisper(IAudioTranscriber):
-    def __init__(self):
+    """
+    Transcribes with the hosted Whisper model of OpenAI.
+
+    Args:
+        codec (str): Codec of the uploaded audio, "flac", "opus" or "wav" (see `UploadEncoder`).
+        trim_silence (bool): Whether the silence around the speech is trimmed before the upload.
+    """
+
+    def __init__(self, codec: str = "flac", trim_silence: bool = True):
         self.client = OpenAI()
+        self.encoder = UploadEncoder(codec, trim_silence)
 
     def transcribe(self, audio_data: sr.AudioData) -> Optional[str]:
         transcript = self.client.audio.transcriptions.create(
-            model="whisper-1", file=("audio.wav", audio_data.get_wav_data(), "audio/wav")
+            model="whisper-1", file=(self.encoder.file_name, self.encoder.encode(audio_data), self.encoder.mime_type)
         )
         return transcript.text
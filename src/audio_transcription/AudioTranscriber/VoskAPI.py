@@ -1,22 +1,92 @@
 import json
 import logging
-from typing import Optional
+import queue
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import speech_recognition as sr
 from vosk import KaldiRecognizer, Model
 
-from .IAudioTranscriber import IAudioTranscriber
+from .IStreamingAudioTranscriber import IStreamingAudioTranscriber, ITranscriptionStream
 
 logger = logging.getLogger(__name__)
 
 
-class VoskAPI(IAudioTranscriber):
+class VoskAPI(IStreamingAudioTranscriber):
+    """
+    Vosk transcriber. Recognizers are pooled per sample rate and reset after use instead of being rebuilt for every
+    request. With `start_stream`, an utterance is decoded incrementally while it is recorded, so only the final
+    decoding step remains after the end of speech. The confidence of a transcription is the mean confidence of its
+    words.
+    """
+
     def __init__(self):
         self.model = Model(model_name="vosk-model-de-0.21")
+        self.recognizer_pool: Dict[int, queue.SimpleQueue] = defaultdict(queue.SimpleQueue)
+
+    def acquire_recognizer(self, sample_rate: int) -> KaldiRecognizer:
+        try:
+            return self.recognizer_pool[sample_rate].get_nowait()
+        except queue.Empty:
+            logger.debug("Creating new recognizer for sample rate %s", sample_rate)
+            recognizer = KaldiRecognizer(self.model, sample_rate)
+            # Adds the words with their confidences to the results
+            recognizer.SetWords(True)
+            return recognizer
+
+    def release_recognizer(self, recognizer: KaldiRecognizer, sample_rate: int) -> None:
+        recognizer.Reset()
+        self.recognizer_pool[sample_rate].put(recognizer)
 
     def transcribe(self, audio_data: sr.AudioData) -> Optional[str]:
-        rec = KaldiRecognizer(self.model, audio_data.sample_rate)
-        data = audio_data.frame_data
-        rec.AcceptWaveform(data)
-        raw_result = rec.FinalResult()
-        return json.loads(raw_result).get("text", "")
+        return self.transcribe_with_confidence(audio_data)[0]
+
+    def transcribe_with_confidence(self, audio_data: sr.AudioData) -> Tuple[Optional[str], Optional[float]]:
+        rec = self.acquire_recognizer(audio_data.sample_rate)
+        try:
+            data = audio_data.frame_data
+            rec.AcceptWaveform(data)
+            raw_result = rec.FinalResult()
+        finally:
+            self.release_recognizer(rec, audio_data.sample_rate)
+        result = json.loads(raw_result)
+        return result.get("text", ""), self.confidence(result.get("result", []))
+
+    @staticmethod
+    def confidence(words: List[Dict]) -> Optional[float]:
+        if not words:
+            return None
+        return sum(word["conf"] for word in words) / len(words)
+
+    def start_stream(self, sample_rate: int) -> "VoskTranscriptionStream":
+        return VoskTranscriptionStream(self, sample_rate)
+
+
+class VoskTranscriptionStream(ITranscriptionStream):
+    def __init__(self, vosk: VoskAPI, sample_rate: int):
+        self.vosk = vosk
+        self.sample_rate = sample_rate
+        self.recognizer: Optional[KaldiRecognizer] = vosk.acquire_recognizer(sample_rate)
+        self.results = []  # Results of completed segments
+        self.partial = ""
+
+    def accept_audio(self, audio_frame: np.ndarray) -> None:
+        if self.recognizer.AcceptWaveform(audio_frame.tobytes()):
+            self.results.append(json.loads(self.recognizer.Result()).get("text", ""))
+            self.partial = ""
+        else:
+            self.partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+
+    def partial_result(self) -> str:
+        return " ".join(text for text in self.results + [self.partial] if text)
+
+    def finish(self) -> Optional[str]:
+        self.results.append(json.loads(self.recognizer.FinalResult()).get("text", ""))
+        self.cancel()
+        return " ".join(text for text in self.results if text)
+
+    def cancel(self) -> None:
+        if self.recognizer is not None:
+            self.vosk.release_recognizer(self.recognizer, self.sample_rate)
+            self.recognizer = None
@@ -1,4 +1,23 @@
-from .GoogleCloudSpeech import GoogleCloudSpeech
+from typing import TYPE_CHECKING
+
+from lazy_imports import lazy_attributes
+
+from .CascadingTranscriber import CascadingTranscriber
 from .IAudioTranscriber import IAudioTranscriber
-from .OpenAI_Whisper import OpenAI_Whisper
-from .VoskAPI import VoskAPI
+from .IStreamingAudioTranscriber import IStreamingAudioTranscriber, ITranscriptionStream
+
+if TYPE_CHECKING:
+    from .GoogleCloudSpeech import GoogleCloudSpeech
+    from .Local_Whisper import Local_Whisper
+    from .OpenAI_Whisper import OpenAI_Whisper
+    from .VoskAPI import VoskAPI
+
+__getattr__ = lazy_attributes(
+    __name__,
+    {
+        "GoogleCloudSpeech": ".GoogleCloudSpeech",
+        "Local_Whisper": ".Local_Whisper",
+        "OpenAI_Whisper": ".OpenAI_Whisper",
+        "VoskAPI": ".VoskAPI",
+    },
+)
@@ -0,0 +1,37 @@
+from typing import Optional
+
+import speech_recognition as sr
+
+
+class SpeechAudioData(sr.AudioData):
+    """
+    Recorded audio together with the bounds of the speech in it, as found by the voice activity detection.
+
+    The recording starts at the keyword, so it usually begins with the silence until the user started to speak, and
+    it may end with silence if it was cut at its maximum duration. The bounds let the transcription trim the audio
+    without a second voice activity detection.
+
+    Args:
+        speech_start (int): Index of the first sample of the speech.
+        speech_end (int, optional): Index after the last sample of the speech. Defaults to the end of the audio.
+    """
+
+    def __init__(
+        self,
+        frame_data: bytes,
+        sample_rate: int,
+        sample_width: int,
+        speech_start: int = 0,
+        speech_end: Optional[int] = None,
+    ):
+        super().__init__(frame_data, sample_rate, sample_width)
+        sample_count = len(frame_data) // sample_width
+        self.speech_start = min(speech_start, sample_count)
+        self.speech_end = sample_count if speech_end is None else min(speech_end, sample_count)
+
+    def trimmed(self, padding_s: float = 0.0) -> sr.AudioData:
+        """Returns the speech with `padding_s` seconds of the audio around it, the VAD detects its onset late."""
+        padding = int(padding_s * self.sample_rate)
+        start = max(self.speech_start - padding, 0) * self.sample_width
+        end = min(self.speech_end + padding, len(self.frame_data) // self.sample_width) * self.sample_width
+        return sr.AudioData(self.frame_data[start:end], self.sample_rate, self.sample_width)
@@ -0,0 +1,83 @@
+import io
+import logging
+import time
+from typing import Dict, Tuple
+
+import numpy as np
+import speech_recognition as sr
+
+from .SpeechAudioData import SpeechAudioData
+
+logger = logging.getLogger(__name__)
+
+
+class UploadEncoder:
+    """
+    Prepares recorded speech for the upload to a cloud transcription service.
+
+    The silence before and after the speech is trimmed with the bounds of a `SpeechAudioData`, keeping `padding_ms`
+    around it. The audio is then encoded with `codec`:
+    - "flac": Lossless, about half the size of WAV for speech. Encoded by the FLAC converter of `speech_recognition`.
+    - "opus": Lossy Ogg/Opus, about a tenth of FLAC at speech quality. Requires `soundfile` with libsndfile >= 1.0.29.
+    - "wav": Uncompressed 16 bit PCM.
+
+    Args:
+        codec (str): Codec of the uploaded audio.
+        trim_silence (bool): Whether the silence around the speech is trimmed.
+        padding_ms (float): Audio that is kept before and after the speech.
+    """
+
+    # File name and MIME type of the uploaded audio by codec
+    CODECS: Dict[str, Tuple[str, str]] = {
+        "flac": ("audio.flac", "audio/flac"),
+        "opus": ("audio.ogg", "audio/ogg"),
+        "wav": ("audio.wav", "audio/wav"),
+    }
+
+    def __init__(self, codec: str = "flac", trim_silence: bool = True, padding_ms: float = 200.0):
+        if codec not in self.CODECS:
+            raise ValueError(f"Unknown codec {codec!r}, expected one of {', '.join(self.CODECS)}.")
+        self.codec = codec
+        self.trim_silence = trim_silence
+        self.padding_ms = padding_ms
+
+    @property
+    def file_name(self) -> str:
+        return self.CODECS[self.codec][0]
+
+    @property
+    def mime_type(self) -> str:
+        return self.CODECS[self.codec][1]
+
+    def trim(self, audio_data: sr.AudioData) -> sr.AudioData:
+        if not self.trim_silence or not isinstance(audio_data, SpeechAudioData):
+            return audio_data
+        return audio_data.trimmed(self.padding_ms / 1000)
+
+    def encode(self, audio_data: sr.AudioData) -> bytes:
+        start = time.perf_counter()
+        trimmed_audio = self.trim(audio_data)
+        if self.codec == "flac":
+            encoded = trimmed_audio.get_flac_data(convert_width=2)
+        elif self.codec == "opus":
+            encoded = self._encode_opus(trimmed_audio)
+        else:
+            encoded = trimmed_audio.get_wav_data(convert_width=2)
+
+        logger.debug(
+            "Encoded %s bytes of audio to %s bytes of %s in %.3f seconds",
+            len(audio_data.frame_data),
+            len(encoded),
+            self.codec,
+            time.perf_counter() - start,
+        )
+        return encoded
+
+    @staticmethod
+    def _encode_opus(audio_data: sr.AudioData) -> bytes:
+        import soundfile as sf
+
+        samples = np.frombuffer(audio_data.get_raw_data(convert_width=2), dtype=np.int16)
+        buffer = io.BytesIO()
+        sf.write(buffer, samples, audio_data.sample_rate, format="OGG", subtype="OPUS")
+        return buffer.getvalue()
@@ -1 +1,23 @@
-from .AudioTranscriber import GoogleCloudSpeech, OpenAI_Whisper, VoskAPI
+from typing import TYPE_CHECKING
+
+from lazy_imports import lazy_attributes
+
+if TYPE_CHECKING:
+    from .AudioTranscriber import (
+        CascadingTranscriber,
+        GoogleCloudSpeech,
+        Local_Whisper,
+        OpenAI_Whisper,
+        VoskAPI,
+    )
+
+__getattr__ = lazy_attributes(
+    __name__,
+    {
+        "CascadingTranscriber": ".AudioTranscriber",
+        "GoogleCloudSpeech": ".AudioTranscriber",
+        "Local_Whisper": ".AudioTranscriber",
+        "OpenAI_Whisper": ".AudioTranscriber",
+        "VoskAPI": ".AudioTranscriber",
+    },
+)
@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from latency_stats import LatencyStats
+from main import App
+
+from .FakeAgent import FakeAgent
+from .FakeAudioGenerator import FakeAudioGenerator
+from .FakeKeywordDetector import FakeKeywordDetector
+from .FakeSearchTool import FakeSearchTool
+from .FakeTranscriber import FakeTranscriber
+from .LatencyProfile import LatencyProfile
+from .NullAudioOutput import NullAudioOutput
+from .ReplayAudioListener import ReplayAudioListener
+from .Utterance import Utterance
+
+logger = logging.getLogger(__name__)
+
+
+class BenchmarkRunner:
+    """
+    Runs the complete app offline on replayed utterances, with local stand-ins for all cloud services.
+
+    The utterances are replayed one after another; the next one starts once the previous request is finished.
+    The latencies of all stages are taken from the tracer of the app. Note that audio stages (e.g. `voice_start`,
+    `endpoint`) run at replay speed, while the latency profiles of the fake providers are in wall-clock time.
+
+    Args:
+        utterances (List[Utterance]): Utterances to replay.
+        speed (float): Replay speed relative to real time.
+        gap_s (float): Silence after every utterance in seconds.
+        latencies (Dict[str, LatencyProfile], optional): Latency profiles of the fake providers by name: `keyword`
+            (per frame), `transcription` (per second of audio), `first_token`, `token`, `search` and `tts`
+            (per character).
+        responses (Dict[str, str], optional): Responses of the fake LLM by query.
+        use_response_cache (bool): Whether the response cache of the app is enabled.
+        timeout_s (float): Maximum duration of the run.
+    """
+
+    def __init__(
+        self,
+        utterances: List[Utterance],
+        speed: float = 1.0,
+        gap_s: float = 2.0,
+        latencies: Optional[Dict[str, LatencyProfile]] = None,
+        responses: Optional[Dict[str, str]] = None,
+        use_response_cache: bool = False,
+        timeout_s: float = 600.0,
+    ):
+        self.utterances = utterances
+        self.speed = speed
+        self.gap_s = gap_s
+        self.latencies = latencies or {}
+        self.responses = responses
+        self.use_response_cache = use_response_cache
+        self.timeout_s = timeout_s
+        self.app: Optional[App] = None
+
+    def _latency(self, name: str) -> LatencyProfile:
+        return self.latencies.get(name) or LatencyProfile()
+
+    def run(self) -> Dict:
+        from audio_detection import AudioDetectionManager
+
+        listener = ReplayAudioListener(
+            AudioDetectionManager.SAMPLE_RATE,
+            AudioDetectionManager.frame_length,
+            self.utterances,
+            speed=self.speed,
+            gap_s=self.gap_s,
+            is_ready=self._is_ready,
+        )
+        self.listener = listener
+        detector = FakeKeywordDetector(listener, self._latency("keyword"))
+        transcriber = FakeTranscriber(
+            lambda: detector.utterance.transcript if detector.utterance else None, self._latency("transcription")
+        )
+        audio_generator = FakeAudioGenerator(self._latency("tts"))
+
+        self.app = App(
+            listener=listener,
+            detector=detector,
+            transcriber=transcriber,
+            agent=FakeAgent(self.responses, self._latency("first_token"), self._latency("token")),
+            tools=[FakeSearchTool(latency=self._latency("search"))],
+            audio_generator=audio_generator,
+            audio_output=NullAudioOutput(audio_generator.get_sample_rate(), self.speed),
+            use_response_cache=self.use_response_cache,
+        )
+
+        start = time.perf_counter()
+        app_thread = threading.Thread(target=self.app.main, name="benchmark-app", daemon=True)
+        app_thread.start()
+        completed = listener.finished.wait(self.timeout_s)
+        duration_s = time.perf_counter() - start
+
+        self.app.audio_detection_manager.stop()
+        app_thread.join()
+        if not completed:
+            logger.warning("Benchmark timed out after %s seconds", self.timeout_s)
+
+        return self.report(duration_s)
+
+    def _is_ready(self) -> bool:
+        # Every replayed utterance ends its trace, either with a response or without (e.g. nothing transcribed)
+        return self.app is not None and self.app.tracer.trace_count >= self.listener.next_utterance
+
+    def report(self, duration_s: float) -> Dict:
+        # Latency perceived by the user, from the end of speech to the start of the response
+        response_latency = LatencyStats()
+        for trace in self.app.tracer.completed:
+            if "endpoint" in trace.marks and "playback_start" in trace.marks:
+                response_latency.add(trace.marks["playback_start"] - trace.marks["endpoint"])
+        keyword_gate = self.app.audio_detection_manager.processor.keyword_gate
+
+        return {
+            "requests": len(self.utterances),
+            "completed_requests": self.app.tracer.trace_count,
+            "duration_s": duration_s,
+            "speed": self.speed,
+            "response_latency": {
+                "count": response_latency.count,
+                "sum": response_latency.total,
+                **response_latency.percentiles(),
+            },
+            "keyword_gate": keyword_gate.stats() if keyword_gate is not None else None,
+            **self.app.tracer.summary(),
+        }
+
+
+def format_report(report: Dict) -> str:
+    lines = [
+        f"{report['completed_requests']}/{report['requests']} requests in {report['duration_s']:.1f}s "
+        f"(replay speed {report['speed']:g}x)",
+        "",
+        f"{'':<44}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}",
+    ]
+
+    def row(name: str, values: Dict[str, float]) -> str:
+        percentiles = "".join(
+            f"{values[p] * 1000:>10.1f}" if p in values else f"{'-':>10}" for p in ("p50", "p95", "p99")
+        )
+        return f"{name:<44}{values['count']:>8}{percentiles}"
+
+    lines.append(row("endpoint->playback_start (response latency)", report["response_latency"]))
+    if report["keyword_gate"] is not None:
+        gate = report["keyword_gate"]
+        lines.append(
+            f"Keyword detector skipped {gate['skipped']}/{gate['frames']} frames ({gate['skipped_fraction']:.1%}), "
+            f"gate opened {gate['openings']} times"
+        )
+    for kind, title in [("stages", "Since keyword"), ("intervals", "Stage durations"), ("spans", "Operations")]:
+        lines += ["", title]
+        lines += [row(f"  {name}", values) for name, values in report[kind].items()]
+    return "\n".join(lines)
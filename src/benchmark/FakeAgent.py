@@ -0,0 +1,30 @@
+from typing import Dict, Optional
+
+from langchain.agents.format_scratchpad.openai_tools import format_to_openai_tool_messages
+from langchain.agents.output_parsers.openai_tools import OpenAIToolsAgentOutputParser
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from response_generation.agent import BaseAgentProvider
+
+from .FakeChatModel import FakeChatModel
+from .LatencyProfile import LatencyProfile
+
+
+class FakeAgent(BaseAgentProvider):
+    """Agent provider with a `FakeChatModel`, using the tool calling format of the `OpenAIAgent`."""
+
+    def __init__(
+        self,
+        responses: Optional[Dict[str, str]] = None,
+        first_token_latency: Optional[LatencyProfile] = None,
+        token_latency: Optional[LatencyProfile] = None,
+    ):
+        self.llm = FakeChatModel(
+            responses=responses or {},
+            first_token_latency=first_token_latency or LatencyProfile(),
+            token_latency=token_latency or LatencyProfile(),
+        )
+
+        self.convert_tool = convert_to_openai_tool
+        self.format_function_messages = format_to_openai_tool_messages
+        self.output_parser = OpenAIToolsAgentOutputParser()
@@ -0,0 +1,52 @@
+import math
+import time
+from typing import Iterator, Optional
+
+from audio_generation import IAudioGenerator
+
+from .LatencyProfile import LatencyProfile
+
+
+class FakeAudioGenerator(IAudioGenerator):
+    """
+    Text-to-speech stand-in that generates silence of the duration the text would take to speak.
+
+    When streamed, the first chunk arrives after the base latency and the per-character latency is spread across the
+    following chunks.
+
+    Args:
+        latency (LatencyProfile, optional): Synthesis time, the units are characters.
+        sample_rate (int): Sample rate of the generated audio.
+        seconds_per_character (float): Speaking duration per character.
+    """
+
+    STREAM_CHUNK_S: float = 0.25
+
+    def __init__(
+        self, latency: Optional[LatencyProfile] = None, sample_rate: int = 24000, seconds_per_character: float = 0.06
+    ):
+        self.latency = latency or LatencyProfile()
+        self.sample_rate = sample_rate
+        self.seconds_per_character = seconds_per_character
+
+    def generate_audio(self, text: str) -> bytes:
+        self.latency.sleep(len(text))
+        return bytes(2 * self._frames(text))
+
+    def generate_audio_stream(self, text: str) -> Iterator[bytes]:
+        frames = self._frames(text)
+        chunk_frames = int(self.STREAM_CHUNK_S * self.sample_rate)
+        chunk_count = max(math.ceil(frames / chunk_frames), 1)
+        chunk_s = self.latency.per_unit_s * len(text) / chunk_count
+
+        self.latency.sleep()
+        for i in range(chunk_count):
+            if i > 0:
+                time.sleep(chunk_s)
+            yield bytes(2 * min(chunk_frames, frames - i * chunk_frames))
+
+    def _frames(self, text: str) -> int:
+        return int(len(text) * self.seconds_per_character * self.sample_rate)
+
+    def get_sample_rate(self) -> int:
+        return self.sample_rate
@@ -0,0 +1,101 @@
+import json
+import re
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from .LatencyProfile import LatencyProfile
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for a streaming chat model with OpenAI tool calling.
+
+    If tools are bound and the query matches `search_pattern`, the model first calls the first bound tool with the
+    query. Then it answers with `responses[query]` (or a generic answer), streamed word by word. The time to the
+    first token follows `first_token_latency`, the time between tokens `token_latency`.
+    """
+
+    responses: Dict[str, str] = {}
+    search_pattern: str = r"(?i)\b(wetter|nachrichten|aktuell|heute)\b"
+    first_token_latency: LatencyProfile = LatencyProfile()
+    token_latency: LatencyProfile = LatencyProfile()
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def get_token_ids(self, text: str) -> List[int]:
+        return list(range(len(text.split())))
+
+    def _respond(self, messages: List[BaseMessage], tools: Optional[List[Dict[str, Any]]]) -> AIMessage:
+        query = next((message.content for message in reversed(messages) if isinstance(message, HumanMessage)), "")
+        has_tool_result = any(isinstance(message, ToolMessage) for message in messages)
+
+        if tools and not has_tool_result and re.search(self.search_pattern, query):
+            tool_call = {
+                "index": 0,
+                "id": "call_0",
+                "type": "function",
+                "function": {"name": tools[0]["function"]["name"], "arguments": json.dumps({"query": query})},
+            }
+            return AIMessage(content="", additional_kwargs={"tool_calls": [tool_call]})
+
+        response = self.responses.get(query, f"Das ist die Antwort auf die Frage: {query}")
+        return AIMessage(content=response)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._respond(messages, kwargs.get("tools"))
+        self.first_token_latency.sleep()
+        self.token_latency.sleep(len(message.content.split()))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        message = self._respond(messages, kwargs.get("tools"))
+        self.first_token_latency.sleep()
+        for i, chunk in enumerate(self._chunks(message)):
+            if i > 0:
+                self.token_latency.sleep(1)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._respond(messages, kwargs.get("tools"))
+        await self.first_token_latency.asleep()
+        for i, chunk in enumerate(self._chunks(message)):
+            if i > 0:
+                await self.token_latency.asleep(1)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    @staticmethod
+    def _chunks(message: AIMessage) -> List[AIMessageChunk]:
+        if message.additional_kwargs:
+            return [AIMessageChunk(content="", additional_kwargs=message.additional_kwargs)]
+        return [AIMessageChunk(content=word) for word in re.findall(r"\S+\s*", message.content)]
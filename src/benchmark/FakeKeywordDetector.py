@@ -0,0 +1,38 @@
+from typing import Optional
+
+import numpy as np
+
+from audio_detection.AudioKeywordDetector import IAudioKeywordDetector
+
+from .LatencyProfile import LatencyProfile
+from .ReplayAudioListener import ReplayAudioListener
+from .Utterance import Utterance
+
+
+class FakeKeywordDetector(IAudioKeywordDetector):
+    """
+    Detects the keyword exactly at the stream positions at which the `ReplayAudioListener` replayed it.
+
+    Args:
+        listener (ReplayAudioListener): Listener whose keyword positions are detected.
+        latency (LatencyProfile, optional): Processing time per frame.
+    """
+
+    def __init__(self, listener: ReplayAudioListener, latency: Optional[LatencyProfile] = None):
+        self.listener = listener
+        self.latency = latency or LatencyProfile()
+        self.position = 0  # Number of samples processed
+        self.utterance: Optional[Utterance] = None  # Utterance of the last detected keyword
+
+    def detect_keyword(self, audio_frame: np.ndarray) -> bool:
+        self.latency.sleep()
+        self.position += len(audio_frame)
+
+        keyword_positions = self.listener.keyword_positions
+        if keyword_positions and keyword_positions[0][0] < self.position:
+            _, self.utterance = keyword_positions.popleft()
+            return True
+        return False
+
+    def skip(self, sample_count: int) -> None:
+        self.position += sample_count
@@ -0,0 +1,35 @@
+from typing import Any, List, Type
+
+from langchain_core.tools import BaseModel, BaseTool, Field
+
+from .LatencyProfile import LatencyProfile
+
+
+class FakeSearchToolInput(BaseModel):
+    """ """
+
+    query: str = Field(description="Text query that is being searched for. The query MUST be in German.")
+
+
+class FakeSearchTool(BaseTool):
+    """Web search stand-in that returns canned results after a configurable latency."""
+
+    args_schema: Type[BaseModel] = FakeSearchToolInput
+    name: str = "web_search"
+    description: str = "Search the web for a text query."
+
+    latency: LatencyProfile = Field(default_factory=LatencyProfile)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _results(self, query: str) -> List[dict]:
+        return [{"name": f"Ergebnis zu {query}", "snippet": f"Aktuelle Informationen zu {query}."}]
+
+    def _run(self, query: str, **kwargs: Any) -> Any:
+        self.latency.sleep()
+        return self._results(query)
+
+    async def _arun(self, query: str, **kwargs: Any) -> Any:
+        await self.latency.asleep()
+        return self._results(query)
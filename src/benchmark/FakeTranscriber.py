@@ -0,0 +1,28 @@
+from typing import Callable, Optional
+
+import speech_recognition as sr
+
+from audio_transcription.AudioTranscriber import IAudioTranscriber
+
+from .LatencyProfile import LatencyProfile
+
+
+class FakeTranscriber(IAudioTranscriber):
+    """
+    Returns the transcript of the utterance that is currently replayed.
+
+    Args:
+        transcript (Callable[[], Optional[str]]): Returns the transcript of the current utterance.
+        latency (LatencyProfile, optional): Transcription time, the units are seconds of audio.
+    """
+
+    def __init__(self, transcript: Callable[[], Optional[str]], latency: Optional[LatencyProfile] = None):
+        self.transcript = transcript
+        self.latency = latency or LatencyProfile()
+
+    def transcribe(self, audio_data: sr.AudioData) -> Optional[str]:
+        # Read before sleeping, the next utterance may start meanwhile
+        transcript = self.transcript()
+        audio_duration_s = len(audio_data.frame_data) / (audio_data.sample_width * audio_data.sample_rate)
+        self.latency.sleep(audio_duration_s)
+        return transcript
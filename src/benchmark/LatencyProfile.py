@@ -0,0 +1,37 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class LatencyProfile:
+    """
+    Deterministic latency of a fake provider.
+
+    Every call takes `base_s` plus `per_unit_s` for every unit of work (e.g. a character or a token), plus a random
+    jitter of up to `jitter_s`. The jitter is drawn from a seeded generator, so that benchmark runs are reproducible.
+    """
+
+    base_s: float = 0.0
+    per_unit_s: float = 0.0
+    jitter_s: float = 0.0
+    seed: int = 0
+    rng: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.rng = random.Random(self.seed)
+
+    def sample(self, units: float = 0) -> float:
+        jitter = self.rng.uniform(0, self.jitter_s) if self.jitter_s > 0 else 0.0
+        return self.base_s + self.per_unit_s * units + jitter
+
+    def sleep(self, units: float = 0) -> None:
+        duration = self.sample(units)
+        if duration > 0:
+            time.sleep(duration)
+
+    async def asleep(self, units: float = 0) -> None:
+        duration = self.sample(units)
+        if duration > 0:
+            await asyncio.sleep(duration)
@@ -0,0 +1,27 @@
+import time
+
+
+class NullAudioOutput:
+    """
+    Audio output stand-in with the interface of a PyAudio output stream.
+
+    Writing blocks as long as playing the audio would take, accelerated by `speed`, but nothing is played.
+    """
+
+    def __init__(self, sample_rate: int, speed: float = 1.0):
+        self.sample_rate = sample_rate
+        self.speed = speed
+        self.frames_written = 0
+
+    def start_stream(self) -> None:
+        pass
+
+    def stop_stream(self) -> None:
+        pass
+
+    def write(self, frames: bytes, num_frames: int) -> None:
+        self.frames_written += num_frames
+        time.sleep(num_frames / (self.sample_rate * self.speed))
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+
+import numpy as np
+
+from audio_detection.AudioListener import IAudioListener
+
+from .Utterance import Utterance
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayAudioListener(IAudioListener):
+    """
+    Replays utterances as if they were spoken into the microphone.
+
+    Every utterance is followed by `gap_s` seconds of silence. Before the next utterance is replayed, the listener
+    keeps on delivering silence until `is_ready` returns true (e.g. until the previous request is finished). Once
+    all utterances are replayed, `finished` is set and silence is delivered from then on.
+
+    Frames are paced to the wall clock, accelerated by `speed` (e.g. 4 replays four seconds of audio per second).
+    The stream positions at which the keyword of an utterance is spoken are queued in `keyword_positions`.
+
+    Args:
+        sample_rate (int): Sample rate of the replayed audio.
+        frame_length (int): Number of samples per frame.
+        utterances (List[Utterance]): Utterances to replay in order.
+        speed (float): Replay speed relative to real time.
+        gap_s (float): Silence after every utterance in seconds.
+        is_ready (Callable[[], bool], optional): Whether the next utterance may be replayed.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        frame_length: int,
+        utterances: List[Utterance] = (),
+        speed: float = 1.0,
+        gap_s: float = 2.0,
+        is_ready: Optional[Callable[[], bool]] = None,
+    ):
+        if speed <= 0:
+            raise ValueError("The replay speed must be positive.")
+
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+        self.utterances = list(utterances)
+        self.speed = speed
+        self.gap_samples = int(gap_s * sample_rate)
+        self.is_ready = is_ready or (lambda: True)
+
+        self.keyword_positions: Deque[Tuple[int, Utterance]] = deque()
+        self.finished = threading.Event()
+
+        self.position = 0  # Number of samples delivered
+        self.next_utterance = 0
+        self.audio: Optional[np.ndarray] = None
+        self.audio_position = 0
+        self.silence = np.zeros(frame_length, dtype=np.int16)
+        self.start_time: Optional[float] = None
+
+    def fetch_audio_frame(self) -> bytes:
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+
+        frame = self._next_frame()
+        self.position += len(frame)
+
+        # Deliver the frame not before it would have been recorded
+        delay = self.start_time + self.position / (self.sample_rate * self.speed) - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        return frame.tobytes()
+
+    def _next_frame(self) -> np.ndarray:
+        if self.audio is None and self.next_utterance < len(self.utterances) and self.is_ready():
+            self._start_utterance(self.utterances[self.next_utterance])
+            self.next_utterance += 1
+
+        if self.audio is None:
+            if self.next_utterance == len(self.utterances) and self.is_ready():
+                self.finished.set()
+            return self.silence
+
+        frame = self.audio[self.audio_position : self.audio_position + self.frame_length]
+        self.audio_position += self.frame_length
+        if self.audio_position >= len(self.audio):
+            self.audio = None
+        if len(frame) < self.frame_length:
+            frame = np.concatenate([frame, self.silence[: self.frame_length - len(frame)]])
+        return frame
+
+    def _start_utterance(self, utterance: Utterance) -> None:
+        logger.debug("Replaying '%s'", utterance.transcript)
+        speech = utterance.load_samples(self.sample_rate)
+        self.audio = np.concatenate([speech, np.zeros(self.gap_samples, dtype=np.int16)])
+        self.audio_position = 0
+        self.keyword_positions.append((self.position + int(utterance.keyword_offset_s * self.sample_rate), utterance))
@@ -0,0 +1,48 @@
+import wave
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+@dataclass
+class Utterance:
+    """
+    A spoken request of a benchmark run: the keyword followed by the query.
+
+    The audio is read from `wav_path` (mono, 16 bit PCM at the sample rate of the audio detection). Without a WAV
+    file, a synthetic voiced signal of `duration_s` seconds is generated instead, which the VADs classify as speech.
+
+    Args:
+        transcript (str): What the fake transcriber returns for this utterance.
+        wav_path (str, optional): WAV fixture of the utterance.
+        duration_s (float): Duration of the synthetic speech if no WAV fixture is given.
+        keyword_offset_s (float): Offset at which the fake keyword detector fires, relative to the utterance start.
+    """
+
+    transcript: str
+    wav_path: Optional[str] = None
+    duration_s: float = 1.5
+    keyword_offset_s: float = 0.0
+
+    def load_samples(self, sample_rate: int) -> np.ndarray:
+        if self.wav_path is None:
+            return synthetic_speech(self.duration_s, sample_rate)
+
+        with wave.open(self.wav_path, "rb") as wav_file:
+            if wav_file.getnchannels() != 1 or wav_file.getsampwidth() != 2:
+                raise ValueError(f"{self.wav_path} must be a mono 16 bit PCM WAV file.")
+            if wav_file.getframerate() != sample_rate:
+                raise ValueError(f"{self.wav_path} must have a sample rate of {sample_rate} Hz.")
+            return np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+
+
+def synthetic_speech(duration_s: float, sample_rate: int, seed: int = 0) -> np.ndarray:
+    """Harmonics of a gliding fundamental frequency, modulated at syllable rate."""
+    t = np.arange(int(duration_s * sample_rate)) / sample_rate
+    f0 = 140 + 20 * np.sin(2 * np.pi * 3 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 15))
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    noise = np.random.default_rng(seed).normal(0, 100, len(t))
+    return np.clip(voiced * envelope * 6000 + noise, -32768, 32767).astype(np.int16)
@@ -0,0 +1,11 @@
+from .BenchmarkRunner import BenchmarkRunner, format_report
+from .FakeAgent import FakeAgent
+from .FakeAudioGenerator import FakeAudioGenerator
+from .FakeChatModel import FakeChatModel
+from .FakeKeywordDetector import FakeKeywordDetector
+from .FakeSearchTool import FakeSearchTool
+from .FakeTranscriber import FakeTranscriber
+from .LatencyProfile import LatencyProfile
+from .NullAudioOutput import NullAudioOutput
+from .ReplayAudioListener import ReplayAudioListener
+from .Utterance import Utterance
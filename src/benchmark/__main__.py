@@ -0,0 +1,77 @@
+import argparse
+import json
+import logging
+import os
+
+from benchmark import BenchmarkRunner, LatencyProfile, Utterance, format_report
+
+# Queries of the default benchmark, with and without a web search
+DEFAULT_UTTERANCES = [
+    Utterance("Wie ist das Wetter heute in Berlin?", duration_s=2.0),
+    Utterance("Mach das Licht im Wohnzimmer an.", duration_s=1.5),
+    Utterance("Wer hat die Relativitätstheorie entwickelt?", duration_s=2.0),
+    Utterance("Wie hoch ist die Zugspitze?", duration_s=1.5),
+]
+
+
+def load_utterances(path: str):
+    """Loads utterances from a JSON list of objects with the fields of `Utterance`. WAV paths are relative to it."""
+    with open(path) as f:
+        utterances = [Utterance(**utterance) for utterance in json.load(f)]
+    for utterance in utterances:
+        if utterance.wav_path is not None:
+            utterance.wav_path = os.path.join(os.path.dirname(path), utterance.wav_path)
+    return utterances
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the voice assistant.")
+    parser.add_argument("--utterances", help="JSON file with the utterances to replay (default: synthetic speech)")
+    parser.add_argument("--requests", type=int, default=8, help="Number of requests, the utterances are cycled")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed relative to real time")
+    parser.add_argument("--gap", type=float, default=2.0, help="Silence after every utterance in seconds")
+    parser.add_argument("--transcription-ms", type=float, default=300, help="Transcription time per second of audio")
+    parser.add_argument("--first-token-ms", type=float, default=400, help="Time to the first LLM token")
+    parser.add_argument("--token-ms", type=float, default=20, help="Time between LLM tokens")
+    parser.add_argument("--search-ms", type=float, default=600, help="Web search time")
+    parser.add_argument("--tts-ms", type=float, default=150, help="Base synthesis time per segment")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Maximum jitter relative to the base latencies")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the latency jitter")
+    parser.add_argument("--response-cache", action="store_true", help="Enable the response cache")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    def profile(base_ms: float, per_unit_ms: float = 0.0, offset: int = 0) -> LatencyProfile:
+        jitter_ms = args.jitter * (base_ms or per_unit_ms)
+        return LatencyProfile(base_ms / 1000, per_unit_ms / 1000, jitter_ms / 1000, args.seed + offset)
+
+    latencies = {
+        "transcription": profile(0, args.transcription_ms, 1),
+        "first_token": profile(args.first_token_ms, offset=2),
+        "token": profile(args.token_ms, offset=3),
+        "search": profile(args.search_ms, offset=4),
+        "tts": profile(args.tts_ms, 1, offset=5),
+    }
+
+    utterances = load_utterances(args.utterances) if args.utterances else DEFAULT_UTTERANCES
+    utterances = [utterances[i % len(utterances)] for i in range(args.requests)]
+
+    runner = BenchmarkRunner(
+        utterances,
+        speed=args.speed,
+        gap_s=args.gap,
+        latencies=latencies,
+        use_response_cache=args.response_cache,
+    )
+    report = runner.run()
+
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    logging_level = os.environ.get("LOGLEVEL", "WARNING").upper()
+    logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging_level)
+    main()
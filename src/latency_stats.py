@@ -0,0 +1,105 @@
+import threading
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+class LatencyStats:
+    """
+    Rolling window of latency samples in seconds with percentiles.
+
+    Args:
+        window_size (int): Number of most recent samples the percentiles are computed of.
+    """
+
+    def __init__(self, window_size: int = 500):
+        self.samples = deque(maxlen=window_size)
+        self.count = 0
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, latency_s: float) -> None:
+        with self.lock:
+            self.samples.append(latency_s)
+            self.count += 1
+            self.total += latency_s
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        with self.lock:
+            if not self.samples:
+                return None
+            return float(np.percentile(self.samples, percentile))
+
+    def percentiles(self, percentiles: Iterable[float] = (50, 95, 99)) -> Dict[str, float]:
+        percentiles = list(percentiles)
+        with self.lock:
+            if not self.samples:
+                return {}
+            values = np.percentile(self.samples, percentiles)
+        return {f"p{percentile:g}": float(value) for percentile, value in zip(percentiles, values)}
+
+
+def provider_names(providers: Sequence[object]) -> List[str]:
+    """
+    Unique names of providers, under which their latencies are recorded: the class name, numbered if several
+    providers are of the same class (e.g. two `GoogleCloudTTS` with different voices).
+    """
+    class_names = [type(provider).__name__ for provider in providers]
+    counts, numbers = Counter(class_names), Counter()
+    names = []
+    for class_name in class_names:
+        if counts[class_name] > 1:
+            numbers[class_name] += 1
+            class_name = f"{class_name}#{numbers[class_name]}"
+        names.append(class_name)
+    return names
+
+
+def provider_latency(
+    latency_stats: Dict[str, LatencyStats], name: str, percentile: float, min_samples: int
+) -> Optional[float]:
+    """Percentile of the latencies of a provider, or `None` before `min_samples` were recorded."""
+    stats = latency_stats.get(name)
+    if stats is None or stats.count < min_samples:
+        return None
+    return stats.percentile(percentile)
+
+
+def rank_by_latency(
+    names: Sequence[str], latency_stats: Dict[str, LatencyStats], min_samples: int, percentile: float = 90
+) -> List[str]:
+    """
+    Orders the names of interchangeable providers by the percentile of their latencies, e.g. to pick the primary of
+    a hedge.
+    """
+
+    def rank(index_and_name):
+        index, name = index_and_name
+        latency_s = provider_latency(latency_stats, name, percentile, min_samples)
+        # Providers without enough samples keep their configured order after the measured ones
+        return (latency_s is None, latency_s or 0.0, index)
+
+    return [name for _, name in sorted(enumerate(names), key=rank)]
+
+
+def adaptive_hedge_delay(
+    latency_stats: Dict[str, LatencyStats],
+    primary: str,
+    max_delay_s: float,
+    min_delay_s: float,
+    min_samples: int,
+    percentile: float = 95,
+) -> float:
+    """
+    Time after which a request to the primary is hedged to the other providers: the percentile of the latencies of
+    the primary, clamped to the given range. `max_delay_s` until enough latencies were recorded.
+    """
+    latency_s = provider_latency(latency_stats, primary, percentile, min_samples)
+    if latency_s is None:
+        return max_delay_s
+    return min(max(latency_s, min_delay_s), max_delay_s)
+
+
+def latency_report(latency_stats: Dict[str, LatencyStats]) -> Dict[str, Dict[str, float]]:
+    return {name: stats.percentiles() for name, stats in latency_stats.items()}
@@ -0,0 +1,27 @@
+import importlib
+import sys
+from typing import Any, Callable, Dict
+
+
+def lazy_attributes(package: str, attributes: Dict[str, str]) -> Callable[[str], Any]:
+    """
+    Returns a module `__getattr__` that imports the module of an attribute of `package` only when it is first accessed.
+
+    Used by the packages of the providers, so that importing a package does not import the SDKs of all its providers,
+    only those of the selected ones. For the same reason, providers read their API keys on construction rather than on
+    import, so that e.g. benchmarks can import a package without the keys of providers they do not use.
+
+    Args:
+        package (str): Name of the package, i.e. `__name__` of its `__init__` module.
+        attributes (Dict[str, str]): Relative module of every lazily imported attribute by name.
+    """
+
+    def __getattr__(name: str) -> Any:
+        if name not in attributes:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(attributes[name], package), name)
+        # Importing a submodule binds it to the package, which would shadow a class of the same name
+        setattr(sys.modules[package], name, value)
+        return value
+
+    return __getattr__
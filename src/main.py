@@ -4,96 +4,230 @@ logger = logging.getLogger(__name__)
 
 import asyncio
 import os
+import sys
+import threading
 import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, List, Optional, Union
 
 import speech_recognition as sr
 
+from provider_registry import ProviderRegistry
+from startup import ParallelStartup
 from state_manager import State, StateManager
+from tracing import Trace, Tracer
 
+if TYPE_CHECKING:
+    from langchain_core.tools import BaseTool
 
-class App:
-    def __init__(self) -> None:
-        self.state_manager = StateManager()
-
-        self.state_manager.set_state(State.IMPORT_AUDIO_DETECTION, logger)
-        from audio_detection import AudioDetectionManager
-        from audio_detection.AudioKeywordDetector import Porcupine_Picovoice
-        from audio_detection.AudioListener import Porcupine_Listener
-
-        self.state_manager.set_state(State.IMPORT_TRANSCRIPTION, logger)
-        from audio_transcription.AudioTranscriber import (
-            GoogleCloudSpeech,
-            OpenAI_Whisper,
-            VoskAPI,
-        )
-
-        self.state_manager.set_state(State.IMPORT_LLMS, logger)
-        from response_generation import (
-            ResponseGenerationPipelineManager,
-            agent_prompt,
-            chat_prompt,
-        )
-        from response_generation.agent import OpenAIAgent
-
-        # from response_generation.llm import Huggingface, Ollama, OpenAI
-        from response_generation.tools.web_search import (  # TavilyAPI, YouAPI,
-            AzureBingAPIv7,
-        )
-
-        self.state_manager.set_state(State.IMPORT_AUDIO_GENERATION, logger)
-        from audio_generation import AudioGenerationManager, AWSPolly, GoogleCloudTTS
-
-        self.state_manager.set_state(State.SETUP_AUDIO_DETECTION, logger)
-        # Audio Detection
-        self.audio_detection_manager = AudioDetectionManager(
-            Porcupine_Listener, Porcupine_Picovoice, self.recorded_audio_callback, state_manager=self.state_manager
-        )
-
-        self.state_manager.set_state(State.SETUP_TRANSCRIPTION, logger)
-        # self.transcriber = VoskAPI()
-        # self.transcriber = GoogleCloudSpeech()
-        self.transcriber = OpenAI_Whisper()
-
-        # Response Generation
-
-        self.state_manager.set_state(State.SETUP_LLM_TOOLS, logger)
-        web_search = AzureBingAPIv7()
-        tools = [web_search]
-
-        self.state_manager.set_state(State.SETUP_LLM_AGENT, logger)
-        # agent = OpenAIAgent(model_name="gpt-4-0125-preview")
-        agent = OpenAIAgent(model_name="gpt-4o")
-
-        # self.state_manager.set_state(State.SETUP_LLM)
-
-        # openai = OpenAI()
-        # llm = openai.llm(model_name="gpt-3.5-turbo-0125")
-        # llm = openai.llm(model_name="gpt-4-0125-preview")
-
-        # huggingface = Huggingface()
-        # llm = huggingface.llm(repo_id="mistralai/Mixtral-8x7B-Instruct-v0.1")
-        # llm = huggingface.llm(repo_id="HuggingFaceH4/zephyr-7b-beta")
-
-        # ollama = Ollama()
-        # llm = ollama.llm("llama2")
+    from audio_detection import AudioDetectionManager
+    from audio_detection.AudioKeywordDetector import IAudioKeywordDetector
+    from audio_detection.AudioListener import IAudioListener
+    from audio_generation import AudioGenerationManager, IAudioGenerator
+    from audio_transcription.AudioTranscriber import IAudioTranscriber
+    from response_generation import ResponseGenerationPipelineManager
+    from response_generation.agent import BaseAgentProvider
 
-        # self.llm_pipeline_manager = ResponseGenerationPipelineManager(chat_prompt, llm)
-        self.llm_pipeline_manager = ResponseGenerationPipelineManager(agent_prompt, agent, tools)
+# Phrases that are synthesized at startup, so that they are served from the audio cache
+PHRASE_BANK = [
+    "Lass mich kurz im Internet nachschauen.",
+    "Okay.",
+    "Erledigt.",
+    "Das habe ich leider nicht verstanden.",
+]
 
-        self.state_manager.set_state(State.SETUP_AUDIO_GENERATION, logger)
-        # Audio Generation
-        audio_generator = GoogleCloudTTS(language_code="de-DE", model_name="de-DE-Wavenet-B")
-        # audio_generator = AWSPolly(language_code="de-DE", model_name="Daniel")
-        self.audio_generation_manager = AudioGenerationManager(audio_generator)
 
-        if not os.path.isfile(os.path.join("sounds", "web_search.wav")):
-            search_web_audio = self.audio_generation_manager.generate_audio("Lass mich kurz im Internet nachschauen.")
-
-            if not os.path.isdir("sounds"):
-                os.makedirs("sounds")
-
-            with open(os.path.join("sounds", "web_search.wav"), "wb") as f:
-                f.write(search_web_audio)
+class App:
+    """
+    The voice assistant.
+
+    All components are set up with the providers selected in the config file (see `ProviderRegistry`), unless they
+    are passed in. The benchmark uses this to run the app with local stand-ins.
+
+    Args:
+        listener (IAudioListener, optional): Audio input.
+        detector (IAudioKeywordDetector, optional): Keyword detector.
+        transcriber (IAudioTranscriber, optional): Transcriber of the recorded speech.
+        agent (BaseAgentProvider, optional): LLM agent generating the responses.
+        tools (List[BaseTool], optional): Tools of the agent.
+        audio_generator (IAudioGenerator, optional): Text-to-speech provider. Its audio is not cached.
+        audio_output (optional): Audio output with the interface of a PyAudio output stream.
+        use_response_cache (bool): Whether responses to repeated queries are served from the `ResponseCache`.
+        config_path (str, optional): TOML config file of the providers. Defaults to the `CONFIG_FILE` environment
+            variable or `config.toml`.
+        listening_first (bool): Whether the app returns as soon as the microphone and the keyword detection are set
+            up, while the other components are still initialized. The first request waits for them.
+    """
+
+    CANCEL_RETRY_S: float = 0.01
+
+    def __init__(
+        self,
+        listener: Optional["IAudioListener"] = None,
+        detector: Optional["IAudioKeywordDetector"] = None,
+        transcriber: Optional["IAudioTranscriber"] = None,
+        agent: Optional["BaseAgentProvider"] = None,
+        tools: Optional[List["BaseTool"]] = None,
+        audio_generator: Optional["IAudioGenerator"] = None,
+        audio_output=None,
+        use_response_cache: bool = True,
+        config_path: Optional[str] = None,
+        listening_first: bool = False,
+    ) -> None:
+        self.tracer = Tracer()
+        self.providers = ProviderRegistry.from_file(config_path or os.environ.get("CONFIG_FILE", "config.toml"))
+        # Latency histograms are written to this file after every request (.json or Prometheus text format)
+        self.metrics_file = os.environ.get("LATENCY_METRICS_FILE")
+        self.state_manager = StateManager(tracer=self.tracer)
+        # Requests are processed on the request thread of the audio detection, which runs this loop
+        self.loop = asyncio.new_event_loop()
+        self.request_task: Optional[asyncio.Task] = None
+        self.interrupt_start: Optional[float] = None
+
+        self.transcriber: Optional["IAudioTranscriber"] = None
+        self.audio_detection_manager: Optional["AudioDetectionManager"] = None
+        self.llm_pipeline_manager: Optional["ResponseGenerationPipelineManager"] = None
+        self.audio_generation_manager: Optional["AudioGenerationManager"] = None
+
+        def setup_transcriber() -> "IAudioTranscriber":
+            self.state_manager.set_state(State.SETUP_TRANSCRIPTION, logger)
+            return transcriber or self.providers.create("transcriber")
+
+        def setup_audio_detection() -> "AudioDetectionManager":
+            self.state_manager.set_state(State.IMPORT_AUDIO_DETECTION, logger)
+            from audio_detection import AudioDetectionManager
+
+            self.state_manager.set_state(State.SETUP_AUDIO_DETECTION, logger)
+            # Created by the registry, so that their options of the config file are used and their load is reported.
+            # The audio format is given by the pipeline and takes precedence over the config file.
+            sample_rate = AudioDetectionManager.SAMPLE_RATE
+            return AudioDetectionManager(
+                listener
+                or self.providers.create(
+                    "listener", sample_rate=sample_rate, frame_length=AudioDetectionManager.frame_length
+                ),
+                detector or self.providers.create("keyword_detector"),
+                self.recorded_audio_callback,
+                state_manager=self.state_manager,
+                vad_cls=self.providers.create("vad", sample_rate=sample_rate),
+                interrupt_callback=self.interrupt_request,
+            )
+
+        def setup_transcription(audio_detection: "AudioDetectionManager", transcriber: "IAudioTranscriber") -> None:
+            from audio_transcription.AudioTranscriber import IStreamingAudioTranscriber
+
+            # Streaming transcribers (e.g. Vosk) transcribe the speech while it is recorded, all others speculatively
+            # after a short silence
+            if isinstance(transcriber, IStreamingAudioTranscriber):
+                audio_detection.set_transcribers(streaming_transcriber=transcriber)
+            else:
+                audio_detection.set_transcribers(speculative_transcriber=transcriber)
+
+        def setup_tools() -> List["BaseTool"]:
+            self.state_manager.set_state(State.SETUP_LLM_TOOLS, logger)
+            return tools if tools is not None else [self.providers.create("web_search")]
+
+        def setup_agent() -> "BaseAgentProvider":
+            self.state_manager.set_state(State.SETUP_LLM_AGENT, logger)
+            return agent or self.providers.create("agent")
+
+        def setup_response_generation(
+            agent: "BaseAgentProvider", tools: List["BaseTool"]
+        ) -> "ResponseGenerationPipelineManager":
+            self.state_manager.set_state(State.IMPORT_LLMS, logger)
+            from response_generation import (
+                ResponseCache,
+                ResponseGenerationPipelineManager,
+                agent_prompt,
+                chat_prompt,
+            )
+
+            # self.state_manager.set_state(State.SETUP_LLM)
+
+            # from response_generation.llm import Huggingface, Ollama, OpenAI
+            # openai = OpenAI()
+            # llm = openai.llm(model_name="gpt-3.5-turbo-0125")
+            # llm = openai.llm(model_name="gpt-4-0125-preview")
+
+            # huggingface = Huggingface()
+            # llm = huggingface.llm(repo_id="mistralai/Mixtral-8x7B-Instruct-v0.1")
+            # llm = huggingface.llm(repo_id="HuggingFaceH4/zephyr-7b-beta")
+
+            # ollama = Ollama()
+            # llm = ollama.llm("llama2")
+
+            # return ResponseGenerationPipelineManager(chat_prompt, llm)
+            return ResponseGenerationPipelineManager(
+                agent_prompt, agent, tools, response_cache=ResponseCache() if use_response_cache else None
+            )
+
+        def setup_audio_generator() -> "IAudioGenerator":
+            self.state_manager.set_state(State.SETUP_AUDIO_GENERATION, logger)
+            if audio_generator is not None:
+                return audio_generator
+
+            from audio_generation import CachedAudioGenerator
+
+            generator = self.providers.create("audio_generator")
+            if self.providers.provider_config("audio_generator").get("cache", True):
+                generator = CachedAudioGenerator(generator)
+            return generator
+
+        def setup_phrase_bank(audio_generator: "IAudioGenerator") -> None:
+            from audio_generation import CachedAudioGenerator
+            from audio_generation.pcm import write_wav
+
+            if isinstance(audio_generator, CachedAudioGenerator):
+                audio_generator.prefetch(PHRASE_BANK)
+            if not os.path.isfile(os.path.join("sounds", "web_search.wav")):
+                os.makedirs("sounds", exist_ok=True)
+                search_web_audio = audio_generator.generate_audio("Lass mich kurz im Internet nachschauen.")
+                write_wav(os.path.join("sounds", "web_search.wav"), search_web_audio, audio_generator.get_sample_rate())
+
+        def setup_audio_generation(audio_generator: "IAudioGenerator") -> "AudioGenerationManager":
+            self.state_manager.set_state(State.IMPORT_AUDIO_GENERATION, logger)
+            from audio_generation import AudioGenerationManager
+
+            return AudioGenerationManager(audio_generator, tracer=self.tracer, output_stream=audio_output)
+
+        # Independent components are initialized concurrently
+        self.startup = ParallelStartup()
+        self.startup.add("transcriber", setup_transcriber)
+        self.startup.add("audio_detection", setup_audio_detection)
+        self.startup.add("transcription", setup_transcription, depends_on=["audio_detection", "transcriber"])
+        self.startup.add("tools", setup_tools)
+        self.startup.add("agent", setup_agent)
+        self.startup.add("response_generation", setup_response_generation, depends_on=["agent", "tools"])
+        self.startup.add("audio_generator", setup_audio_generator)
+        if audio_generator is None:
+            self.startup.add("phrase_bank", setup_phrase_bank, depends_on=["audio_generator"])
+        self.startup.add("audio_generation", setup_audio_generation, depends_on=["audio_generator"])
+        self.startup_lock = threading.Lock()
+        self.startup.start()
+
+        if listening_first:
+            # The microphone and the keyword detection start right away, requests wait for all other components
+            self.audio_detection_manager = self.startup.result("audio_detection")
+            logger.info(
+                "Listening after %.2f seconds, initializing the remaining components",
+                time.perf_counter() - self.startup.start_time,
+            )
+        else:
+            self.finish_startup()
+
+    def finish_startup(self) -> None:
+        """Waits until all components are initialized."""
+        with self.startup_lock:
+            if self.llm_pipeline_manager is not None:
+                return
+            components = self.startup.wait()
+            self.transcriber = components["transcriber"]
+            self.audio_detection_manager = components["audio_detection"]
+            self.llm_pipeline_manager = components["response_generation"]
+            self.audio_generation_manager = components["audio_generation"]
+
+        logger.info("Startup timeline:\n%s", self.startup.report())
+        logger.info("Providers:\n%s", self.providers.report())
 
     def __del__(self):
         try:
@@ -101,51 +235,136 @@ class App:
         except AttributeError:
             pass
 
+        # Only loaded if a web search tool was created, its async sessions are bound to the request loop
+        http_client = sys.modules.get("response_generation.tools.web_search.http_client")
+        if http_client is not None:
+            http_client.close_sessions()
+
         self.state_manager.set_state(State.TERMINATED, logger)
 
     def main(self):
         self.state_manager.set_state(State.LISTENING_FOR_ACTIVATION, logger)
         self.audio_detection_manager.process_audio_stream()
 
-    def recorded_audio_callback(self, audio_data: sr.AudioData) -> None:
+    def recorded_audio_callback(
+        self,
+        audio_data: sr.AudioData,
+        transcription: Optional[Union[str, Future]] = None,
+        interrupted: Optional[threading.Event] = None,
+        trace: Optional[Trace] = None,
+    ) -> None:
+        if self.llm_pipeline_manager is None:
+            logger.info("Waiting for the remaining components to be initialized")
+            self.finish_startup()
         self.total_time_start = time.time()
 
-        self.state_manager.set_state(State.TRANSCRIPTION_IN_PROGRESS, logger)
-
-        start = time.time()
-        transcription_result: str = self.transcriber.transcribe(audio_data)
-        logger.info("Transcription took %s seconds", time.time() - start)
-
-        if transcription_result:
-            loop = asyncio.get_event_loop()
-            loop.run_until_complete(self.transcription_callback(transcription_result))
+        if isinstance(transcription, Future):
+            # Speculative transcription, started before the end of speech was committed
+            self.state_manager.set_state(State.TRANSCRIPTION_IN_PROGRESS, logger, trace)
+
+            start = time.time()
+            with self.tracer.span("transcription_wait", trace):
+                transcription_result: str = transcription.result()
+            logger.info("Waited %s seconds for the speculative transcription", time.time() - start)
+        elif transcription is None:
+            self.state_manager.set_state(State.TRANSCRIPTION_IN_PROGRESS, logger, trace)
+
+            start = time.time()
+            with self.tracer.span("transcription", trace):
+                transcription_result = self.transcriber.transcribe(audio_data)
+            logger.info("Transcription took %s seconds", time.time() - start)
         else:
-            self.state_manager.set_state(State.TRANSCRIPTION_NOTHING_DETECTED, logger)
-
-    async def transcription_callback(self, transcription: str) -> None:
+            # Transcribed while recording
+            transcription_result = transcription
+
+        if interrupted is not None and interrupted.is_set():
+            self.request_interrupted()
+        elif transcription_result:
+            self.state_manager.set_state(State.TRANSCRIPTION_SUCCESS, logger, trace)
+            self.request_task = self.loop.create_task(self.transcription_callback(transcription_result, trace))
+            # The interruption may have happened before the task existed
+            if interrupted is not None and interrupted.is_set():
+                self.request_task.cancel()
+            try:
+                self.loop.run_until_complete(self.request_task)
+            except asyncio.CancelledError:
+                self.request_interrupted()
+            finally:
+                self.request_task = None
+        else:
+            self.state_manager.set_state(State.TRANSCRIPTION_NOTHING_DETECTED, logger, trace)
+
+        if self.metrics_file:
+            self.tracer.dump(self.metrics_file)
+
+    def interrupt_request(self) -> None:
+        """
+        Barge-in, called by the audio detection when the keyword is detected during a request. Cancels the response
+        generation, tool calls and synthesis of the request and stops its playback.
+        """
+        self.interrupt_start = time.perf_counter()
+        # Stopped right away, the cancellation of the task takes effect once the generation yields to the loop
+        if self.audio_generation_manager is not None:
+            self.audio_generation_manager.stop_playback()
+        task = self.request_task
+        if task is not None:
+            self.loop.call_soon_threadsafe(self._cancel_request, task)
+
+    def _cancel_request(self, task: asyncio.Task) -> None:
+        # Cancelled until it is done: a cancelled agent event stream waits for the agent run in its cleanup, only
+        # another cancellation cancels the run (LLM and tool calls) itself
+        if not task.done():
+            task.cancel()
+            self.loop.call_later(self.CANCEL_RETRY_S, self._cancel_request, task)
+
+    def request_interrupted(self) -> None:
+        # Recorded in the trace of the request that interrupted this one
+        if self.interrupt_start is not None:
+            self.tracer.record_span("barge_in", self.interrupt_start, time.perf_counter())
+        logger.info("Request interrupted")
+
+    async def transcription_callback(self, transcription: str, trace: Optional[Trace] = None) -> None:
         logger.info("> %s", transcription)
 
         start = time.time()
 
-        response = ""
-        async for chunk in self.llm_pipeline_manager.generate_response(transcription):
-            response += chunk
+        self.state_manager.set_state(State.RESPONSE_GENERATION_IN_PROGRESS, logger, trace)
+        response = await self.audio_generation_manager.speak(
+            self.response_stream(transcription, trace),
+            on_playback_start=lambda: self.playback_started_callback(trace),
+            trace=trace,
+        )
 
         logger.info(response)
         logger.info("Response Generation took %s seconds", time.time() - start)
-
-        self.generate_audio(response)
-
-    def generate_audio(self, text: str):
-        start = time.time()
-        audio_data = self.audio_generation_manager.generate_audio(text)
-        logger.info("Autio Generation took %s seconds", time.time() - start)
-
-        logger.info("Total  pipeline took %s seconds", time.time() - self.total_time_start)
-
-        self.state_manager.set_state(State.PLAYING_RESPONSE, logger)
-        self.audio_generation_manager.play(audio_data)
-        self.state_manager.set_state(State.REQUEST_FINISHED, logger)
+        logger.info("Total pipeline took %s seconds", time.time() - self.total_time_start)
+
+        self.state_manager.set_state(State.REQUEST_FINISHED, logger, trace)
+
+    async def response_stream(self, transcription: str, trace: Optional[Trace] = None):
+        from response_generation import PipelineEventType
+
+        tool_starts = {}
+        async for event in self.llm_pipeline_manager.generate_events(transcription):
+            if event.type == PipelineEventType.TOKEN:
+                yield event.data
+            elif event.type == PipelineEventType.CACHE_HIT:
+                logger.info("Response served from cache (%s)", self.llm_pipeline_manager.response_cache.metrics())
+            elif event.type == PipelineEventType.FIRST_TOKEN:
+                self.tracer.mark("first_token", trace)
+                logger.info("Time to first token took %s seconds", event.timestamp - self.total_time_start)
+            elif event.type == PipelineEventType.TOOL_START:
+                tool_starts[event.data["name"]] = time.perf_counter()
+                logger.info("Calling tool %s", event.data["name"])
+            elif event.type == PipelineEventType.TOOL_END:
+                start = tool_starts.pop(event.data["name"], None)
+                if start is not None:
+                    self.tracer.record_span(f"tool:{event.data['name']}", start, time.perf_counter(), trace)
+                logger.info("Tool %s finished", event.data["name"])
+
+    def playback_started_callback(self, trace: Optional[Trace] = None) -> None:
+        logger.info("Time to first audio took %s seconds", time.time() - self.total_time_start)
+        self.state_manager.set_state(State.PLAYING_RESPONSE, logger, trace)
 
 
 if __name__ == "__main__":
@@ -157,5 +376,5 @@ if __name__ == "__main__":
 
     logger.info("Drinking coffee ☕️")
 
-    app = App()
+    app = App(listening_first=os.environ.get("LISTENING_FIRST", "").lower() in ("1", "true"))
     app.main()
@@ -0,0 +1,178 @@
+import importlib
+import logging
+import os
+import resource
+import sys
+import time
+import tomllib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Module and class of every provider by kind and name. Providers are only imported when they are selected.
+PROVIDERS: Dict[str, Dict[str, str]] = {
+    "listener": {
+        "porcupine": "audio_detection.AudioListener.Porcupine_Listener:Porcupine_Listener",
+    },
+    "keyword_detector": {
+        "porcupine": "audio_detection.AudioKeywordDetector.Porcupine_Picovoice:Porcupine_Picovoice",
+    },
+    "vad": {
+        "webrtc": "audio_detection.VoiceActivityDetector.WebRTCVAD:WebRTCVAD",
+        "silero": "audio_detection.VoiceActivityDetector.SileroVAD:SileroVAD",
+    },
+    "transcriber": {
+        "openai_whisper": "audio_transcription.AudioTranscriber.OpenAI_Whisper:OpenAI_Whisper",
+        "local_whisper": "audio_transcription.AudioTranscriber.Local_Whisper:Local_Whisper",
+        "google_cloud_speech": "audio_transcription.AudioTranscriber.GoogleCloudSpeech:GoogleCloudSpeech",
+        "vosk": "audio_transcription.AudioTranscriber.VoskAPI:VoskAPI",
+        "cascade": "audio_transcription.AudioTranscriber.CascadingTranscriber:CascadingTranscriber",
+    },
+    "web_search": {
+        "azure_bing": "response_generation.tools.web_search.AzureBingAPIv7:AzureBingAPIv7",
+        "tavily": "response_generation.tools.web_search.TavilyAPI:TavilyAPI",
+        "you": "response_generation.tools.web_search.YouAPI:YouAPI",
+        "hedged": "response_generation.tools.web_search.HedgedWebSearch:HedgedWebSearch",
+    },
+    "agent": {
+        "openai": "response_generation.agent.OpenAIAgent:OpenAIAgent",
+    },
+    "audio_generator": {
+        "google_cloud_tts": "audio_generation.GoogleCloudTTS:GoogleCloudTTS",
+        "aws_polly": "audio_generation.AWSPolly:AWSPolly",
+        "hedged": "audio_generation.HedgedAudioGenerator:HedgedAudioGenerator",
+    },
+}
+
+# Providers that are composed of other providers of their kind, by the option that lists them
+COMPOSITE_PROVIDERS: Dict[str, str] = {"hedged": "providers", "cascade": "tiers"}
+
+# Used for every kind that is missing in the config file
+DEFAULT_CONFIG: Dict[str, Dict[str, Any]] = {
+    "listener": {"provider": "porcupine"},
+    "keyword_detector": {"provider": "porcupine"},
+    "vad": {"provider": "webrtc"},
+    "transcriber": {"provider": "openai_whisper"},
+    "web_search": {"provider": "azure_bing"},
+    "agent": {"provider": "openai", "options": {"model_name": "gpt-4o"}},
+    "audio_generator": {
+        "provider": "google_cloud_tts",
+        "options": {"language_code": "de-DE", "model_name": "de-DE-Wavenet-B"},
+        "cache": True,
+    },
+}
+
+
+def current_rss() -> int:
+    """Returns the resident set size of this process in bytes, or the peak resident set size if it is unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on macOS, kilobytes on Linux
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+@dataclass
+class ProviderLoad:
+    kind: str
+    name: str
+    import_s: float = 0.0
+    init_s: float = 0.0
+    rss_bytes: int = 0  # Growth of the resident set size by the import and initialization
+
+
+class ProviderRegistry:
+    """
+    Creates the providers selected in a TOML config file, e.g.
+
+        [transcriber]
+        provider = "local_whisper"
+        options = { model_name = "base", compute_type = "int8" }
+
+    Only the modules of the selected providers are imported, so that the SDKs of all others (e.g. torch for the
+    local Whisper model or the Silero VAD) are neither imported nor loaded into memory. The import time, the
+    initialization time and the memory growth of every provider are recorded and logged by `report`. Note that
+    modules shared by several providers (e.g. langchain) are accounted to the first one that imports them, and that
+    the memory growth of providers that are loaded concurrently overlaps.
+
+    Args:
+        config (Dict[str, Dict[str, Any]], optional): Config by kind, kinds that are missing use `DEFAULT_CONFIG`.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.config = {**DEFAULT_CONFIG, **(config or {})}
+        self.loads: List[ProviderLoad] = []
+
+    @classmethod
+    def from_file(cls, path: str) -> "ProviderRegistry":
+        """Reads the config from a TOML file. If it does not exist, the defaults are used."""
+        if not os.path.isfile(path):
+            logger.info("Config file %s not found, using the default providers", path)
+            return cls()
+        with open(path, "rb") as f:
+            return cls(tomllib.load(f))
+
+    def provider_config(self, kind: str) -> Dict[str, Any]:
+        if kind not in self.config:
+            raise ValueError(f"No provider configured for '{kind}'.")
+        return self.config[kind]
+
+    def resolve(self, kind: str, name: Optional[str] = None) -> type:
+        """Imports and returns the class of the provider `name` (defaults to the configured one) of a kind."""
+        provider_cls, _ = self._import(kind, name)
+        return provider_cls
+
+    def _import(self, kind: str, name: Optional[str]) -> Tuple[type, ProviderLoad]:
+        name = name or self.provider_config(kind)["provider"]
+        if name not in PROVIDERS.get(kind, {}):
+            raise ValueError(f"Unknown {kind} provider '{name}', choose from {', '.join(PROVIDERS.get(kind, {}))}.")
+
+        module_name, class_name = PROVIDERS[kind][name].split(":")
+        rss = current_rss()
+        start = time.perf_counter()
+        provider_cls = getattr(importlib.import_module(module_name), class_name)
+        load = ProviderLoad(kind, name, import_s=time.perf_counter() - start, rss_bytes=current_rss() - rss)
+        self.loads.append(load)
+        return provider_cls, load
+
+    def create(self, kind: str, name: Optional[str] = None, **options: Any) -> Any:
+        """
+        Imports and creates the provider `name` (defaults to the configured one) of a kind. The options of the
+        config file are passed to its constructor, `options` take precedence.
+        """
+        config = self.provider_config(kind)
+        if name is None or name == config["provider"]:
+            options = {**config.get("options", {}), **options}
+        provider_cls, load = self._import(kind, name)
+
+        if load.name in COMPOSITE_PROVIDERS:
+            # The providers a composite is composed of are given by name or as a table with `provider` and `options`
+            option = COMPOSITE_PROVIDERS[load.name]
+            options[option] = [
+                (
+                    self.create(kind, provider)
+                    if isinstance(provider, str)
+                    else self.create(kind, provider["provider"], **provider.get("options", {}))
+                )
+                for provider in options.get(option, [])
+            ]
+
+        rss = current_rss()
+        start = time.perf_counter()
+        provider = provider_cls(**options)
+        load.init_s = time.perf_counter() - start
+        load.rss_bytes += current_rss() - rss
+        return provider
+
+    def report(self) -> str:
+        lines = [f"{'provider':<40} {'import':>9} {'init':>9} {'memory':>10}"]
+        for load in self.loads:
+            lines.append(
+                f"{load.kind + ': ' + load.name:<40} {load.import_s * 1000:>7.0f}ms {load.init_s * 1000:>7.0f}ms "
+                f"{load.rss_bytes / 2**20:>8.1f}MB"
+            )
+        lines.append(f"Total resident memory: {current_rss() / 2**20:.1f}MB")
+        return "\n".join(lines)
@@ -1,9 +1,8 @@
 import logging
-from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple, Type, Union
 
 from langchain.agents import AgentExecutor
 from langchain.agents.agent import AgentOutputParser
-from langchain.schema import AIMessage, HumanMessage
 from langchain_core.agents import AgentAction
 from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
@@ -13,6 +12,8 @@ from langchain_core.tools import BaseTool
 
 from . import BaseResponseGenerationPipeline
 from .agent import BaseAgentProvider
+from .ConversationHistory import ConversationHistory
+from .PipelineEvent import PipelineEvent, PipelineEventType
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +27,9 @@ class AgentPipelineManager:
         convert_tool: Callable[[Union[Dict[str, Any], Type[BaseModel], Callable, BaseTool]], Dict[str, Any]],
         format_function_messages: Callable[[Sequence[Tuple[AgentAction, str]]], List[BaseMessage]],
         output_parser: AgentOutputParser,
+        chat_history: Optional[ConversationHistory] = None,
     ):
-        self.chat_history = []
+        self.chat_history = chat_history or ConversationHistory(llm.llm)
         llm_with_tools = llm.llm.bind(tools=[convert_tool(t) for t in tools])
 
         callback_manager = None
@@ -41,8 +43,37 @@ class AgentPipelineManager:
         self.agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, callback_manager=callback_manager)
 
     async def run(self, user_query: str):
-        result = self.agent_executor.invoke({"input": user_query, "chat_history": self.chat_history})
-        response = result["output"]
-        yield response
+        async for event in self.run_events(user_query):
+            if event.type == PipelineEventType.TOKEN:
+                yield event.data
 
-        self.chat_history += [HumanMessage(content=user_query), AIMessage(content=response)]
+    async def run_events(self, user_query: str) -> AsyncIterator[PipelineEvent]:
+        """
+        Runs the agent with the async executor API and streams the final answer token by token.
+
+        Tool calls of the agent are reported as `TOOL_START`/`TOOL_END` events. Text tokens are streamed as they
+        arrive from the LLM, also after intermediate tool calls. Chunks of tool call messages carry no text
+        content and are therefore skipped.
+        """
+        response = ""
+        async for event in self.agent_executor.astream_events(
+            {"input": user_query, "chat_history": self.chat_history.messages}, version="v1"
+        ):
+            kind = event["event"]
+
+            if kind == "on_chat_model_stream":
+                token = event["data"]["chunk"].content
+                if not token:
+                    continue
+                if not response:
+                    yield PipelineEvent(PipelineEventType.FIRST_TOKEN)
+                response += token
+                yield PipelineEvent(PipelineEventType.TOKEN, token)
+            elif kind == "on_tool_start":
+                yield PipelineEvent(PipelineEventType.TOOL_START, {"name": event["name"], **event["data"]})
+            elif kind == "on_tool_end":
+                yield PipelineEvent(PipelineEventType.TOOL_END, {"name": event["name"], **event["data"]})
+
+        yield PipelineEvent(PipelineEventType.END, response)
+
+        self.chat_history.add_turn(user_query, response)
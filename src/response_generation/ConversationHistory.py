@@ -0,0 +1,126 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, List, Optional, Tuple
+
+from langchain_core.language_models import BaseLanguageModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.output_parsers import StrOutputParser
+
+from .prompts import summary_prompt
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationHistory:
+    """
+    Chat history with a token budget.
+
+    The most recent turns are kept verbatim. As soon as the history exceeds `max_tokens`, the oldest turns are
+    removed from it and folded into a running summary, which is prepended to the history as a system message.
+    The summary is computed by the LLM in a background thread, so that it never delays a response. Until it is
+    done, the removed turns are simply missing from the history. Once it is done, the budget is checked again, as the
+    summary may have grown, and further turns are folded into it if needed.
+
+    Args:
+        llm (BaseLanguageModel, optional): Used to count tokens and to summarize. Without it, tokens are estimated
+            and old turns are dropped without a summary.
+        max_tokens (int): Token budget of the history, including the summary.
+        summary_max_words (int): Length limit of the summary that is requested from the LLM.
+    """
+
+    SUMMARY_PREFIX: str = "Summary of the earlier conversation: "
+
+    def __init__(self, llm: Optional[BaseLanguageModel] = None, max_tokens: int = 2000, summary_max_words: int = 150):
+        self.llm = llm
+        self.max_tokens = max_tokens
+        self.summary_max_words = summary_max_words
+
+        self.turns: Deque[Tuple[List[BaseMessage], int]] = deque()
+        self.turn_tokens = 0
+        self.summary: Optional[SystemMessage] = None
+        self.summary_tokens = 0
+
+        self.lock = threading.Lock()
+        self.summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-summary")
+        self.summary_chain = summary_prompt | llm | StrOutputParser() if llm is not None else None
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        with self.lock:
+            messages = [self.summary] if self.summary else []
+            for turn, _ in self.turns:
+                messages += turn
+            return messages
+
+    @property
+    def token_count(self) -> int:
+        with self.lock:
+            return self.turn_tokens + self.summary_tokens
+
+    def add_turn(self, user_query: str, response: str) -> None:
+        turn = [HumanMessage(content=user_query), AIMessage(content=response)]
+
+        with self.lock:
+            self.turns.append((turn, self.count_tokens(turn)))
+            self.turn_tokens += self.turns[-1][1]
+            evicted = self._evict()
+        self._fold_into_summary(evicted)
+
+    def _evict(self) -> List[BaseMessage]:
+        """Removes the oldest turns until the history fits the budget, must be called with the lock held."""
+        evicted = []
+        # The latest turn is always kept, even if it exceeds the budget on its own
+        while self.turn_tokens + self.summary_tokens > self.max_tokens and len(self.turns) > 1:
+            evicted_turn, tokens = self.turns.popleft()
+            self.turn_tokens -= tokens
+            evicted += evicted_turn
+        return evicted
+
+    def _fold_into_summary(self, evicted: List[BaseMessage]) -> None:
+        if evicted:
+            logger.debug("Evicted %s messages from the chat history", len(evicted))
+            if self.summary_chain is not None:
+                self.summary_executor.submit(self._summarize, evicted)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.turns.clear()
+            self.turn_tokens = 0
+            self.summary = None
+            self.summary_tokens = 0
+
+    def count_tokens(self, messages: List[BaseMessage]) -> int:
+        if self.llm is not None:
+            try:
+                return self.llm.get_num_tokens_from_messages(messages)
+            except Exception:
+                # E.g. no tokenizer available for the model
+                pass
+        return sum(len(message.content) for message in messages) // 4 + 4 * len(messages)
+
+    def _summarize(self, messages: List[BaseMessage]) -> None:
+        try:
+            summary = self.summary_chain.invoke(
+                {
+                    "summary": self.summary.content[len(self.SUMMARY_PREFIX) :] if self.summary else "",
+                    "messages": messages,
+                    "max_words": self.summary_max_words,
+                }
+            )
+        except Exception:
+            logger.exception("Summarizing the chat history failed")
+            return
+
+        summary_message = SystemMessage(content=self.SUMMARY_PREFIX + summary.strip())
+        summary_tokens = self.count_tokens([summary_message])
+        with self.lock:
+            self.summary = summary_message
+            self.summary_tokens = summary_tokens
+            evicted = self._evict()
+        logger.debug("Chat history summary updated (%s tokens)", summary_tokens)
+        self._fold_into_summary(evicted)
+
+    def close(self) -> None:
+        self.summary_executor.shutdown(wait=False, cancel_futures=True)
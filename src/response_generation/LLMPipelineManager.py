@@ -1,13 +1,16 @@
 import logging
+from typing import AsyncIterator, Optional
 
 from dotenv import load_dotenv
 from langchain.callbacks.manager import CallbackManager
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
-from langchain.schema import AIMessage, HumanMessage
 from langchain_core.language_models import LLM
 from langchain_core.output_parsers import BaseLLMOutputParser, StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 
+from .ConversationHistory import ConversationHistory
+from .PipelineEvent import PipelineEvent, PipelineEventType
+
 load_dotenv(".env")
 logger = logging.getLogger(__name__)
 
@@ -18,8 +21,9 @@ class LLMPipelineManager:
         chat_prompt: ChatPromptTemplate,
         llm: LLM,
         output_parser: BaseLLMOutputParser = StrOutputParser(),
+        chat_history: Optional[ConversationHistory] = None,
     ):
-        self.chat_history = []
+        self.chat_history = chat_history or ConversationHistory(llm)
         self.llm = llm
 
         callback_manager = CallbackManager([StreamingStdOutCallbackHandler()])
@@ -30,9 +34,20 @@ class LLMPipelineManager:
         self.agent = self.chat_prompt | self.llm | self.output_parser
 
     async def run(self, user_query: str):
+        async for event in self.run_events(user_query):
+            if event.type == PipelineEventType.TOKEN:
+                yield event.data
+
+    async def run_events(self, user_query: str) -> AsyncIterator[PipelineEvent]:
         ai_message = ""
-        async for chunk in self.agent_executor.astream({"input": user_query, "chat_history": self.chat_history}):
-            yield chunk
+        async for chunk in self.agent.astream({"input": user_query, "chat_history": self.chat_history.messages}):
+            if not chunk:
+                continue
+            if not ai_message:
+                yield PipelineEvent(PipelineEventType.FIRST_TOKEN)
             ai_message += chunk
+            yield PipelineEvent(PipelineEventType.TOKEN, chunk)
+
+        yield PipelineEvent(PipelineEventType.END, ai_message)
 
-        self.chat_history += [HumanMessage(content=user_query), AIMessage(content=ai_message)]
+        self.chat_history.add_turn(user_query, ai_message)
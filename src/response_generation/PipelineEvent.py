@@ -0,0 +1,28 @@
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any
+
+
+class PipelineEventType(Enum):
+    FIRST_TOKEN = "First token of the response received"
+    TOKEN = "Response token"
+    TOOL_START = "Tool call started"
+    TOOL_END = "Tool call finished"
+    END = "Response finished"
+    CACHE_HIT = "Response served from the response cache"
+
+
+@dataclass
+class PipelineEvent:
+    """
+    Structured event emitted while a response is generated.
+
+    `TOKEN` events carry the text chunk, `TOOL_START`/`TOOL_END` events the tool name and its input/output,
+    and the `END` event the complete response. `FIRST_TOKEN` marks the arrival of the first text token. `CACHE_HIT`
+    precedes a response that is served from the `ResponseCache` instead of the LLM.
+    """
+
+    type: PipelineEventType
+    data: Any = None
+    timestamp: float = field(default_factory=time.time)
@@ -0,0 +1,199 @@
+import difflib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Pattern, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+FILLER_WORDS = {"bitte", "mal", "doch", "denn", "eigentlich", "äh", "ähm", "hey", "hallo", "okay", "ok"}
+
+# Queries whose answer depends on the exact point in time
+TIME_SENSITIVE_PATTERNS = [
+    r"\b(uhr|uhrzeit|spät|datum|wochentag|welcher tag|welchen tag)\b",
+    r"\b(timer|wecker|erinner\w*|countdown)\b",
+    r"\b(nachrichten|news|aktuell\w*|neueste\w*|live|spielstand|ergebnis\w*|börse|kurs|aktie\w*)\b",
+]
+# Queries that refer to the previous conversation
+HISTORY_DEPENDENT_PATTERNS = [
+    r"^(und|aber|also|oder)\b",
+    r"\b(nochmal|noch einmal|wiederhol\w*|vorhin|eben|davor|dazu|davon|darüber|dafür|stattdessen)\b",
+    r"\b(warum|wieso|weshalb)\b",
+    # Pronouns and references to a person, place or thing named before, e.g. "Wie alt ist er?"
+    r"\b(er|sie|es|ihn|ihm|ihr\w*|sein\w*|dessen|deren|dort\w*|da|dahin|daher|dies\w*|jene\w*|dasselbe)\b",
+]
+# A time to live of 0 never caches a class. Device commands must always reach the agent, as a cached confirmation
+# would skip the action.
+QUERY_CLASSES = [
+    ("device_command", r"\b(licht|lampe|heizung|rollladen|rollläden|musik|lautstärke)\b", 0),
+    ("weather", r"\b(wetter|temperatur|grad|regen|regnet|schnee|schneit|sonnig|wind|gewitter)\b", 15 * 60),
+]
+
+# Words that change the meaning of a query however similar the rest is. Queries only match fuzzily if they agree on
+# these words, the numbers in them and the places they name.
+NEGATION_WORDS = {"nicht", "kein", "keine", "keinen", "keinem", "keiner", "nie", "niemals", "ohne"}
+SWITCH_WORDS = set(
+    "an aus ein ab auf zu hoch runter herunter rauf lauter leiser heller dunkler wärmer kälter mehr weniger start "
+    "stopp stop pause weiter".split()
+)
+NUMBER_WORDS = set(
+    "null eins zwei drei vier fünf sechs sieben acht neun zehn elf zwölf zwanzig dreißig vierzig fünfzig hundert "
+    "tausend halb viertel".split()
+)
+# The word after one of these prepositions is taken as a place, e.g. "wetter in bern"
+PLACE_PREPOSITIONS = {"in", "im", "für", "nach", "bei", "von", "am"}
+
+
+@dataclass
+class CachedResponse:
+    query: str
+    query_class: str
+    response: str
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    Cache of LLM responses for repeated queries.
+
+    Queries are normalized (lower case, without punctuation and filler words) and looked up exactly first, then
+    fuzzily among the cached queries of the same class. Every query class has its own time to live, e.g. the weather
+    changes within minutes, while the answer to a general question stays valid for an hour.
+
+    A fuzzy match is rejected if the queries differ in a word that changes their meaning: a number, a negation, an
+    on/off or direction word, or a place (e.g. "Licht an" and "Licht aus", "21 Grad" and "22 Grad", "Wetter in Bern"
+    and "Wetter in Berlin").
+
+    Time-sensitive queries (time, news, timers, ...), device commands and queries that refer to the previous
+    conversation are never served from or written to the cache. Responses which involved a tool that is not known to
+    be read-only are not cached either, since a cache hit would skip the tool call and its side effects.
+
+    Args:
+        query_classes (Iterable[Tuple[str, str, float]]): Name, regex and time to live in seconds of every class.
+            The first matching class is used.
+        default_ttl_s (float): Time to live of queries that do not match any class.
+        bypass_patterns (Iterable[str], optional): Regexes of queries that bypass the cache.
+        similarity_threshold (float): Minimum similarity ratio (0 to 1) of a fuzzy match.
+        max_entries (int): Maximum number of cached responses.
+        read_only_tools (Iterable[str]): Names of the tools without side effects, whose calls may be skipped.
+    """
+
+    def __init__(
+        self,
+        query_classes: Iterable[Tuple[str, str, float]] = QUERY_CLASSES,
+        default_ttl_s: float = 60 * 60,
+        bypass_patterns: Optional[Iterable[str]] = None,
+        similarity_threshold: float = 0.9,
+        max_entries: int = 512,
+        read_only_tools: Iterable[str] = ("web_search",),
+    ):
+        self.query_classes: List[Tuple[str, Pattern, float]] = [
+            (name, re.compile(pattern), ttl_s) for name, pattern, ttl_s in query_classes
+        ]
+        self.default_ttl_s = default_ttl_s
+        if bypass_patterns is None:
+            bypass_patterns = TIME_SENSITIVE_PATTERNS + HISTORY_DEPENDENT_PATTERNS
+        self.bypass_patterns = [re.compile(pattern) for pattern in bypass_patterns]
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.read_only_tools = set(read_only_tools)
+
+        self.entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = {"exact": 0, "fuzzy": 0}
+        self.misses = 0
+        self.bypasses = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        words = re.sub(r"[^\w\s]", " ", query.lower()).split()
+        return " ".join(word for word in words if word not in FILLER_WORDS)
+
+    def classify(self, normalized_query: str) -> Optional[Tuple[str, float]]:
+        """Returns the class and time to live of a normalized query, or `None` if it bypasses the cache."""
+        if not normalized_query or any(pattern.search(normalized_query) for pattern in self.bypass_patterns):
+            return None
+        for name, pattern, ttl_s in self.query_classes:
+            if pattern.search(normalized_query):
+                return name, ttl_s
+        return "default", self.default_ttl_s
+
+    def get(self, query: str) -> Optional[str]:
+        normalized_query = self.normalize(query)
+        query_class = self.classify(normalized_query)
+        if query_class is None or query_class[1] <= 0:
+            self.bypasses += 1
+            return None
+
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(normalized_query)
+            if entry is not None and entry.expires_at > now:
+                self.entries.move_to_end(normalized_query)
+                self.hits["exact"] += 1
+                return entry.response
+
+            entry = self._fuzzy_match(normalized_query, query_class[0], now)
+            if entry is not None:
+                self.entries.move_to_end(entry.query)
+                self.hits["fuzzy"] += 1
+                logger.debug("Fuzzy cache hit of '%s' for '%s'", entry.query, normalized_query)
+                return entry.response
+
+        self.misses += 1
+        return None
+
+    def _fuzzy_match(self, normalized_query: str, query_class: str, now: float) -> Optional[CachedResponse]:
+        candidates = [
+            query
+            for query, entry in self.entries.items()
+            if entry.query_class == query_class and entry.expires_at > now
+        ]
+        key_words = self.key_words(normalized_query)
+        candidates = [query for query in candidates if self.key_words(query) == key_words]
+        matches = difflib.get_close_matches(normalized_query, candidates, n=1, cutoff=self.similarity_threshold)
+        return self.entries[matches[0]] if matches else None
+
+    @staticmethod
+    def key_words(normalized_query: str) -> Set[str]:
+        """Words of a normalized query that a fuzzy match must agree on: numbers, negations, switches and places."""
+        words = normalized_query.split()
+        key_words = {
+            word
+            for word in words
+            if word.isdigit() or word in NUMBER_WORDS or word in NEGATION_WORDS or word in SWITCH_WORDS
+        }
+        key_words.update(place for preposition, place in zip(words, words[1:]) if preposition in PLACE_PREPOSITIONS)
+        return key_words
+
+    def put(self, query: str, response: str, tools: Iterable[str] = ()) -> None:
+        normalized_query = self.normalize(query)
+        query_class = self.classify(normalized_query)
+        if not response or query_class is None or query_class[1] <= 0 or not self.read_only_tools.issuperset(tools):
+            return
+
+        name, ttl_s = query_class
+        with self.lock:
+            self.entries[normalized_query] = CachedResponse(normalized_query, name, response, time.time() + ttl_s)
+            self.entries.move_to_end(normalized_query)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def metrics(self) -> Dict[str, float]:
+        hits = sum(self.hits.values())
+        lookups = hits + self.misses
+        return {
+            "hits_exact": self.hits["exact"],
+            "hits_fuzzy": self.hits["fuzzy"],
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
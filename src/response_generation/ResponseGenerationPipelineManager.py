@@ -1,27 +1,70 @@
-from typing import List, Optional, Union
+from typing import AsyncIterator, List, Optional, Union
 
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.tools import BaseTool
 
 from . import AgentPipelineManager, LLMPipelineManager
 from .agent import BaseAgentProvider
+from .ConversationHistory import ConversationHistory
 from .llm import BaseLLMProvider
+from .PipelineEvent import PipelineEvent, PipelineEventType
+from .ResponseCache import ResponseCache
 
 
 class ResponseGenerationPipelineManager:
     def __init__(
-        self, prompt: ChatPromptTemplate, llm: Union[BaseLLMProvider, BaseAgentProvider], tools: List[BaseTool]
+        self,
+        prompt: ChatPromptTemplate,
+        llm: Union[BaseLLMProvider, BaseAgentProvider],
+        tools: List[BaseTool],
+        max_history_tokens: int = 2000,
+        response_cache: Optional[ResponseCache] = None,
     ):
+        self.response_cache = response_cache
+
         if isinstance(llm, BaseAgentProvider):
             assert tools is not None
+            self.chat_history = ConversationHistory(llm.llm, max_tokens=max_history_tokens)
             self.pipeline = AgentPipelineManager(
-                llm, prompt, tools, llm.convert_tool, llm.format_function_messages, llm.output_parser
+                llm,
+                prompt,
+                tools,
+                llm.convert_tool,
+                llm.format_function_messages,
+                llm.output_parser,
+                chat_history=self.chat_history,
             )
         elif isinstance(llm, BaseLLMProvider):
-            self.pipeline = LLMPipelineManager(llm, prompt)
+            self.chat_history = ConversationHistory(llm, max_tokens=max_history_tokens)
+            self.pipeline = LLMPipelineManager(prompt, llm, chat_history=self.chat_history)
         else:
             raise ValueError("llm must be of type BaseLLMProvider or BaseAgentProvider")
 
     async def generate_response(self, user_query: str):
-        async for chunk in self.pipeline.run(user_query):
-            yield chunk
+        async for event in self.generate_events(user_query):
+            if event.type == PipelineEventType.TOKEN:
+                yield event.data
+
+    async def generate_events(self, user_query: str) -> AsyncIterator[PipelineEvent]:
+        if self.response_cache is None:
+            async for event in self.pipeline.run_events(user_query):
+                yield event
+            return
+
+        response = self.response_cache.get(user_query)
+        if response is not None:
+            # The turn is still added to the history, so that follow-up questions can refer to it
+            self.chat_history.add_turn(user_query, response)
+            yield PipelineEvent(PipelineEventType.CACHE_HIT)
+            yield PipelineEvent(PipelineEventType.FIRST_TOKEN)
+            yield PipelineEvent(PipelineEventType.TOKEN, response)
+            yield PipelineEvent(PipelineEventType.END, response)
+            return
+
+        tools = []
+        async for event in self.pipeline.run_events(user_query):
+            if event.type == PipelineEventType.TOOL_START:
+                tools.append(event.data["name"])
+            elif event.type == PipelineEventType.END:
+                self.response_cache.put(user_query, event.data, tools)
+            yield event
@@ -1,5 +1,8 @@
 from .AgentPipelineManager import AgentPipelineManager
 from .BaseResponseGenerationPipeline import BaseResponseGenerationPipeline
+from .ConversationHistory import ConversationHistory
 from .LLMPipelineManager import LLMPipelineManager
+from .PipelineEvent import PipelineEvent, PipelineEventType
 from .prompts import agent_prompt, chat_prompt
+from .ResponseCache import ResponseCache
 from .ResponseGenerationPipelineManager import ResponseGenerationPipelineManager
@@ -1,2 +1,15 @@
+from typing import TYPE_CHECKING
+
+from lazy_imports import lazy_attributes
+
 from .BaseAgentProvider import BaseAgentProvider
-from .OpenAIAgent import OpenAIAgent
+
+if TYPE_CHECKING:
+    from .OpenAIAgent import OpenAIAgent
+
+__getattr__ = lazy_attributes(
+    __name__,
+    {
+        "OpenAIAgent": ".OpenAIAgent",
+    },
+)
@@ -12,5 +12,5 @@ class OpenAI(BaseLLMProvider):
     def __init__(self) -> None:
         pass
 
-    def llm(self, model_name: str) -> BaseChatModel:
-        return ChatOpenAI(model=model_name, temperature=0)
+    def llm(self, model_name: str, streaming: bool = True) -> BaseChatModel:
+        return ChatOpenAI(model=model_name, temperature=0, streaming=streaming)
@@ -1,4 +1,19 @@
+from typing import TYPE_CHECKING
+
+from lazy_imports import lazy_attributes
+
 from .BaseLLMProvider import BaseLLMProvider
-from .Huggingface import Huggingface
-from .Ollama import Ollama
-from .OpenAI import OpenAI
+
+if TYPE_CHECKING:
+    from .Huggingface import Huggingface
+    from .Ollama import Ollama
+    from .OpenAI import OpenAI
+
+__getattr__ = lazy_attributes(
+    __name__,
+    {
+        "Huggingface": ".Huggingface",
+        "Ollama": ".Ollama",
+        "OpenAI": ".OpenAI",
+    },
+)
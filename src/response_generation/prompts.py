@@ -18,6 +18,13 @@ You have the capability to manage the operation of in-home IOT devices. You furt
 The User input is transcribed from audio. The user receives your text responses in audio format. Make sure to respond with plain text. Always keep your responses as short as possible. Avoid explanations unless absolutely necessary or explicitly demanded by the user. Only answer in complete sentences if suitable. Strictly ensure to output speakable text. Always give your answer in the language of the user query. Only output the answer to the question or a short confirmation if a command was given. If a user command is unfeasible, unclear, or illogical, explain it to the user.
 """
 
+SUMMARY_PROMPT_STR = """
+Progressively summarize the conversation between the user and the home assistant below. Extend the current summary by the new messages and return the new summary only. Keep facts, names, preferences and open requests of the user that may be referred to later on. The summary MUST NOT be longer than {max_words} words.
+
+Current summary:
+{summary}
+"""
+
 
 # ADDITIONAL_INFORMATION_TEMPLATE_STR = """
 # Additional information:
@@ -87,3 +94,6 @@ chat_prompt = ChatPromptTemplate.from_messages([system_message, additional_info_
 agent_prompt = ChatPromptTemplate.from_messages(
     [system_message, additional_info_message, chat_history, human_message, agent_scratchpad]
 )
+summary_prompt = ChatPromptTemplate.from_messages(
+    [SystemMessagePromptTemplate.from_template(SUMMARY_PROMPT_STR), MessagesPlaceholder("messages")]
+)
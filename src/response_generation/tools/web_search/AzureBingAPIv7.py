@@ -1,26 +1,20 @@
 import logging
 import os
 import threading
-from typing import Any, Callable, Optional, Type
+from typing import Any, Dict, List, Type
 
-import requests
+import aiohttp
 from dotenv import load_dotenv
 from langchain_core.tools import BaseModel, BaseTool, Field
 
+from .http_client import get_async_session, get_session
+from .search_cache import search_cache
 from .web_search_callback import web_search_callback
 
 load_dotenv(".env")
 
 logger = logging.getLogger(__name__)
 
-AZURE_BING_SEARCH_KEY = os.environ.get("AZURE_BING_SEARCH_KEY")
-if not AZURE_BING_SEARCH_KEY:
-    raise Exception("AZURE_BING_SEARCH_KEY not set in .env file. See .env.template for reference.")
-
-AZURE_BING_SEARCH_ENDPOINT = os.environ.get("AZURE_BING_SEARCH_ENDPOINT")
-if not AZURE_BING_SEARCH_ENDPOINT:
-    raise Exception("AZURE_BING_SEARCH_ENDPOINT not set in .env file. See .env.template for reference.")
-
 
 class AzureBingAPIv7Input(BaseModel):
     """ """
@@ -32,23 +26,53 @@ class AzureBingAPIv7(BaseTool):
     args_schema: Type[BaseModel] = AzureBingAPIv7Input
     name: str = "web_search"
     description: str = "Search the web for a text query."
+    endpoint_url: str
+    subscription_key: str = Field(repr=False)
+    timeout_s: float = 10.0
+
+    def __init__(self, **kwargs: Any):
+        kwargs.setdefault("subscription_key", os.environ.get("AZURE_BING_SEARCH_KEY"))
+        if not kwargs["subscription_key"]:
+            raise Exception("AZURE_BING_SEARCH_KEY not set in .env file. See .env.template for reference.")
+        kwargs.setdefault("endpoint_url", os.environ.get("AZURE_BING_SEARCH_ENDPOINT"))
+        if not kwargs["endpoint_url"]:
+            raise Exception("AZURE_BING_SEARCH_ENDPOINT not set in .env file. See .env.template for reference.")
+        super().__init__(**kwargs)
 
     def _run(self, query: str, **kwargs: Any) -> Any:
-        logger.info(f"Searching for '{query}'")
+        return search_cache.search(type(self).__name__, query, lambda: self._search(query))
 
-        callback_thread = threading.Thread(target=web_search_callback)
-        callback_thread.start()
+    async def _arun(self, query: str, **kwargs: Any) -> Any:
+        return await search_cache.asearch(type(self).__name__, query, lambda: self._asearch(query))
 
-        headers = {"Ocp-Apim-Subscription-Key": AZURE_BING_SEARCH_KEY}
-        endpoint = AZURE_BING_SEARCH_ENDPOINT + "/v7.0/search"
-
-        params = {"q": query}
-        response = requests.get(endpoint, headers=headers, params=params)
+    def _search(self, query: str) -> List[Dict[str, Any]]:
+        threading.Thread(target=web_search_callback).start()
+        response = get_session().get(self.endpoint, headers=self.headers, params={"q": query}, timeout=self.timeout_s)
         response.raise_for_status()
-
-        search_results = response.json()["webPages"]["value"]
-        filtered_search_results = [
+        return self._filter_search_results(response.json())
+
+    async def _asearch(self, query: str) -> List[Dict[str, Any]]:
+        threading.Thread(target=web_search_callback).start()
+        async with get_async_session().get(
+            self.endpoint,
+            headers=self.headers,
+            params={"q": query},
+            timeout=aiohttp.ClientTimeout(total=self.timeout_s),
+        ) as response:
+            return self._filter_search_results(await response.json())
+
+    @property
+    def endpoint(self) -> str:
+        return self.endpoint_url + "/v7.0/search"
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Ocp-Apim-Subscription-Key": self.subscription_key}
+
+    @staticmethod
+    def _filter_search_results(response_json: Dict[str, Any]) -> List[Dict[str, Any]]:
+        search_results = response_json["webPages"]["value"]
+        return [
             {"rank": int(result["id"][-1]) + 1, "url": result["url"], "snippet": result["snippet"]}
             for result in search_results
         ]
-        return filtered_search_results
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
+
+from langchain_core.pydantic_v1 import PrivateAttr
+from langchain_core.tools import BaseModel, BaseTool, Field
+
+from latency_stats import LatencyStats, adaptive_hedge_delay, latency_report, provider_names, rank_by_latency
+
+from .http_client import run_sync
+
+logger = logging.getLogger(__name__)
+
+
+class HedgedWebSearchInput(BaseModel):
+    """ """
+
+    query: str = Field(description="Text query that is being searched for. The query MUST be in German.")
+
+
+class HedgedWebSearch(BaseTool):
+    """
+    Composite web search that hedges a query across several search tools.
+
+    The query is sent to the primary provider first. If it has not answered within the hedge delay (or failed), the
+    query is sent to all other providers as well. The first non-empty result wins and the remaining searches are
+    cancelled. If no provider answers before the deadline, a `TimeoutError` is raised.
+
+    The latency of every provider is tracked, for cancelled searches as the time until they were cancelled if they
+    started no later than the winning search. If adaptive, the provider with the lowest 90th percentile latency becomes
+    the primary, and the hedge delay follows the 95th percentile latency of the primary. The statistics are kept per
+    provider, under the name of its class, numbered if several providers are of the same class (e.g. "TavilyAPI#1" and
+    "TavilyAPI#2").
+    """
+
+    args_schema: Type[BaseModel] = HedgedWebSearchInput
+    name: str = "web_search"
+    description: str = "Search the web for a text query."
+
+    providers: List[BaseTool]
+    hedge_delay_s: float = 1.0
+    min_hedge_delay_s: float = 0.2
+    deadline_s: float = 8.0
+    adaptive: bool = True
+    min_samples: int = 5
+
+    latency_stats: Dict[str, LatencyStats] = Field(default_factory=dict)
+    errors: Dict[str, int] = Field(default_factory=dict)
+    # Synchronous searches run on the shared loop of `run_sync`, asynchronous ones possibly on several loops at once
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def named_providers(self) -> Dict[str, BaseTool]:
+        return dict(zip(provider_names(self.providers), self.providers))
+
+    def _run(self, query: str, **kwargs: Any) -> Any:
+        return run_sync(self._arun(query))
+
+    async def _arun(self, query: str, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline_s
+
+        named_providers = self.named_providers
+        primary, *secondaries = self.ranked_names()
+        hedge_time = loop.time() + self.hedge_delay(primary)
+
+        started: Dict[asyncio.Task, Tuple[str, float]] = {}
+        winner: Optional[asyncio.Task] = None
+
+        def start(name: str) -> asyncio.Task:
+            task = asyncio.create_task(self._search(name, named_providers[name], query))
+            started[task] = (name, time.monotonic())
+            return task
+
+        pending = {start(primary)}
+        try:
+            while pending or secondaries:
+                now = loop.time()
+                if now >= deadline:
+                    raise TimeoutError(f"No web search result within {self.deadline_s} seconds.")
+
+                if secondaries and (now >= hedge_time or not pending):
+                    logger.info("Hedging web search to %s", ", ".join(secondaries))
+                    pending |= {start(name) for name in secondaries}
+                    secondaries = []
+
+                timeout = (hedge_time if secondaries else deadline) - now
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(timeout, 0), return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    if task.exception() is None and task.result():
+                        winner = task
+                        return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            # The cancelled searches release their connections before the result is returned
+            await asyncio.gather(*pending, return_exceptions=True)
+            self._record_cancelled(pending, started, winner)
+
+        raise RuntimeError("All web search providers failed.")
+
+    async def _search(self, provider_name: str, provider: BaseTool, query: str) -> Any:
+        start = time.monotonic()
+        try:
+            result = await provider.ainvoke({"query": query})
+        except Exception as e:
+            logger.warning("Web search with %s failed: %s", provider_name, e)
+            with self._lock:
+                self.errors[provider_name] = self.errors.get(provider_name, 0) + 1
+            # A failure counts as at least as slow as the hedge delay, so that a provider which fails fast is not
+            # ranked first
+            self._record_latency(provider_name, max(time.monotonic() - start, self.hedge_delay_s))
+            raise
+
+        latency_s = time.monotonic() - start
+        self._record_latency(provider_name, latency_s)
+        logger.info("Web search with %s took %s seconds", provider_name, latency_s)
+        return result
+
+    def _record_cancelled(
+        self, tasks: Set[asyncio.Task], started: Dict[asyncio.Task, Tuple[str, float]], winner: Optional[asyncio.Task]
+    ) -> None:
+        """
+        A provider that lost the race took at least until it was cancelled. Without the sample, a primary that became
+        slow would always be cancelled and never be demoted. Searches that started after the winner are not recorded,
+        as their time until the cancellation is shorter than the latency of the winner.
+        """
+        now = time.monotonic()
+        for task in tasks:
+            provider_name, start = started[task]
+            if task.cancelled() and (winner is None or start <= started[winner][1]):
+                self._record_latency(provider_name, now - start)
+
+    def _record_latency(self, provider_name: str, latency_s: float) -> None:
+        with self._lock:
+            stats = self.latency_stats.setdefault(provider_name, LatencyStats())
+        stats.add(latency_s)
+
+    def ranked_names(self) -> List[str]:
+        names = provider_names(self.providers)
+        if not self.adaptive:
+            return names
+        return rank_by_latency(names, self.latency_stats, self.min_samples)
+
+    def ranked_providers(self) -> List[BaseTool]:
+        named_providers = self.named_providers
+        return [named_providers[name] for name in self.ranked_names()]
+
+    def hedge_delay(self, primary: str) -> float:
+        if not self.adaptive:
+            return self.hedge_delay_s
+        return adaptive_hedge_delay(
+            self.latency_stats, primary, self.hedge_delay_s, self.min_hedge_delay_s, self.min_samples
+        )
+
+    def latency_report(self) -> Dict[str, Dict[str, float]]:
+        return latency_report(self.latency_stats)
@@ -1,20 +1,18 @@
 import logging
 import os
-from typing import Any, Type
+from typing import Any, Dict, List, Type
 
-import requests
+import aiohttp
 from dotenv import load_dotenv
 from langchain_core.tools import BaseModel, BaseTool, Field
-from tavily import TavilyClient
+
+from .http_client import get_async_session, get_session
+from .search_cache import search_cache
 
 load_dotenv(".env")
 
 logger = logging.getLogger(__name__)
 
-TAVILY_API_KEY = os.environ.get("TAVILY_API_KEY")
-if not TAVILY_API_KEY:
-    raise Exception("TAVILY_API_KEY not set in .env file. See .env.template for reference.")
-
 
 class TavilyAPIInput(BaseModel):
     """ """
@@ -26,11 +24,40 @@ class TavilyAPI(BaseTool):
     args_schema: Type[BaseModel] = TavilyAPIInput
     name: str = "web_search"
     description: str = "Search the web for a text query."
+    endpoint_url: str = "https://api.tavily.com"
+    api_key: str = Field(repr=False)
+    timeout_s: float = 10.0
 
-    tavily = TavilyClient(api_key=TAVILY_API_KEY)
+    def __init__(self, **kwargs: Any):
+        kwargs.setdefault("api_key", os.environ.get("TAVILY_API_KEY"))
+        if not kwargs["api_key"]:
+            raise Exception("TAVILY_API_KEY not set in .env file. See .env.template for reference.")
+        super().__init__(**kwargs)
 
     def _run(self, query: str, **kwargs: Any) -> Any:
-        logger.info(f"Searching for '{query}'")
+        return search_cache.search(type(self).__name__, query, lambda: self._search(query))
+
+    async def _arun(self, query: str, **kwargs: Any) -> Any:
+        return await search_cache.asearch(type(self).__name__, query, lambda: self._asearch(query))
+
+    def _search(self, query: str) -> List[Dict[str, Any]]:
+        response = get_session().post(self.endpoint, json=self._request_body(query), timeout=self.timeout_s)
+        response.raise_for_status()
+        return self._filter_search_results(response.json())
+
+    async def _asearch(self, query: str) -> List[Dict[str, Any]]:
+        async with get_async_session().post(
+            self.endpoint, json=self._request_body(query), timeout=aiohttp.ClientTimeout(total=self.timeout_s)
+        ) as response:
+            return self._filter_search_results(await response.json())
+
+    @property
+    def endpoint(self) -> str:
+        return self.endpoint_url + "/search"
+
+    def _request_body(self, query: str) -> Dict[str, Any]:
+        return {"api_key": self.api_key, "query": query, "search_depth": "advanced"}
 
-        response = self.tavily.search(query=query, search_depth="advanced")
-        return [{"url": obj["url"], "content": obj["content"]} for obj in response["results"]]
+    @staticmethod
+    def _filter_search_results(response_json: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [{"url": result["url"], "content": result["content"]} for result in response_json["results"]]
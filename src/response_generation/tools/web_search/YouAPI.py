@@ -1,21 +1,18 @@
-import json
 import logging
 import os
-from typing import Any, Type
+from typing import Any, Dict, List, Type
 
-import requests
+import aiohttp
 from dotenv import load_dotenv
-from langchain_community.utilities.you import YouSearchAPIWrapper
 from langchain_core.tools import BaseModel, BaseTool, Field
 
+from .http_client import get_async_session, get_session
+from .search_cache import search_cache
+
 load_dotenv(".env")
 
 logger = logging.getLogger(__name__)
 
-YOU_API_KEY = os.environ.get("YOU_API_KEY")
-if not YOU_API_KEY:
-    raise Exception("YOU_API_KEY not set in .env file. See .env.template for reference.")
-
 
 class YouAPIInput(BaseModel):
     """ """
@@ -27,14 +24,49 @@ class YouAPI(BaseTool):
     args_schema: Type[BaseModel] = YouAPIInput
     name: str = "web_search"
     description: str = "Search the web for a text query."
+    endpoint_url: str = "https://api.ydc-index.io"
+    api_key: str = Field(repr=False)
+    num_web_results: int = 1
+    timeout_s: float = 10.0
 
-    you = YouSearchAPIWrapper(ydc_api_key=YOU_API_KEY, num_web_results=1)
+    def __init__(self, **kwargs: Any):
+        kwargs.setdefault("api_key", os.environ.get("YOU_API_KEY"))
+        if not kwargs["api_key"]:
+            raise Exception("YOU_API_KEY not set in .env file. See .env.template for reference.")
+        super().__init__(**kwargs)
 
     def _run(self, query: str, **kwargs: Any) -> Any:
-        logger.info(f"Searching for '{query}'")
+        return search_cache.search(type(self).__name__, query, lambda: self._search(query))
+
+    async def _arun(self, query: str, **kwargs: Any) -> Any:
+        return await search_cache.asearch(type(self).__name__, query, lambda: self._asearch(query))
+
+    def _search(self, query: str) -> List[Dict[str, Any]]:
+        response = get_session().get(
+            self.endpoint, headers=self.headers, params=self._params(query), timeout=self.timeout_s
+        )
+        response.raise_for_status()
+        return response.json()["hits"]
+
+    async def _asearch(self, query: str) -> List[Dict[str, Any]]:
+        async with get_async_session().get(
+            self.endpoint,
+            headers=self.headers,
+            params=self._params(query),
+            timeout=aiohttp.ClientTimeout(total=self.timeout_s),
+        ) as response:
+            return (await response.json())["hits"]
+
+    @property
+    def endpoint(self) -> str:
+        return self.endpoint_url + "/search"
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"X-API-Key": self.api_key}
 
-        response = self.you.raw_results(query)
-        return response["hits"]
+    def _params(self, query: str) -> Dict[str, Any]:
+        return {"query": query, "num_web_results": self.num_web_results}
 
 
 if __name__ == "__main__":
@@ -1,3 +1,19 @@
-from .AzureBingAPIv7 import AzureBingAPIv7
-from .TavilyAPI import TavilyAPI
-from .YouAPI import YouAPI
+from typing import TYPE_CHECKING
+
+from lazy_imports import lazy_attributes
+
+from .HedgedWebSearch import HedgedWebSearch
+
+if TYPE_CHECKING:
+    from .AzureBingAPIv7 import AzureBingAPIv7
+    from .TavilyAPI import TavilyAPI
+    from .YouAPI import YouAPI
+
+__getattr__ = lazy_attributes(
+    __name__,
+    {
+        "AzureBingAPIv7": ".AzureBingAPIv7",
+        "TavilyAPI": ".TavilyAPI",
+        "YouAPI": ".YouAPI",
+    },
+)
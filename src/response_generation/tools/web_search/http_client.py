@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Coroutine, Dict, Optional
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = 16
+KEEPALIVE_TIMEOUT_S = 60
+DNS_CACHE_TTL_S = 300
+CLOSE_TIMEOUT_S = 5
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+# One session per event loop, as an aiohttp session is bound to the loop it was created in
+_async_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+# Event loop that runs the async searches of synchronous callers, so that its session is kept between the calls
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+
+
+def get_session() -> requests.Session:
+    """Returns the keep-alive HTTP session shared by all web search tools."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def get_async_session() -> aiohttp.ClientSession:
+    """
+    Returns the keep-alive async HTTP session of the running event loop shared by all web search tools.
+
+    The session must be closed with `close_async_session` before its event loop is closed, or with `close_sessions`
+    on shutdown.
+    """
+    loop = asyncio.get_running_loop()
+    with _session_lock:
+        session = _async_sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=POOL_SIZE, keepalive_timeout=KEEPALIVE_TIMEOUT_S, ttl_dns_cache=DNS_CACHE_TTL_S
+            )
+            session = aiohttp.ClientSession(connector=connector, raise_for_status=True)
+            _async_sessions[loop] = session
+        return session
+
+
+async def close_async_session() -> None:
+    """Closes the async HTTP session of the running event loop."""
+    with _session_lock:
+        session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+def run_sync(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Runs a coroutine on the event loop shared by all synchronous callers and returns its result.
+
+    The loop runs on a background thread until `close_sessions` is called. Its async session is reused across the
+    calls, which saves the connection setup of a new loop and session per call.
+    """
+    global _loop, _loop_thread
+    with _session_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="http-client", daemon=True)
+            _loop_thread.start()
+        loop = _loop
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+
+def close_sessions() -> None:
+    """Closes all HTTP sessions and the loop of `run_sync`, must not be called from a running event loop."""
+    global _session, _loop, _loop_thread
+    with _session_lock:
+        session, _session = _session, None
+        async_sessions = list(_async_sessions.items())
+        _async_sessions.clear()
+        sync_loop, _loop = _loop, None
+        loop_thread, _loop_thread = _loop_thread, None
+
+    if session is not None:
+        session.close()
+    for loop, async_session in async_sessions:
+        if loop.is_closed():
+            logger.warning("Event loop of an HTTP session was closed before the session")
+        elif loop.is_running():
+            asyncio.run_coroutine_threadsafe(async_session.close(), loop).result(CLOSE_TIMEOUT_S)
+        else:
+            loop.run_until_complete(async_session.close())
+
+    if sync_loop is not None:
+        sync_loop.call_soon_threadsafe(sync_loop.stop)
+        loop_thread.join(CLOSE_TIMEOUT_S)
+        if not sync_loop.is_running():
+            sync_loop.close()
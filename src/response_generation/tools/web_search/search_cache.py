@@ -0,0 +1,75 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query.strip().strip("?!.").lower())
+
+
+class SearchResultCache:
+    """
+    Caches web search results for a limited time, keyed on the provider and the normalized query.
+
+    Args:
+        ttl_s (float): Time in seconds after which a result expires.
+        max_entries (int): Maximum number of cached results. The oldest results are evicted first.
+    """
+
+    def __init__(self, ttl_s: float = 300.0, max_entries: int = 256):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.entries: OrderedDict[Tuple[str, str], Tuple[float, Any]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, provider: str, query: str) -> Optional[Any]:
+        key = (provider, normalize_query(query))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            return result
+
+    def put(self, provider: str, query: str, result: Any) -> None:
+        key = (provider, normalize_query(query))
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (time.monotonic() + self.ttl_s, result)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def search(self, provider: str, query: str, search: Callable[[], Any]) -> Any:
+        """Returns the cached results of a query, or searches with `search` and caches its results."""
+        logger.info("Searching for '%s' with %s", query, provider)
+        results = self.get(provider, query)
+        if results is not None:
+            logger.info("Serving cached search results")
+            return results
+
+        results = search()
+        self.put(provider, query, results)
+        return results
+
+    async def asearch(self, provider: str, query: str, search: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of `search`."""
+        logger.info("Searching for '%s' with %s", query, provider)
+        results = self.get(provider, query)
+        if results is not None:
+            logger.info("Serving cached search results")
+            return results
+
+        results = await search()
+        self.put(provider, query, results)
+        return results
+
+
+search_cache = SearchResultCache()
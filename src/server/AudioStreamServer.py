@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+from audio_detection.VoiceActivityDetector import IVoiceActivityDetector, WebRTCVAD
+
+from .AudioStreamSession import AudioStreamSession
+from .ProcessShardPool import ProcessShardPool
+from .protocol import MessageType, encode_json_message
+
+if TYPE_CHECKING:
+    from audio_detection.AudioKeywordDetector import IAudioKeywordDetector
+    from audio_generation import IAudioGenerator
+    from audio_transcription.AudioTranscriber import IAudioTranscriber
+    from response_generation import ResponseGenerationPipelineManager
+
+logger = logging.getLogger(__name__)
+
+
+class AudioStreamServer:
+    """
+    Serves many microphones (e.g. one per room) from a single host.
+
+    Every connection is an `AudioStreamSession` with its own keyword detector, VAD, endpointing and response
+    pipeline, while the transcriber, the audio generator and the processing threads are shared. The audio of all
+    sessions is processed on a fixed pool of threads, which share a single core due to the GIL. With
+    `process_shards`, the sessions are sharded across a `ProcessShardPool` of worker processes instead, so that the
+    capacity scales with the number of cores.
+
+    New connections are admitted as long as the number of sessions and the load stay below their limits. The load
+    is the sum of the real-time factors of all sessions, i.e. the number of cores that are busy with the audio
+    processing on average. Rejected connections receive a `REJECTED` message with the reason. `stats` reports the load, so that
+    the limits can be tuned to the number of rooms a host actually handles.
+
+    Args:
+        transcriber (IAudioTranscriber): Transcriber shared by all sessions.
+        audio_generator (IAudioGenerator): Text-to-speech provider shared by all sessions.
+        pipeline_factory (Callable[[], ResponseGenerationPipelineManager]): Creates the pipeline (and thereby the chat
+            history) of a session.
+        detector_factory (Callable[[], IAudioKeywordDetector]): Creates the keyword detector of a session.
+        vad_factory (Callable[[], IVoiceActivityDetector]): Creates the VAD of a session.
+        host (str): Address to listen on.
+        port (int): Port to listen on.
+        max_sessions (int): Maximum number of concurrent sessions.
+        max_load (float, optional): Maximum load at which new sessions are admitted. Defaults to 80% of the cores the
+            audio is processed on.
+        max_concurrent_requests (int): Maximum number of requests that are answered concurrently over all sessions.
+        max_queued_chunks (int): Number of received audio chunks a session buffers before the stream is throttled.
+        processing_workers (int, optional): Number of audio processing threads. Defaults to the number of CPUs.
+        process_shards (int): Number of worker processes the keyword detection, VAD and endpointing of the sessions
+            are sharded across. 0 processes all sessions in threads of this process. The detector and VAD factories
+            must be picklable then.
+        stats_interval_s (float): Interval in which the stats are logged. 0 disables the logging.
+    """
+
+    def __init__(
+        self,
+        transcriber: "IAudioTranscriber",
+        audio_generator: "IAudioGenerator",
+        pipeline_factory: Callable[[], "ResponseGenerationPipelineManager"],
+        detector_factory: Callable[[], "IAudioKeywordDetector"],
+        vad_factory: Callable[[], IVoiceActivityDetector] = WebRTCVAD,
+        host: str = "0.0.0.0",
+        port: int = 8765,
+        max_sessions: int = 8,
+        max_load: Optional[float] = None,
+        max_concurrent_requests: int = 4,
+        max_queued_chunks: int = 32,
+        processing_workers: Optional[int] = None,
+        process_shards: int = 0,
+        stats_interval_s: float = 60.0,
+    ):
+        cpu_count = os.cpu_count() or 1
+        self.transcriber = transcriber
+        self.audio_generator = audio_generator
+        self.pipeline_factory = pipeline_factory
+        self.detector_factory = detector_factory
+        self.vad_factory = vad_factory
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.max_load = max_load if max_load is not None else 0.8 * max(process_shards, 1)
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_queued_chunks = max_queued_chunks
+        self.stats_interval_s = stats_interval_s
+
+        self.processing_executor = ThreadPoolExecutor(
+            max_workers=processing_workers or cpu_count, thread_name_prefix="audio-processing"
+        )
+        self.shard_pool = ProcessShardPool(process_shards) if process_shards > 0 else None
+        self.request_semaphore: Optional[asyncio.Semaphore] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+
+        self.sessions: Dict[int, AudioStreamSession] = {}
+        self.session_count = 0  # Number of sessions ever admitted, also used as session ID
+        self.rejected_count = 0
+
+    @property
+    def load(self) -> float:
+        return sum(session.real_time_factor for session in self.sessions.values())
+
+    async def start(self) -> None:
+        self.request_semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        addresses = ", ".join(str(socket.getsockname()) for socket in self.server.sockets)
+        logger.info("Audio stream server listening on %s", addresses)
+
+    async def serve(self) -> None:
+        """Starts the server and serves until it is cancelled."""
+        await self.start()
+        stats_logger = asyncio.create_task(self._log_stats()) if self.stats_interval_s > 0 else None
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            if stats_logger is not None:
+                stats_logger.cancel()
+            self.close()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername")
+        reason = self._admission_check()
+        if reason is not None:
+            self.rejected_count += 1
+            logger.warning("Rejected connection of %s: %s", peer, reason)
+            writer.write(encode_json_message(MessageType.REJECTED, {"reason": reason}))
+            await self._close_writer(writer)
+            return
+
+        self.session_count += 1
+        session = AudioStreamSession(self, self.session_count, reader, writer)
+        self.sessions[session.session_id] = session
+        logger.info("Admitted %s of %s (%s sessions, load %.2f)", session.name, peer, len(self.sessions), self.load)
+        start = time.perf_counter()
+        try:
+            await session.run()
+        except (ConnectionError, ValueError) as e:
+            logger.warning("Connection of %s failed: %s", session.name, e)
+        finally:
+            del self.sessions[session.session_id]
+            session.close()
+            await self._close_writer(writer)
+            logger.info("Closed %s after %.0f seconds", session.name, time.perf_counter() - start)
+
+    def _admission_check(self) -> Optional[str]:
+        """Returns the reason why a new session cannot be admitted, or `None` if it can."""
+        if len(self.sessions) >= self.max_sessions:
+            return f"Maximum of {self.max_sessions} sessions reached."
+        if self.load >= self.max_load:
+            return f"Server load of {self.load:.2f} exceeds the maximum of {self.max_load:.2f}."
+        return None
+
+    @staticmethod
+    async def _close_writer(writer: asyncio.StreamWriter) -> None:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def _log_stats(self) -> None:
+        while True:
+            await asyncio.sleep(self.stats_interval_s)
+            logger.info("Server stats: %s", self.stats())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self.sessions),
+            "admitted": self.session_count,
+            "rejected": self.rejected_count,
+            "load": self.load,
+            "max_load": self.max_load,
+            "shards": self.shard_pool.stats() if self.shard_pool is not None else None,
+            "per_session": {
+                session.name: {
+                    "real_time_factor": session.real_time_factor,
+                    "keyword_skipped_fraction": session.keyword_skipped_fraction,
+                    "speculations": session.speculation_stats,
+                    "audio_duration_s": session.audio_duration_s,
+                    "queued_chunks": session.audio_queue.qsize(),
+                    "throttled": session.throttled_count,
+                    "requests": session.tracer.trace_count,
+                }
+                for session in self.sessions.values()
+            },
+        }
+
+    def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+        self.processing_executor.shutdown(wait=False, cancel_futures=True)
+        if self.shard_pool is not None:
+            self.shard_pool.close()
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Dict, Optional, Union
+
+import numpy as np
+import speech_recognition as sr
+
+from audio_detection.AudioStreamProcessor import AudioStreamProcessor
+from audio_generation import SentenceSegmenter
+from audio_generation.pcm import strip_wav_header
+from audio_transcription.AudioTranscriber import IStreamingAudioTranscriber
+from state_manager import State, StateManager
+from tracing import Tracer
+
+from .protocol import MessageType, encode_json_message, encode_message, read_message
+
+if TYPE_CHECKING:
+    from .AudioStreamServer import AudioStreamServer
+    from .ShardedAudioStream import ShardedAudioStream
+
+logger = logging.getLogger(__name__)
+
+
+class AudioStreamSession:
+    """
+    A connected microphone (e.g. of one room) with its own keyword detection, VAD, endpointing and chat history.
+
+    Received audio is queued and processed frame by frame on the processing executor of the server. The queue is
+    bounded: if the processing falls behind, the connection is not read any further, so that the client is slowed
+    down by TCP flow control instead of the server buffering without limit. Recorded requests are answered with
+    events and the synthesized response on the same connection.
+
+    If the server has a `ProcessShardPool`, the audio is processed in one of its worker processes instead, and the
+    queue is drained into the shared ring buffer of the stream.
+
+    The real-time factor (processing time per second of audio) of the session is measured continuously. The sum over
+    all sessions is the load the server uses for its admission control.
+    """
+
+    RTF_SMOOTHING: float = 0.05
+    RESPONSE_CHUNK_BYTES: int = 32 * 1024
+
+    def __init__(
+        self,
+        server: "AudioStreamServer",
+        session_id: int,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ):
+        self.server = server
+        self.session_id = session_id
+        self.reader = reader
+        self.writer = writer
+        self.room: Optional[str] = None
+        self.loop = asyncio.get_running_loop()
+
+        self.audio_queue: asyncio.Queue[Optional[np.ndarray]] = asyncio.Queue(maxsize=server.max_queued_chunks)
+        self.remainder = np.zeros(0, dtype=np.int16)
+        self.processing_real_time_factor = 0.0  # Of the processing in this process
+        self.audio_duration_s = 0.0
+        self.throttled_count = 0
+
+        self.tracer = Tracer()
+        self.state_manager = StateManager(tracer=self.tracer)
+        transcriber = server.transcriber
+        self.processor: Optional[AudioStreamProcessor] = None
+        self.shard_stream: Optional["ShardedAudioStream"] = None
+        if server.shard_pool is not None:
+            # Streaming transcribers need every frame, so they transcribe speculatively like all others
+            self.shard_stream = server.shard_pool.open_stream(
+                server.detector_factory,
+                server.vad_factory,
+                self.recorded_audio_callback,
+                self.state_manager,
+                speculative_transcriber=transcriber,
+            )
+        else:
+            is_streaming_transcriber = isinstance(transcriber, IStreamingAudioTranscriber)
+            self.processor = AudioStreamProcessor(
+                server.detector_factory(),
+                server.vad_factory(),
+                self.recorded_audio_callback,
+                self.state_manager,
+                streaming_transcriber=transcriber if is_streaming_transcriber else None,
+                speculative_transcriber=None if is_streaming_transcriber else transcriber,
+            )
+        self.pipeline = server.pipeline_factory()
+        self.request_lock = asyncio.Lock()
+        self.write_lock = asyncio.Lock()
+
+    @property
+    def real_time_factor(self) -> float:
+        if self.shard_stream is not None:
+            return self.shard_stream.real_time_factor
+        return self.processing_real_time_factor
+
+    @property
+    def keyword_skipped_fraction(self) -> Optional[float]:
+        """Fraction of the frames the keyword detector skipped, as they could not contain speech."""
+        if self.shard_stream is not None:
+            return self.shard_stream.keyword_skipped_fraction
+        if self.processor.keyword_gate is None:
+            return None
+        return self.processor.keyword_gate.skipped_fraction
+
+    @property
+    def speculation_stats(self) -> Dict[str, int]:
+        """Counts of the speculative transcriptions, see `SpeculationLimiter`."""
+        if self.shard_stream is not None:
+            return self.shard_stream.speculation_limiter.stats()
+        return self.processor.speculation_limiter.stats()
+
+    @property
+    def name(self) -> str:
+        return f"session {self.session_id}" + (f" ({self.room})" if self.room else "")
+
+    async def run(self) -> None:
+        processing = asyncio.create_task(self._process_audio())
+        try:
+            await self._receive_audio()
+        finally:
+            await self.audio_queue.put(None)
+            await processing
+
+    async def _receive_audio(self) -> None:
+        while (message := await read_message(self.reader)) is not None:
+            message_type, payload = message
+            if message_type == MessageType.AUDIO:
+                if self.audio_queue.full():
+                    self.throttled_count += 1
+                    logger.debug("Processing of %s falls behind, throttling the stream", self.name)
+                await self.audio_queue.put(np.frombuffer(payload, dtype=np.int16))
+            elif message_type == MessageType.HELLO:
+                self.room = json.loads(payload).get("room")
+                logger.info("Audio stream of %s started", self.name)
+            elif message_type == MessageType.END:
+                break
+
+    async def _process_audio(self) -> None:
+        while (chunk := await self.audio_queue.get()) is not None:
+            await self.loop.run_in_executor(self.server.processing_executor, self.process_chunk, chunk)
+
+    def process_chunk(self, chunk: np.ndarray) -> None:
+        if self.shard_stream is not None:
+            self.audio_duration_s += len(chunk) / AudioStreamProcessor.SAMPLE_RATE
+            self.shard_stream.write(chunk)
+            return
+
+        start = time.perf_counter()
+
+        samples = np.concatenate([self.remainder, chunk]) if len(self.remainder) else chunk
+        frame_size = AudioStreamProcessor.KEYWORDS_FRAME_SIZE
+        frame_count = len(samples) // frame_size
+        for i in range(frame_count):
+            self.processor.process_frame(samples[i * frame_size : (i + 1) * frame_size])
+        self.remainder = samples[frame_count * frame_size :].copy()
+
+        chunk_duration_s = len(chunk) / AudioStreamProcessor.SAMPLE_RATE
+        if chunk_duration_s > 0:
+            self.audio_duration_s += chunk_duration_s
+            real_time_factor = (time.perf_counter() - start) / chunk_duration_s
+            self.processing_real_time_factor += self.RTF_SMOOTHING * (
+                real_time_factor - self.processing_real_time_factor
+            )
+
+    def recorded_audio_callback(self, audio: sr.AudioData, transcription: Optional[Union[str, Future]] = None) -> None:
+        # Called on the processing executor, the request is answered on the event loop
+        future = asyncio.run_coroutine_threadsafe(self.respond(audio, transcription), self.loop)
+        future.add_done_callback(self._log_request_exception)
+
+    def _log_request_exception(self, future: Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Request of %s failed", self.name, exc_info=future.exception())
+
+    async def respond(self, audio: sr.AudioData, transcription: Optional[Union[str, Future]]) -> None:
+        # Requests of a session are answered one after another
+        async with self.request_lock, self.server.request_semaphore:
+            self.state_manager.set_state(State.TRANSCRIPTION_IN_PROGRESS, logger)
+            if isinstance(transcription, Future):
+                transcription = await asyncio.wrap_future(transcription)
+            elif transcription is None:
+                transcription = await self.loop.run_in_executor(None, self.server.transcriber.transcribe, audio)
+
+            if not transcription:
+                self.state_manager.set_state(State.TRANSCRIPTION_NOTHING_DETECTED, logger)
+                await self.send_event({"type": "nothing_detected"})
+                return
+            self.state_manager.set_state(State.TRANSCRIPTION_SUCCESS, logger)
+            await self.send_event({"type": "transcription", "text": transcription})
+
+            self.state_manager.set_state(State.RESPONSE_GENERATION_IN_PROGRESS, logger)
+            response = await self.speak(self.pipeline.generate_response(transcription))
+            await self.send_event({"type": "response_end", "text": response})
+            self.state_manager.set_state(State.REQUEST_FINISHED, logger)
+
+    async def speak(self, text_stream) -> str:
+        """Synthesizes the response sentence by sentence and sends the audio in order, while the LLM still streams."""
+        audio_generator = self.server.audio_generator
+        segmenter = SentenceSegmenter()
+        segments: asyncio.Queue = asyncio.Queue()
+        sender = asyncio.create_task(self._send_segments(segments))
+
+        response = ""
+        try:
+            async for chunk in text_stream:
+                response += chunk
+                for segment in segmenter.push(chunk):
+                    segments.put_nowait(self.loop.run_in_executor(None, audio_generator.generate_audio, segment))
+
+            segment = segmenter.flush()
+            if segment:
+                segments.put_nowait(self.loop.run_in_executor(None, audio_generator.generate_audio, segment))
+        finally:
+            segments.put_nowait(None)
+            await sender
+        return response
+
+    async def _send_segments(self, segments: asyncio.Queue) -> None:
+        started = False
+        while (synthesis := await segments.get()) is not None:
+            try:
+                audio_data = await synthesis
+            except Exception:
+                logger.exception("Audio generation of a response segment of %s failed", self.name)
+                continue
+
+            if not started:
+                started = True
+                self.state_manager.set_state(State.PLAYING_RESPONSE, logger)
+                await self.send_event(
+                    {"type": "response_start", "sample_rate": self.server.audio_generator.get_sample_rate()}
+                )
+
+            audio_data = strip_wav_header(audio_data)
+            for i in range(0, len(audio_data), self.RESPONSE_CHUNK_BYTES):
+                chunk = bytes(audio_data[i : i + self.RESPONSE_CHUNK_BYTES])
+                await self.send(encode_message(MessageType.RESPONSE_AUDIO, chunk))
+
+    async def send_event(self, event: dict) -> None:
+        await self.send(encode_json_message(MessageType.EVENT, event))
+
+    async def send(self, message: bytes) -> None:
+        async with self.write_lock:
+            self.writer.write(message)
+            # Waits while the send buffer is full, i.e. the client does not keep up with the response audio
+            await self.writer.drain()
+
+    def close(self) -> None:
+        if self.shard_stream is not None:
+            self.shard_stream.close()
+        else:
+            self.processor.reset()
+            if self.processor.speculative_transcriber is not None:
+                self.processor.speculation_executor.shutdown(wait=False, cancel_futures=True)
+        self.pipeline.chat_history.close()
@@ -0,0 +1,143 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from state_manager import StateManager
+
+from .shard_worker import run_shard
+from .ShardedAudioStream import ShardedAudioStream
+
+if TYPE_CHECKING:
+    from audio_transcription.AudioTranscriber import IAudioTranscriber
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessShardPool:
+    """
+    Runs the keyword detection, VAD and endpointing of many streams in a pool of worker processes, one per core.
+
+    Within a single process, the per-frame Python overhead and the GIL limit the processing of all streams to one
+    core. The pool shards the streams across its workers instead: every stream is assigned to the worker with the
+    fewest streams, which creates its own keyword detector and VAD. The audio is passed through a ring buffer in shared
+    memory per stream, so that only small commands and events pass the process boundary (see `ShardedAudioStream`).
+
+    The detector and VAD factories are passed to the workers, so they must be picklable (e.g. classes).
+
+    Args:
+        shards (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        ring_buffer_duration_s (float): Amount of audio the ring buffer of every stream holds in seconds.
+        speculation_workers (int): Number of threads for speculative transcriptions of all streams.
+    """
+
+    def __init__(
+        self, shards: Optional[int] = None, ring_buffer_duration_s: float = 45.0, speculation_workers: int = 4
+    ):
+        self.shards = shards or multiprocessing.cpu_count()
+        self.ring_buffer_duration_s = ring_buffer_duration_s
+        self.speculation_executor = ThreadPoolExecutor(
+            max_workers=speculation_workers, thread_name_prefix="speculative-transcription"
+        )
+
+        # Spawned instead of forked, since the parent runs threads (e.g. an event loop and executors)
+        context = multiprocessing.get_context("spawn")
+        self.command_queues: List[multiprocessing.Queue] = []
+        self.event_queues: List[multiprocessing.Queue] = []
+        self.processes: List[multiprocessing.Process] = []
+        self.event_threads: List[threading.Thread] = []
+        for shard in range(self.shards):
+            commands, events = context.Queue(), context.Queue()
+            process = context.Process(
+                target=run_shard, args=(shard, commands, events), name=f"audio-shard-{shard}", daemon=True
+            )
+            process.start()
+            event_thread = threading.Thread(
+                target=self._dispatch_events, args=(events,), name=f"audio-shard-events-{shard}", daemon=True
+            )
+            event_thread.start()
+            self.command_queues.append(commands)
+            self.event_queues.append(events)
+            self.processes.append(process)
+            self.event_threads.append(event_thread)
+
+        self.streams: Dict[int, ShardedAudioStream] = {}
+        self.stream_count = 0
+        self.lock = threading.Lock()
+
+    def open_stream(
+        self,
+        detector_factory: Callable,
+        vad_factory: Callable,
+        recorded_audio_callback: Callable[..., None],
+        state_manager: StateManager,
+        speculative_transcriber: Optional["IAudioTranscriber"] = None,
+    ) -> ShardedAudioStream:
+        with self.lock:
+            self.stream_count += 1
+            shard_streams = [0] * self.shards
+            for stream in self.streams.values():
+                shard_streams[stream.shard] += 1
+            shard = shard_streams.index(min(shard_streams))
+
+            stream = ShardedAudioStream(
+                self,
+                self.stream_count,
+                shard,
+                recorded_audio_callback,
+                state_manager,
+                speculative_transcriber=speculative_transcriber,
+                speculation_executor=self.speculation_executor,
+                ring_buffer_duration_s=self.ring_buffer_duration_s,
+            )
+            self.streams[stream.stream_id] = stream
+
+        stream.open(detector_factory, vad_factory)
+        logger.debug("Stream %s assigned to shard %s", stream.stream_id, shard)
+        return stream
+
+    def remove_stream(self, stream: ShardedAudioStream) -> None:
+        with self.lock:
+            self.streams.pop(stream.stream_id, None)
+
+    def send(self, shard: int, command: tuple) -> None:
+        self.command_queues[shard].put(command)
+
+    def _dispatch_events(self, events: multiprocessing.Queue) -> None:
+        while (event := events.get()) is not None:
+            event_type, stream_id, *args = event
+            stream = self.streams.get(stream_id)
+            if stream is None:
+                continue
+            try:
+                stream.handle_event(event_type, *args)
+            except Exception:
+                logger.exception("Handling the event %s of stream %s failed", event_type, stream_id)
+
+    def stats(self) -> List[Dict[str, float]]:
+        with self.lock:
+            streams = list(self.streams.values())
+        return [
+            {
+                "streams": sum(1 for stream in streams if stream.shard == shard),
+                "load": sum(stream.real_time_factor for stream in streams if stream.shard == shard),
+            }
+            for shard in range(self.shards)
+        ]
+
+    def close(self) -> None:
+        for stream in list(self.streams.values()):
+            stream.close()
+        for commands in self.command_queues:
+            commands.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+        for events in self.event_queues:
+            events.put(None)
+        for event_thread in self.event_threads:
+            event_thread.join()
+        # Releases the shared memory of the streams whose close was not confirmed
+        for stream in list(self.streams.values()):
+            stream.release()
+        self.speculation_executor.shutdown(wait=False, cancel_futures=True)
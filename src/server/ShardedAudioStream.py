@@ -0,0 +1,198 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Callable, Optional
+
+import numpy as np
+import speech_recognition as sr
+
+from audio_detection.AudioRingBuffer import AudioRingBuffer
+from audio_detection.AudioStreamProcessor import AudioStreamProcessor
+from audio_detection.RecordingBuffer import RecordingBuffer
+from audio_detection.SpeculationLimiter import SpeculationLimiter
+from audio_transcription.SpeechAudioData import SpeechAudioData
+from state_manager import StateManager
+
+from .shard_worker import ShardCommand, ShardEvent
+
+if TYPE_CHECKING:
+    from audio_transcription.AudioTranscriber import IAudioTranscriber
+
+    from .ProcessShardPool import ProcessShardPool
+
+logger = logging.getLogger(__name__)
+
+
+class ShardedAudioStream:
+    """
+    Parent side of a stream whose keyword detection, VAD and endpointing run in a worker process of a
+    `ProcessShardPool`.
+
+    The audio is written into a ring buffer in shared memory, only the stream position up to which it was written
+    is sent to the worker. The worker sends back the states of the stream and the positions of the recorded speech,
+    which is then read from the ring buffer. Writing blocks while the worker lags behind by more than the ring buffer
+    can hold next to a recording, which throttles the stream.
+
+    Args:
+        pool (ProcessShardPool): Pool of the worker process.
+        stream_id (int): ID of the stream within the pool.
+        shard (int): Index of the worker process.
+        recorded_audio_callback (Callable[..., None]): Invoked with the recorded speech after the user stopped speaking.
+        state_manager (StateManager): State manager the detection states are reported to.
+        speculative_transcriber (IAudioTranscriber, optional): If given, the speech is already transcribed after a
+            short silence, see `AudioStreamProcessor`.
+        speculation_executor (ThreadPoolExecutor, optional): Executor of the speculative transcriptions.
+        ring_buffer_duration_s (float): Amount of audio the ring buffer holds in seconds.
+    """
+
+    SAMPLE_RATE: int = AudioStreamProcessor.SAMPLE_RATE
+    RTF_SMOOTHING: float = 0.05
+
+    def __init__(
+        self,
+        pool: "ProcessShardPool",
+        stream_id: int,
+        shard: int,
+        recorded_audio_callback: Callable[..., None],
+        state_manager: StateManager,
+        speculative_transcriber: Optional["IAudioTranscriber"] = None,
+        speculation_executor: Optional[ThreadPoolExecutor] = None,
+        ring_buffer_duration_s: float = 45.0,
+    ):
+        self.pool = pool
+        self.stream_id = stream_id
+        self.shard = shard
+        self.recorded_audio_callback = recorded_audio_callback
+        self.state_manager = state_manager
+        self.speculative_transcriber = speculative_transcriber
+        self.speculation_executor = speculation_executor
+
+        capacity = int(ring_buffer_duration_s * self.SAMPLE_RATE)
+        # A recording must stay in the ring buffer until it is read, so the worker may only lag behind by the rest
+        self.max_lag = capacity - int(AudioStreamProcessor.MAX_RECORDING_DURATION_S * self.SAMPLE_RATE)
+        if self.max_lag <= AudioStreamProcessor.KEYWORDS_FRAME_SIZE:
+            raise ValueError("The ring buffer must hold more than the maximum recording duration.")
+
+        self.memory = shared_memory.SharedMemory(create=True, size=capacity * RecordingBuffer.SAMPLE_WIDTH)
+        self.ring_buffer = AudioRingBuffer(capacity, np.ndarray(capacity, dtype=np.int16, buffer=self.memory.buf))
+        self.processed_position = 0  # Stream position up to which the worker processed the audio
+        self.progress = threading.Condition()
+        self.closed = False
+
+        self.real_time_factor = 0.0
+        self.keyword_skipped_fraction: Optional[float] = None  # Of the frames the keyword detector skipped
+        self.speculative_transcription: Optional[Future] = None
+        self.speculative_audio: Optional[sr.AudioData] = None
+        self.speculation_limiter = SpeculationLimiter()
+
+    def open(self, detector_factory: Callable, vad_factory: Callable) -> None:
+        self.pool.send(
+            self.shard,
+            (
+                ShardCommand.OPEN,
+                self.stream_id,
+                self.memory.name,
+                self.ring_buffer.capacity,
+                detector_factory,
+                vad_factory,
+                self.speculative_transcriber is not None,
+            ),
+        )
+
+    def write(self, samples: np.ndarray) -> None:
+        """Writes audio of the stream. Blocks while the worker lags behind too far."""
+        with self.progress:
+            self.progress.wait_for(
+                lambda: self.closed
+                or self.ring_buffer.write_position + len(samples) - self.processed_position <= self.max_lag
+            )
+            if self.closed:
+                return
+            # Under the lock, so that the shared memory is not released during the write
+            self.ring_buffer.write(samples)
+            write_position = self.ring_buffer.write_position
+        self.pool.send(self.shard, (ShardCommand.AUDIO, self.stream_id, write_position))
+
+    def handle_event(self, event: ShardEvent, *args) -> None:
+        """Called by the pool with every event of the worker."""
+        if event == ShardEvent.PROGRESS:
+            position, processing_time_s, self.keyword_skipped_fraction = args
+            with self.progress:
+                duration_s = (position - self.processed_position) / self.SAMPLE_RATE
+                self.processed_position = position
+                self.progress.notify_all()
+            if duration_s > 0:
+                real_time_factor = processing_time_s / duration_s
+                self.real_time_factor += self.RTF_SMOOTHING * (real_time_factor - self.real_time_factor)
+        elif event == ShardEvent.STATE:
+            self.state_manager.set_state(args[0], logger)
+        elif event == ShardEvent.SPECULATE:
+            self.discard_speculative_transcription()
+            # Without a speculation, the recording is read and transcribed at the endpoint
+            audio = self.read_audio(*args) if self.speculation_limiter.can_start() else None
+            if audio is None:
+                return
+            self.speculative_audio = audio
+            self.speculative_transcription = self.speculation_executor.submit(
+                self.speculative_transcriber.transcribe, audio
+            )
+            self.speculation_limiter.started(self.speculative_transcription)
+        elif event == ShardEvent.DISCARD:
+            self.discard_speculative_transcription()
+        elif event == ShardEvent.ENDPOINT:
+            start, end, speech_start, is_speculated = args
+            if is_speculated and self.speculative_transcription is not None:
+                audio, transcription = self.speculative_audio, self.speculative_transcription
+                self.speculative_transcription = self.speculative_audio = None
+                self.recorded_audio_callback(audio, transcription=transcription)
+            else:
+                self.discard_speculative_transcription()
+                audio = self.read_audio(start, end, speech_start)
+                if audio is not None:
+                    self.recorded_audio_callback(audio)
+        elif event == ShardEvent.FAILED:
+            logger.error("Processing of stream %s failed in shard %s: %s", self.stream_id, self.shard, args[0])
+            self.release()
+        elif event == ShardEvent.CLOSED:
+            self.release()
+
+    def read_audio(self, start: int, end: int, speech_start: int) -> Optional[sr.AudioData]:
+        """Returns the audio between the stream positions, or None if the shared memory was already released."""
+        with self.progress:
+            if self.ring_buffer is None:
+                return None
+            # Copied under the lock, as the samples are a view into the shared memory
+            frame_data = self.ring_buffer.read(start, end - start).tobytes()
+        return SpeechAudioData(
+            frame_data,
+            sample_rate=self.SAMPLE_RATE,
+            sample_width=RecordingBuffer.SAMPLE_WIDTH,
+            speech_start=speech_start - start,
+        )
+
+    def discard_speculative_transcription(self) -> None:
+        if self.speculative_transcription is not None:
+            self.speculation_limiter.discard(self.speculative_transcription)
+        self.speculative_transcription = None
+        self.speculative_audio = None
+
+    def close(self) -> None:
+        """Closes the stream in the worker. The shared memory is released once the worker confirmed it."""
+        with self.progress:
+            self.closed = True
+            self.progress.notify_all()
+        self.discard_speculative_transcription()
+        self.pool.send(self.shard, (ShardCommand.CLOSE, self.stream_id))
+
+    def release(self) -> None:
+        with self.progress:
+            if self.ring_buffer is None:
+                return
+            self.closed = True
+            self.progress.notify_all()
+            # Views into the memory must be released before it can be closed
+            self.ring_buffer = None
+            self.memory.close()
+            self.memory.unlink()
+        self.pool.remove_stream(self)
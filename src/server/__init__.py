@@ -0,0 +1,5 @@
+from .AudioStreamServer import AudioStreamServer
+from .AudioStreamSession import AudioStreamSession
+from .ProcessShardPool import ProcessShardPool
+from .protocol import MessageType, encode_json_message, encode_message, read_message
+from .ShardedAudioStream import ShardedAudioStream
@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import logging
+import os
+
+from provider_registry import ProviderRegistry
+from server import AudioStreamServer
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Voice assistant server for many microphones.")
+    parser.add_argument("--host", default="0.0.0.0", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--max-sessions", type=int, default=8, help="Maximum number of concurrent sessions")
+    parser.add_argument("--max-load", type=float, help="Maximum load (sum of the real-time factors) for admissions")
+    parser.add_argument("--max-requests", type=int, default=4, help="Maximum number of concurrent requests")
+    parser.add_argument("--max-queued-chunks", type=int, default=32, help="Audio chunks buffered per session")
+    parser.add_argument("--workers", type=int, help="Number of audio processing threads (default: number of CPUs)")
+    parser.add_argument("--process-shards", type=int, default=0, help="Number of audio processing processes")
+    parser.add_argument("--config", default="config.toml", help="TOML config file of the providers")
+    parser.add_argument("--stats-interval", type=float, default=60.0, help="Interval of the stats log in seconds")
+    args = parser.parse_args()
+
+    from audio_generation import CachedAudioGenerator
+    from response_generation import ResponseCache, ResponseGenerationPipelineManager, agent_prompt
+    from response_generation.tools.web_search.http_client import close_async_session, close_sessions
+
+    providers = ProviderRegistry.from_file(args.config)
+    agent = providers.create("agent")
+    tools = [providers.create("web_search")]
+    audio_generator = providers.create("audio_generator")
+    if providers.provider_config("audio_generator").get("cache", True):
+        audio_generator = CachedAudioGenerator(audio_generator)
+
+    server = AudioStreamServer(
+        transcriber=providers.create("transcriber"),
+        audio_generator=audio_generator,
+        # Every session has its own response cache, as answers may depend on the room (e.g. its devices or location)
+        pipeline_factory=lambda: ResponseGenerationPipelineManager(
+            agent_prompt, agent, tools, response_cache=ResponseCache()
+        ),
+        detector_factory=providers.resolve("keyword_detector"),
+        vad_factory=providers.resolve("vad"),
+        host=args.host,
+        port=args.port,
+        max_sessions=args.max_sessions,
+        max_load=args.max_load,
+        max_concurrent_requests=args.max_requests,
+        max_queued_chunks=args.max_queued_chunks,
+        processing_workers=args.workers,
+        process_shards=args.process_shards,
+        stats_interval_s=args.stats_interval,
+    )
+    logger.info("Providers:\n%s", providers.report())
+
+    async def serve() -> None:
+        try:
+            await server.serve()
+        finally:
+            await close_async_session()
+
+    asyncio.run(serve())
+    close_sessions()
+
+
+if __name__ == "__main__":
+    logging_level = os.environ.get("LOGLEVEL", "INFO").upper()
+    logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging_level)
+    main()
@@ -0,0 +1,42 @@
+import asyncio
+import json
+import struct
+from enum import Enum
+from typing import Any, Dict, Optional, Tuple
+
+# Every message is framed by its type (1 byte) and the length of its payload (4 bytes, big endian)
+HEADER = struct.Struct("!BI")
+MAX_PAYLOAD_BYTES = 1024 * 1024
+
+
+class MessageType(Enum):
+    # Client to server
+    HELLO = 1  # JSON, e.g. {"room": "kitchen"}
+    AUDIO = 2  # Microphone audio, 16 bit mono PCM at 16 kHz
+    END = 3  # End of the stream
+
+    # Server to client
+    EVENT = 10  # JSON, e.g. {"type": "transcription", "text": "..."}
+    RESPONSE_AUDIO = 11  # Synthesized response, 16 bit mono PCM at the sample rate of the preceding `response_start`
+    REJECTED = 12  # JSON, {"reason": "..."}, the connection is closed afterwards
+
+
+def encode_message(message_type: MessageType, payload: bytes = b"") -> bytes:
+    return HEADER.pack(message_type.value, len(payload)) + payload
+
+
+def encode_json_message(message_type: MessageType, data: Dict[str, Any]) -> bytes:
+    return encode_message(message_type, json.dumps(data).encode("utf-8"))
+
+
+async def read_message(reader: asyncio.StreamReader) -> Optional[Tuple[MessageType, bytes]]:
+    """Returns the next message of the stream, or `None` if the stream was closed."""
+    try:
+        header = await reader.readexactly(HEADER.size)
+        message_type, length = HEADER.unpack(header)
+        if length > MAX_PAYLOAD_BYTES:
+            raise ValueError(f"Message of {length} bytes exceeds the maximum of {MAX_PAYLOAD_BYTES} bytes.")
+        payload = await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        return None
+    return MessageType(message_type), payload
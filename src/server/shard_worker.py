@@ -0,0 +1,144 @@
+import logging
+import multiprocessing
+import time
+from enum import Enum
+from multiprocessing import shared_memory
+from typing import Dict, Tuple
+
+import numpy as np
+
+from audio_detection.AudioKeywordDetector import IAudioKeywordDetector
+from audio_detection.AudioRingBuffer import AudioRingBuffer
+from audio_detection.AudioStreamProcessor import AudioStreamProcessor
+from audio_detection.VoiceActivityDetector import IVoiceActivityDetector
+from state_manager import State
+
+logger = logging.getLogger(__name__)
+
+
+class ShardCommand(Enum):
+    # Parent to worker, all commands are tuples of the command, the stream ID and its arguments
+    OPEN = 1  # Shared memory name, ring buffer capacity, detector factory, VAD factory, speculate
+    AUDIO = 2  # Stream position up to which the ring buffer was written
+    CLOSE = 3
+
+
+class ShardEvent(Enum):
+    # Worker to parent, all events are tuples of the event, the stream ID and its arguments
+    STATE = 1  # State of the stream, e.g. `KEYWORD_DETECTED`
+    SPECULATE = 2  # Start, end and speech start position of the recording in the ring buffer, after a short silence
+    DISCARD = 3  # The speculated speech continued
+    ENDPOINT = 4  # Start, end and speech start position of the recording, whether it equals the speculated speech
+    PROGRESS = 5  # Stream position up to which the audio was processed, processing time in seconds, skipped fraction
+    CLOSED = 6
+    FAILED = 7  # Error message, the stream is closed
+
+
+class ShardStateReporter:
+    """Stands in for the `StateManager` of a stream in the worker and sends its states to the parent."""
+
+    def __init__(self, stream_id: int, events: multiprocessing.Queue):
+        self.stream_id = stream_id
+        self.events = events
+        self.state = None
+
+    def set_state(self, state: State, logger: logging.Logger, **kwargs):
+        self.state = state
+        self.events.put((ShardEvent.STATE, self.stream_id, state))
+
+
+class ShardAudioStreamProcessor(AudioStreamProcessor):
+    """
+    `AudioStreamProcessor` of a stream in a worker process.
+
+    Instead of copying the recorded speech into `AudioData`, the processor sends its position in the shared ring buffer
+    to the parent, which reads and transcribes it. Speculative transcriptions are started by the parent as well.
+    """
+
+    def __init__(
+        self,
+        stream_id: int,
+        events: multiprocessing.Queue,
+        detector: IAudioKeywordDetector,
+        vad: IVoiceActivityDetector,
+        speculate: bool,
+    ):
+        super().__init__(detector, vad, None, ShardStateReporter(stream_id, events))
+        self.stream_id = stream_id
+        self.events = events
+        self.speculate = speculate
+        self.speculative_end = None  # End of the speculated speech
+
+    def start_speculative_transcription(self, speech_end: int) -> None:
+        if not self.speculate or self.speculative_end is not None:
+            return
+
+        self.speculative_end = speech_end
+        start = self.recording_start
+        self.events.put((ShardEvent.SPECULATE, self.stream_id, start, start + speech_end, start + self.speech_start))
+
+    def discard_speculative_transcription(self) -> None:
+        if self.speculative_end is None:
+            return
+
+        self.speculative_end = None
+        self.events.put((ShardEvent.DISCARD, self.stream_id))
+
+    def finish_recording(self, speech_end: int) -> None:
+        start = self.recording_start
+        speech_start = start + self.speech_start
+        # Committed, not discarded by the reset
+        is_speculated = self.speculative_end == speech_end
+        self.speculative_end = None
+
+        self.reset()
+        self.events.put((ShardEvent.ENDPOINT, self.stream_id, start, start + speech_end, speech_start, is_speculated))
+
+
+def run_shard(shard_id: int, commands: multiprocessing.Queue, events: multiprocessing.Queue) -> None:
+    """
+    Main loop of a worker process. Runs the keyword detection, VAD and endpointing of all streams assigned to the
+    worker, on the audio the parent writes into the shared ring buffer of each stream.
+    """
+    streams: Dict[int, Tuple[shared_memory.SharedMemory, AudioRingBuffer, ShardAudioStreamProcessor]] = {}
+    frame_size = AudioStreamProcessor.KEYWORDS_FRAME_SIZE
+
+    while (command := commands.get()) is not None:
+        command_type, stream_id, *args = command
+        try:
+            if command_type == ShardCommand.AUDIO:
+                if stream_id not in streams:
+                    continue
+                _, ring_buffer, processor = streams[stream_id]
+                start = time.process_time()
+                for position in range(processor.position, args[0] - frame_size + 1, frame_size):
+                    processor.process_frame(ring_buffer.read(position, frame_size))
+                processing_time_s = time.process_time() - start
+                skipped_fraction = processor.keyword_gate.skipped_fraction if processor.keyword_gate else None
+                events.put((ShardEvent.PROGRESS, stream_id, processor.position, processing_time_s, skipped_fraction))
+            elif command_type == ShardCommand.OPEN:
+                name, capacity, detector_factory, vad_factory, speculate = args
+                memory = shared_memory.SharedMemory(name=name)
+                ring_buffer = AudioRingBuffer(capacity, np.ndarray(capacity, dtype=np.int16, buffer=memory.buf))
+                processor = ShardAudioStreamProcessor(stream_id, events, detector_factory(), vad_factory(), speculate)
+                streams[stream_id] = (memory, ring_buffer, processor)
+            elif command_type == ShardCommand.CLOSE:
+                _close_stream(streams.pop(stream_id, None))
+                events.put((ShardEvent.CLOSED, stream_id))
+        except Exception as e:
+            logger.exception("Stream %s failed in shard %s", stream_id, shard_id)
+            _close_stream(streams.pop(stream_id, None))
+            events.put((ShardEvent.FAILED, stream_id, repr(e)))
+
+    for stream in streams.values():
+        _close_stream(stream)
+
+
+def _close_stream(stream) -> None:
+    if stream is None:
+        return
+    memory, ring_buffer, processor = stream
+    processor.reset()
+    # Views into the memory must be released before it can be closed
+    del ring_buffer, processor
+    memory.close()
@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StartupComponent:
+    name: str
+    factory: Callable[..., Any]
+    depends_on: List[str]
+    future: Future = field(default_factory=Future)
+    start: Optional[float] = None  # Offsets in seconds since the start of the startup
+    end: Optional[float] = None
+
+
+class ParallelStartup:
+    """
+    Initializes the components of the app concurrently, in the order of their dependencies.
+
+    Every component is created by its factory on a thread pool as soon as all components it depends on are created,
+    with their results passed as keyword arguments. Most of the startup time is spent on network requests (e.g.
+    authentication, synthesis of the phrase bank) and on loading models, which overlap well on threads. If a
+    component fails, all components depending on it fail with the same exception.
+
+    The start and end of every component are recorded, `report` renders them as a timeline.
+
+    Args:
+        max_workers (int): Maximum number of components that are initialized at the same time.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.components: Dict[str, StartupComponent] = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+        self.lock = threading.RLock()
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+
+    def add(self, name: str, factory: Callable[..., Any], depends_on: Iterable[str] = ()) -> None:
+        if self.start_time is not None:
+            raise RuntimeError("Components must be added before the startup is started.")
+        self.components[name] = StartupComponent(name, factory, list(depends_on))
+
+    def start(self) -> None:
+        for component in self.components.values():
+            missing = [name for name in component.depends_on if name not in self.components]
+            if missing:
+                raise ValueError(f"Component '{component.name}' depends on unknown components {missing}.")
+        self._check_cycles()
+
+        self.start_time = time.perf_counter()
+        with self.lock:
+            for component in self.components.values():
+                if not component.depends_on:
+                    self._submit(component)
+
+    def _check_cycles(self) -> None:
+        visited, visiting = set(), set()
+
+        def visit(name: str) -> None:
+            if name in visiting:
+                raise ValueError(f"Cyclic dependency of component '{name}'.")
+            if name not in visited:
+                visiting.add(name)
+                for dependency in self.components[name].depends_on:
+                    visit(dependency)
+                visiting.remove(name)
+                visited.add(name)
+
+        for name in self.components:
+            visit(name)
+
+    def _submit(self, component: StartupComponent) -> None:
+        component.future.set_running_or_notify_cancel()
+        self.executor.submit(self._run, component)
+
+    def _run(self, component: StartupComponent) -> None:
+        component.start = time.perf_counter() - self.start_time
+        try:
+            dependencies = {name: self.components[name].future.result() for name in component.depends_on}
+            result = component.factory(**dependencies)
+        except Exception as e:
+            component.end = time.perf_counter() - self.start_time
+            logger.error(
+                "Initialization of %s failed after %.2f seconds", component.name, component.end - component.start
+            )
+            component.future.set_exception(e)
+        else:
+            component.end = time.perf_counter() - self.start_time
+            logger.debug("%s initialized in %.2f seconds", component.name, component.end - component.start)
+            component.future.set_result(result)
+        self._schedule_dependents(component)
+
+    def _schedule_dependents(self, finished: StartupComponent) -> None:
+        with self.lock:
+            for component in self.components.values():
+                if finished.name not in component.depends_on or component.future.running() or component.future.done():
+                    continue
+                dependencies = [self.components[name].future for name in component.depends_on]
+                exceptions = [dependency.exception() for dependency in dependencies if dependency.done()]
+                if any(exception is not None for exception in exceptions):
+                    component.future.set_running_or_notify_cancel()
+                    component.future.set_exception(next(exception for exception in exceptions if exception))
+                    self._schedule_dependents(component)
+                elif all(dependency.done() for dependency in dependencies):
+                    self._submit(component)
+            if self.end_time is None and all(component.future.done() for component in self.components.values()):
+                self.end_time = time.perf_counter() - self.start_time
+                self.executor.shutdown(wait=False)
+
+    def result(self, name: str, timeout: Optional[float] = None) -> Any:
+        """Waits until a component is initialized and returns it. Raises the exception if its initialization failed."""
+        return self.components[name].future.result(timeout)
+
+    def wait(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Waits until all components are initialized and returns them by name."""
+        return {name: self.result(name, timeout) for name in self.components}
+
+    def is_done(self) -> bool:
+        return all(component.future.done() for component in self.components.values())
+
+    def report(self, width: int = 40) -> str:
+        components = sorted(
+            (component for component in self.components.values() if component.start is not None),
+            key=lambda component: component.start,
+        )
+        total = max([component.end or 0.0 for component in components] + [1e-6])
+        lines = [f"Startup took {total:.2f} seconds"]
+        for component in components:
+            end = component.end if component.end is not None else total
+            offset, length = int(component.start / total * width), max(int((end - component.start) / total * width), 1)
+            bar = " " * offset + "#" * length
+            status = "failed" if component.future.done() and component.future.exception() else ""
+            lines.append(
+                f"  {component.name:<24} {bar:<{width + 1}} {component.start:6.2f}s - {end:6.2f}s {status}".rstrip()
+            )
+        return "\n".join(lines)
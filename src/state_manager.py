@@ -1,5 +1,8 @@
 from enum import Enum
 from logging import Logger
+from typing import Optional
+
+from tracing import Trace, Tracer
 
 
 class State(Enum):
@@ -36,9 +39,35 @@ class State(Enum):
     TERMINATED = "Terminated application"
 
 
+# Stages of a request that are marked in its trace when the state is entered
+TRACE_STAGES = {
+    State.KEYWORD_DETECTED: "wake",
+    State.VOICE_DETECTED: "voice_start",
+    State.LONG_SILENCE_DETECTED: "endpoint",
+    State.TRANSCRIPTION_SUCCESS: "transcription",
+    State.RESPONSE_GENERATION_IN_PROGRESS: "response_generation",
+    State.PLAYING_RESPONSE: "playback_start",
+    State.REQUEST_FINISHED: "playback_end",
+}
+# States that end a request
+TRACE_END_STATES = {State.WAITING_TIME_EXCEEDED, State.TRANSCRIPTION_NOTHING_DETECTED, State.REQUEST_FINISHED}
+
+
 class StateManager:
-    def __init__(self):
+    def __init__(self, tracer: Optional[Tracer] = None):
         self.state = None
+        self.tracer = tracer
 
-    def set_state(self, state: State, logger: Logger, **kwargs):
+    def set_state(self, state: State, logger: Logger, trace: Optional[Trace] = None, **kwargs):
+        """Sets the state and marks it in the trace of its request, by default the current one."""
+        self.state = state
         logger.info(state.value)
+
+        if self.tracer is None:
+            return
+        if state == State.KEYWORD_DETECTED:
+            self.tracer.start_trace()
+        if state in TRACE_STAGES:
+            self.tracer.mark(TRACE_STAGES[state], trace)
+        if state in TRACE_END_STATES:
+            self.tracer.finish_trace(trace)
@@ -0,0 +1,174 @@
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from latency_stats import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Trace:
+    """
+    Timeline of a single request, from the keyword detection to the end of the playback.
+
+    `marks` holds the offset in seconds since the keyword detection at which every stage was reached first, `spans`
+    the offsets at which every timed operation (e.g. a tool call) started and ended.
+    """
+
+    request_id: str
+    start: float = field(default_factory=time.perf_counter)
+    marks: Dict[str, float] = field(default_factory=dict)
+    spans: List[Tuple[str, float, float]] = field(default_factory=list)
+    finished: bool = False
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+
+class Tracer:
+    """
+    Per-request latency tracing across all pipeline stages.
+
+    A trace with a new request ID is started at the keyword detection. The stages of the request (voice start,
+    end of speech, transcription, first token, first audio, playback, ...) are marked with their offset since the
+    keyword detection, operations like tool calls or the synthesis of a segment are recorded as spans. When a trace
+    is finished, the time between every two consecutive stages is recorded as well (e.g. `endpoint->transcription`).
+    All of them are aggregated into rolling histograms, which can be dumped as JSON or in the Prometheus text format.
+
+    Marks and spans may be recorded from any thread. They belong to the trace that is passed, or to the current one,
+    i.e. the one of the most recent keyword detection. Stages of a request that may still run or be queued once the
+    next keyword is detected (transcription, response, playback) must pass the trace of their request, so that they
+    neither end up in nor finish the trace of the next one.
+
+    Args:
+        window_size (int): Number of most recent samples the percentiles of every histogram are computed of.
+    """
+
+    def __init__(self, window_size: int = 500):
+        self.window_size = window_size
+        self.current: Optional[Trace] = None
+        self.stage_stats: Dict[str, LatencyStats] = {}
+        self.span_stats: Dict[str, LatencyStats] = {}
+        self.interval_stats: Dict[str, LatencyStats] = {}
+        self.completed: Deque[Trace] = deque(maxlen=window_size)
+        self.trace_count = 0  # Number of finished traces
+        self.lock = threading.Lock()
+
+    @property
+    def request_id(self) -> Optional[str]:
+        trace = self.current
+        return trace.request_id if trace else None
+
+    def start_trace(self) -> Trace:
+        """Starts the trace of a new request. The trace of a previous request is finished by that request itself."""
+        trace = Trace(request_id=uuid.uuid4().hex[:12])
+        with self.lock:
+            self.current = trace
+        logger.debug("Request %s started", trace.request_id)
+        return trace
+
+    def mark(self, stage: str, trace: Optional[Trace] = None) -> None:
+        """Marks that a request reached a stage. Only the first mark of a stage per request counts."""
+        with self.lock:
+            trace = trace or self.current
+            if trace is None or trace.finished or stage in trace.marks:
+                return
+            offset = trace.elapsed()
+            trace.marks[stage] = offset
+            self._stats(self.stage_stats, stage).add(offset)
+
+    @contextlib.contextmanager
+    def span(self, name: str, trace: Optional[Trace] = None) -> Iterator[None]:
+        trace = trace or self.current
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_span(name, start, time.perf_counter(), trace)
+
+    def record_span(self, name: str, start: float, end: float, trace: Optional[Trace] = None) -> None:
+        """Records an operation between two `time.perf_counter` timestamps."""
+        with self.lock:
+            self._stats(self.span_stats, name).add(end - start)
+            trace = trace or self.current
+            if trace is not None:
+                trace.spans.append((name, start - trace.start, end - trace.start))
+
+    def finish_trace(self, trace: Optional[Trace] = None) -> Optional[Trace]:
+        """Finishes a trace, by default the current one, and records the intervals between its stages."""
+        with self.lock:
+            trace = trace or self.current
+            if trace is self.current:
+                self.current = None
+            if trace is None or trace.finished:
+                return None
+            trace.finished = True
+
+            stages = sorted(trace.marks.items(), key=lambda mark: mark[1])
+            for (previous_stage, previous_offset), (stage, offset) in zip(stages, stages[1:]):
+                self._stats(self.interval_stats, f"{previous_stage}->{stage}").add(offset - previous_offset)
+            self.completed.append(trace)
+            self.trace_count += 1
+
+        timeline = ", ".join(f"{stage} {offset:.3f}s" for stage, offset in trace.marks.items())
+        logger.info("Request %s timeline: %s", trace.request_id, timeline)
+        return trace
+
+    def _stats(self, stats: Dict[str, LatencyStats], name: str) -> LatencyStats:
+        if name not in stats:
+            stats[name] = LatencyStats(self.window_size)
+        return stats[name]
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        with self.lock:
+            stats = {
+                "stages": dict(self.stage_stats),
+                "intervals": dict(self.interval_stats),
+                "spans": dict(self.span_stats),
+            }
+        return {
+            kind: {
+                name: {"count": latency_stats.count, "sum": latency_stats.total, **latency_stats.percentiles()}
+                for name, latency_stats in named_stats.items()
+            }
+            for kind, named_stats in stats.items()
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), indent=2)
+
+    def to_prometheus(self, prefix: str = "voice_assistant") -> str:
+        summary = self.summary()
+        lines = []
+        for kind, label, description in [
+            ("stages", "stage", "Time from the keyword detection until a stage of the request is reached."),
+            ("intervals", "interval", "Time between two consecutive stages of a request."),
+            ("spans", "span", "Duration of an operation within a request."),
+        ]:
+            metric = f"{prefix}_{label}_latency_seconds"
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} summary"]
+            for name, values in summary[kind].items():
+                for quantile in ("p50", "p95", "p99"):
+                    if quantile in values:
+                        quantile_value = int(quantile[1:]) / 100
+                        lines.append(f'{metric}{{{label}="{name}",quantile="{quantile_value}"}} {values[quantile]}')
+                lines.append(f'{metric}_sum{{{label}="{name}"}} {values["sum"]}')
+                lines.append(f'{metric}_count{{{label}="{name}"}} {values["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        """Writes the histograms to `path`, as JSON if it ends with `.json`, in the Prometheus text format otherwise."""
+        content = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(content)
+        # Atomic, so that a scraper never reads a partially written file
+        os.replace(temp_path, path)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules of the app are imported relative to `src`, as when it is run with `PYTHONPATH=src`
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,48 @@
+import numpy as np
+
+from audio_detection.AdaptiveEndpointer import AdaptiveEndpointer
+
+FRAME_DURATION_MS = 32.0
+
+
+def simulate(endpointer: AdaptiveEndpointer, max_pause_ms: float, utterances: int = 100, seed: int = 0) -> None:
+    """Utterances with three pauses each, uniformly between 100 ms and `max_pause_ms`."""
+    rng = np.random.default_rng(seed)
+    for _ in range(utterances):
+        for pause_ms in rng.uniform(100, max_pause_ms, 3):
+            silence_frames = int(pause_ms / FRAME_DURATION_MS)
+            if silence_frames >= endpointer.silence_frames:
+                break  # The pause ended the utterance
+            endpointer.observe_pause(silence_frames)
+        endpointer.observe_endpoint(endpointer.silence_frames)
+
+
+def test_endpoint_shrinks_to_short_pauses():
+    endpointer = AdaptiveEndpointer(FRAME_DURATION_MS, silence_ms=800)
+    simulate(endpointer, max_pause_ms=350)
+
+    assert 400 <= endpointer.silence_ms <= 500
+    assert endpointer.speculative_silence_ms < endpointer.silence_ms
+
+
+def test_endpoint_grows_when_pauses_are_cut_off():
+    endpointer = AdaptiveEndpointer(FRAME_DURATION_MS, silence_ms=500)
+    simulate(endpointer, max_pause_ms=900)
+
+    assert endpointer.silence_ms >= 900
+
+
+def test_endpoint_grows_again_after_shrinking():
+    endpointer = AdaptiveEndpointer(FRAME_DURATION_MS, silence_ms=500)
+    simulate(endpointer, max_pause_ms=300)
+    assert endpointer.silence_ms < 450
+
+    simulate(endpointer, max_pause_ms=700, seed=1)
+    assert endpointer.silence_ms >= 700
+
+
+def test_fixed_endpoint_does_not_adapt():
+    endpointer = AdaptiveEndpointer(FRAME_DURATION_MS, silence_ms=500, adaptive=False)
+    simulate(endpointer, max_pause_ms=900)
+
+    assert endpointer.silence_ms == 500
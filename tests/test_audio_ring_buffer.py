@@ -0,0 +1,78 @@
+import threading
+
+import numpy as np
+
+from audio_detection.AudioRingBuffer import AudioRingBuffer
+
+
+def positions(start: int, count: int) -> np.ndarray:
+    """Samples whose values are their absolute positions, so that torn reads can be told apart."""
+    return np.arange(start, start + count, dtype=np.int16)
+
+
+def test_samples_are_read_in_order_across_the_wrap_around():
+    ring_buffer = AudioRingBuffer(capacity=8)
+    reader = ring_buffer.reader()
+
+    for start in range(0, 24, 4):
+        ring_buffer.write(positions(start, 4))
+        np.testing.assert_array_equal(reader.read(4), positions(start, 4))
+    assert reader.overruns == 0
+
+
+def test_read_samples_are_not_changed_by_later_writes():
+    ring_buffer = AudioRingBuffer(capacity=8)
+    reader = ring_buffer.reader()
+    ring_buffer.write(positions(0, 4))
+
+    samples = reader.read(4)
+    ring_buffer.write(positions(4, 8))
+
+    np.testing.assert_array_equal(samples, positions(0, 4))
+
+
+def test_reader_that_fell_behind_skips_the_overwritten_samples():
+    ring_buffer = AudioRingBuffer(capacity=8)
+    reader = ring_buffer.reader()
+    ring_buffer.write(positions(0, 12))
+
+    np.testing.assert_array_equal(reader.read(4), positions(4, 4))
+    assert reader.overruns == 1
+
+
+def test_samples_overwritten_while_they_are_read_are_skipped(monkeypatch):
+    ring_buffer = AudioRingBuffer(capacity=8)
+    reader = ring_buffer.reader()
+    ring_buffer.write(positions(0, 8))
+    read = ring_buffer.read
+    writes = iter([positions(8, 4)])
+
+    def read_while_writing(position: int, sample_count: int) -> np.ndarray:
+        samples = read(position, sample_count)
+        # The writer overwrites the oldest samples before the reader copied them
+        for samples_to_write in writes:
+            ring_buffer.write(samples_to_write)
+        return samples
+
+    monkeypatch.setattr(ring_buffer, "read", read_while_writing)
+
+    np.testing.assert_array_equal(reader.read(4), positions(4, 4))
+    np.testing.assert_array_equal(reader.read(4), positions(8, 4))
+    assert reader.overruns == 1
+
+
+def test_concurrent_writer_never_tears_the_read_samples():
+    ring_buffer = AudioRingBuffer(capacity=512)
+    reader = ring_buffer.reader()
+    frame_size, frame_count = 128, 2000
+
+    def write() -> None:
+        for i in range(frame_count):
+            ring_buffer.write(np.full(frame_size, i % 30000, dtype=np.int16))
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while (samples := reader.read(frame_size, timeout=1)) is not None:
+        # Frames are written as a whole and read at frame boundaries, a torn frame mixes two of them
+        assert np.all(samples == samples[0])
+    writer.join()
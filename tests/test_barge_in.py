@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("pyaudio")
+
+import speech_recognition as sr  # noqa: E402
+
+from audio_detection import AudioDetectionManager  # noqa: E402
+from benchmark import (  # noqa: E402
+    FakeAgent,
+    FakeAudioGenerator,
+    FakeKeywordDetector,
+    FakeSearchTool,
+    FakeTranscriber,
+    NullAudioOutput,
+    ReplayAudioListener,
+)
+from main import App  # noqa: E402
+from state_manager import State  # noqa: E402
+
+QUERY = "Erzähl mir eine Geschichte"
+# About six seconds of audio
+RESPONSE = "Es war einmal ein kleiner Drache, der in einer Höhle am Rande des großen Waldes wohnte. " * 2
+AUDIO = sr.AudioData(b"", AudioDetectionManager.SAMPLE_RATE, 2)
+
+
+@pytest.fixture
+def app() -> App:
+    listener = ReplayAudioListener(AudioDetectionManager.SAMPLE_RATE, AudioDetectionManager.frame_length)
+    audio_generator = FakeAudioGenerator()
+    return App(
+        listener=listener,
+        detector=FakeKeywordDetector(listener),
+        transcriber=FakeTranscriber(lambda: QUERY),
+        agent=FakeAgent({QUERY: RESPONSE}),
+        tools=[FakeSearchTool()],
+        audio_generator=audio_generator,
+        audio_output=NullAudioOutput(audio_generator.get_sample_rate()),
+        use_response_cache=False,
+    )
+
+
+def record_states(app: App, on_state=None) -> list:
+    states = []
+    set_state = app.state_manager.set_state
+
+    def record(state, logger, *args, **kwargs):
+        states.append(state)
+        if on_state is not None:
+            on_state(state)
+        set_state(state, logger, *args, **kwargs)
+
+    app.state_manager.set_state = record
+    return states
+
+
+def test_keyword_during_playback_stops_it_and_cancels_the_request(app):
+    states = record_states(app)
+    interrupted = threading.Event()
+    request = threading.Thread(target=app.recorded_audio_callback, args=(AUDIO, QUERY, interrupted))
+    request.start()
+
+    deadline = time.monotonic() + 10
+    while State.PLAYING_RESPONSE not in states and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert State.PLAYING_RESPONSE in states
+    task = app.request_task
+
+    # As done by the audio detection when the keyword is detected
+    interrupted.set()
+    app.interrupt_request()
+    request.join(5)
+
+    assert not request.is_alive()
+    assert task.cancelled()
+    assert app.request_task is None
+    assert State.REQUEST_FINISHED not in states
+    assert app.tracer.span_stats["barge_in"].count == 1
+    response_frames = len(RESPONSE) * 0.06 * app.audio_generation_manager.audio_generator.get_sample_rate()
+    assert app.audio_generation_manager.stream.frames_written < response_frames / 2
+
+
+def test_interruption_before_the_request_task_exists_cancels_it(app):
+    interrupted = threading.Event()
+
+    def interrupt_before_the_task_is_created(state: State) -> None:
+        if state == State.TRANSCRIPTION_SUCCESS:
+            assert app.request_task is None
+            interrupted.set()
+            app.interrupt_request()
+
+    states = record_states(app, interrupt_before_the_task_is_created)
+
+    app.recorded_audio_callback(AUDIO, QUERY, interrupted)
+
+    assert State.RESPONSE_GENERATION_IN_PROGRESS not in states
+    assert app.request_task is None
+    assert app.audio_generation_manager.stream.frames_written == 0
+    assert app.tracer.span_stats["barge_in"].count == 1
+
+
+def test_interruption_during_the_transcription_skips_the_request(app):
+    interrupted = threading.Event()
+    interrupted.set()
+    states = record_states(app)
+
+    app.recorded_audio_callback(AUDIO, None, interrupted)
+
+    assert State.TRANSCRIPTION_SUCCESS not in states
+    assert app.request_task is None
@@ -0,0 +1,75 @@
+import threading
+from typing import Optional, Tuple
+
+import pytest
+
+from audio_transcription.AudioTranscriber.CascadingTranscriber import CascadingTranscriber
+from audio_transcription.AudioTranscriber.IAudioTranscriber import IAudioTranscriber
+
+
+class FakeTranscriber(IAudioTranscriber):
+    def __init__(self, transcription: Optional[str], confidence: Optional[float] = None, error: bool = False):
+        self.transcription = transcription
+        self.confidence = confidence
+        self.error = error
+
+    def transcribe(self, audio_data: bytes) -> Optional[str]:
+        return self.transcribe_with_confidence(audio_data)[0]
+
+    def transcribe_with_confidence(self, audio_data: bytes) -> Tuple[Optional[str], Optional[float]]:
+        if self.error:
+            raise RuntimeError("Transcription failed")
+        return self.transcription, self.confidence
+
+
+class Local(FakeTranscriber):
+    pass
+
+
+class Cloud(FakeTranscriber):
+    pass
+
+
+def test_unconfident_and_failed_transcriptions_are_escalated():
+    cascade = CascadingTranscriber([Local("Licht an", 0.5), Cloud("Licht an", 0.9)])
+    assert cascade.transcribe(b"") == "Licht an"
+
+    cascade.tiers[0] = Local(None, error=True)
+    assert cascade.transcribe(b"") == "Licht an"
+
+    report = cascade.report()
+    assert report["Local"]["escalated"] == 1
+    assert report["Local"]["errors"] == 1
+    assert report["Cloud"]["served"] == 2
+
+
+def test_error_of_last_tier_is_raised():
+    cascade = CascadingTranscriber([Local("Licht an", 0.5), Cloud(None, error=True)])
+    with pytest.raises(RuntimeError):
+        cascade.transcribe(b"")
+
+
+def test_concurrent_transcriptions_and_reports_are_consistent():
+    cascade = CascadingTranscriber([Local("Licht an", 0.9), Cloud("Licht an", 0.9)])
+    thread_count, request_count = 8, 200
+    barrier = threading.Barrier(thread_count + 1)
+    reports = []
+
+    def transcribe() -> None:
+        barrier.wait()
+        for _ in range(request_count):
+            cascade.transcribe(b"")
+
+    threads = [threading.Thread(target=transcribe) for _ in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    while any(thread.is_alive() for thread in threads):
+        reports.append(cascade.report())
+    for thread in threads:
+        thread.join()
+
+    report = cascade.report()
+    assert report["Local"]["served"] == thread_count * request_count
+    assert cascade.latency_stats["Local"].count == thread_count * request_count
+    assert all(r["Local"]["served"] <= thread_count * request_count for r in reports)
@@ -0,0 +1,120 @@
+import threading
+from typing import Any, List, Optional
+
+from langchain_core.language_models.llms import LLM
+from langchain_core.messages import BaseMessage
+from langchain_core.pydantic_v1 import Field
+
+from response_generation.ConversationHistory import ConversationHistory
+
+
+class FakeLLM(LLM):
+    """Returns the given summaries in order and counts one token per word."""
+
+    summaries: List[str]
+    prompts: List[str] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+        self.prompts.append(prompt)
+        return self.summaries[len(self.prompts) - 1]
+
+    def get_num_tokens_from_messages(self, messages: List[BaseMessage]) -> int:
+        return sum(len(message.content.split()) for message in messages)
+
+
+def hold_summaries(history: ConversationHistory) -> threading.Event:
+    """Blocks the summary thread until the returned event is set."""
+    release = threading.Event()
+    history.summary_executor.submit(release.wait, 10)
+    return release
+
+
+def wait_for_summaries(history: ConversationHistory) -> None:
+    # A summary that is done may queue the next one
+    for _ in range(5):
+        history.summary_executor.submit(lambda: None).result()
+
+
+def contents(messages: List[BaseMessage]) -> List[str]:
+    return [message.content for message in messages]
+
+
+def test_oldest_turns_are_dropped_to_fit_the_budget():
+    history = ConversationHistory(max_tokens=25)
+
+    history.add_turn("Frage 1", "Antwort 1")
+    history.add_turn("Frage 2", "Antwort 2")
+    assert len(history.messages) == 4
+
+    history.add_turn("Frage 3", "Antwort 3")
+    assert contents(history.messages) == ["Frage 2", "Antwort 2", "Frage 3", "Antwort 3"]
+    assert history.token_count <= 25
+
+
+def test_latest_turn_is_kept_even_if_it_exceeds_the_budget():
+    history = ConversationHistory(FakeLLM(summaries=[]), max_tokens=4)
+
+    history.add_turn("eins zwei drei", "vier fünf sechs")
+
+    assert len(history.messages) == 2
+    assert history.token_count == 6
+
+
+def test_evicted_turns_are_folded_into_the_summary():
+    llm = FakeLLM(summaries=["Berlin, sonnig."])
+    history = ConversationHistory(llm, max_tokens=10)
+    release = hold_summaries(history)
+
+    history.add_turn("Wie ist das Wetter heute in Berlin?", "Sonnig.")
+    history.add_turn("Und morgen?", "Regen.")
+    # Missing until the summary is done
+    assert contents(history.messages) == ["Und morgen?", "Regen."]
+
+    release.set()
+    wait_for_summaries(history)
+
+    assert contents(history.messages) == [
+        ConversationHistory.SUMMARY_PREFIX + "Berlin, sonnig.",
+        "Und morgen?",
+        "Regen.",
+    ]
+    assert "Wie ist das Wetter heute in Berlin?" in llm.prompts[0]
+    assert history.token_count == 10
+
+
+def test_budget_is_checked_again_once_the_summary_is_done():
+    llm = FakeLLM(summaries=["Eine lange Zusammenfassung des bisherigen Gesprächs.", "Kurz."])
+    history = ConversationHistory(llm, max_tokens=10)
+    release = hold_summaries(history)
+
+    history.add_turn("eins zwei drei", "vier")
+    history.add_turn("fünf sechs sieben", "acht")
+    history.add_turn("neun zehn elf", "zwölf")
+    assert contents(history.messages) == ["fünf sechs sieben", "acht", "neun zehn elf", "zwölf"]
+
+    release.set()
+    wait_for_summaries(history)
+
+    # The first summary exceeded the budget together with the turns, so the oldest turn was folded into it as well
+    assert len(llm.prompts) == 2
+    assert "fünf sechs sieben" in llm.prompts[1]
+    assert contents(history.messages) == [ConversationHistory.SUMMARY_PREFIX + "Kurz.", "neun zehn elf", "zwölf"]
+    assert history.token_count == 10
+
+
+def test_clear_removes_the_turns_and_the_summary():
+    llm = FakeLLM(summaries=["Zusammenfassung."])
+    history = ConversationHistory(llm, max_tokens=3)
+    history.add_turn("eins", "zwei")
+    history.add_turn("drei", "vier")
+    wait_for_summaries(history)
+    assert history.summary is not None
+
+    history.clear()
+
+    assert history.messages == []
+    assert history.token_count == 0
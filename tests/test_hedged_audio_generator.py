@@ -0,0 +1,108 @@
+import threading
+import time
+from typing import Iterator
+
+import pytest
+
+pytest.importorskip("pyaudio")
+
+from audio_generation import CachedAudioGenerator, HedgedAudioGenerator, IAudioGenerator  # noqa: E402
+
+
+class FakeAudioGenerator(IAudioGenerator):
+    def __init__(self, latency_s: float = 0.0, sample_rate: int = 24000):
+        self.latency_s = latency_s
+        self.sample_rate = sample_rate
+
+    def generate_audio(self, text: str) -> bytes:
+        return b"".join(self.generate_audio_stream(text))
+
+    def generate_audio_stream(self, text: str) -> Iterator[bytes]:
+        time.sleep(self.latency_s)
+        yield bytes(2 * self.sample_rate // 10)
+
+    def get_sample_rate(self) -> int:
+        return self.sample_rate
+
+
+class Primary(FakeAudioGenerator):
+    pass
+
+
+class Secondary(FakeAudioGenerator):
+    pass
+
+
+class Failing(FakeAudioGenerator):
+    def generate_audio_stream(self, text: str) -> Iterator[bytes]:
+        raise ConnectionError("Service unavailable")
+
+
+def test_audio_is_resampled_to_the_output_rate():
+    hedged = HedgedAudioGenerator([Primary(sample_rate=16000)], sample_rate=24000)
+    # 100 ms of audio, within the delay of the resampler
+    assert abs(len(hedged.generate_audio("Hallo")) - 2 * 2400) <= 2 * 32
+
+
+def test_primary_that_became_slow_is_demoted():
+    primary = Primary(latency_s=0.005)
+    secondary = Secondary(latency_s=0.02)
+    hedged = HedgedAudioGenerator([primary, secondary], hedge_delay_s=0.1, min_hedge_delay_s=0.05, min_samples=1)
+    for _ in range(3):
+        hedged.generate_audio("Hallo")
+    assert hedged.wins == {"Primary": 3}
+
+    primary.latency_s = 1.0
+    for _ in range(3):
+        hedged.generate_audio("Hallo")
+
+    assert hedged.wins["Secondary"] >= 1
+    assert hedged.latency_stats["Primary"].count >= 4
+    assert hedged.ranked_providers()[0] is secondary
+
+
+def test_providers_of_the_same_class_are_ranked_separately():
+    slow = FakeAudioGenerator(latency_s=0.3)
+    fast = FakeAudioGenerator(latency_s=0.005)
+    hedged = HedgedAudioGenerator([slow, fast], hedge_delay_s=0.05, min_hedge_delay_s=0.05, min_samples=1)
+
+    hedged.generate_audio("Hallo")
+
+    assert hedged.wins == {"FakeAudioGenerator#2": 1}
+    assert set(hedged.latency_stats) == {"FakeAudioGenerator#1", "FakeAudioGenerator#2"}
+    assert hedged.ranked_providers() == [fast, slow]
+
+
+def test_concurrent_syntheses_are_all_counted():
+    hedged = HedgedAudioGenerator([Primary()])
+    thread_count, request_count = 4, 25
+
+    def synthesize() -> None:
+        for _ in range(request_count):
+            hedged.generate_audio("Hallo")
+
+    threads = [threading.Thread(target=synthesize) for _ in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert hedged.wins == {"Primary": thread_count * request_count}
+    assert hedged.latency_stats["Primary"].count == thread_count * request_count
+
+
+def test_failed_provider_is_not_ranked_first():
+    secondary = Secondary(latency_s=0.02)
+    hedged = HedgedAudioGenerator([Failing(), secondary], hedge_delay_s=0.5, min_samples=1)
+    hedged.generate_audio("Hallo")
+
+    assert hedged.errors == {"Failing": 1}
+    assert hedged.ranked_providers()[0] is secondary
+
+
+def test_cache_key_depends_on_the_sample_rate(tmp_path):
+    generator = FakeAudioGenerator(sample_rate=24000)
+    cache = CachedAudioGenerator(generator, cache_dir=str(tmp_path))
+    key = cache.cache_key("Hallo")
+    generator.sample_rate = 16000
+    assert cache.cache_key("Hallo") != key
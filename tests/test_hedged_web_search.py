@@ -0,0 +1,91 @@
+import asyncio
+import time
+from typing import Any
+
+from langchain_core.tools import BaseTool
+
+from response_generation.tools.web_search.HedgedWebSearch import HedgedWebSearch
+
+
+class FakeSearch(BaseTool):
+    name: str = "web_search"
+    description: str = "Fake web search."
+    latency_s: float = 0.0
+    result: str = ""
+    cancelled: int = 0
+
+    def _run(self, query: str, **kwargs: Any) -> Any:
+        time.sleep(self.latency_s)
+        return self.result
+
+    async def _arun(self, query: str, **kwargs: Any) -> Any:
+        try:
+            await asyncio.sleep(self.latency_s)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.result
+
+
+class Primary(FakeSearch):
+    pass
+
+
+class Secondary(FakeSearch):
+    pass
+
+
+def search(hedged: HedgedWebSearch) -> str:
+    return asyncio.run(hedged.ainvoke({"query": "Wetter"}))
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    primary = Primary(latency_s=1.0, result="primary")
+    secondary = Secondary(latency_s=0.01, result="secondary")
+    hedged = HedgedWebSearch(providers=[primary, secondary], hedge_delay_s=0.05, adaptive=False)
+
+    assert search(hedged) == "secondary"
+    # The cancelled search was awaited before the result was returned
+    assert hedged.providers[0].cancelled == 1
+    assert hedged.latency_stats["Primary"].count == 1
+
+
+def test_primary_that_became_slow_is_demoted():
+    primary = Primary(latency_s=0.005, result="primary")
+    secondary = Secondary(latency_s=0.02, result="secondary")
+    hedged = HedgedWebSearch(providers=[primary, secondary], hedge_delay_s=0.1, min_hedge_delay_s=0.05, min_samples=1)
+    for _ in range(3):
+        assert search(hedged) == "primary"
+
+    hedged.providers[0].latency_s = 1.0
+    for _ in range(5):
+        assert search(hedged) == "secondary"
+
+    assert isinstance(hedged.ranked_providers()[0], Secondary)
+
+
+def test_failed_provider_is_not_ranked_first():
+    class Failing(FakeSearch):
+        async def _arun(self, query: str, **kwargs: Any) -> Any:
+            raise RuntimeError("Service unavailable")
+
+    failing = Failing()
+    secondary = Secondary(latency_s=0.02, result="secondary")
+    hedged = HedgedWebSearch(providers=[failing, secondary], hedge_delay_s=0.1, min_samples=1)
+    for _ in range(3):
+        assert search(hedged) == "secondary"
+
+    # Demoted after its first failure
+    assert hedged.errors["Failing"] == 1
+    assert isinstance(hedged.ranked_providers()[0], Secondary)
+
+
+def test_providers_of_the_same_class_are_ranked_separately():
+    slow = FakeSearch(latency_s=0.3, result="slow")
+    fast = FakeSearch(latency_s=0.005, result="fast")
+    hedged = HedgedWebSearch(providers=[slow, fast], hedge_delay_s=0.05, min_hedge_delay_s=0.05, min_samples=1)
+
+    assert search(hedged) == "fast"
+
+    assert set(hedged.latency_stats) == {"FakeSearch#1", "FakeSearch#2"}
+    assert [provider.result for provider in hedged.ranked_providers()] == ["fast", "slow"]
@@ -0,0 +1,213 @@
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Iterator, List, Tuple
+
+import pytest
+
+pytest.importorskip("pyaudio")
+
+from audio_generation import AudioGenerationManager, CachedAudioGenerator, IAudioGenerator  # noqa: E402
+from audio_generation.JitterBuffer import JitterBuffer  # noqa: E402
+
+
+class FakeAudioGenerator(IAudioGenerator):
+    """Streams the text as audio, one chunk per character, after `chunk_latency_s` each."""
+
+    def __init__(self, chunk_latency_s: float = 0.0, sample_rate: int = 16000):
+        self.chunk_latency_s = chunk_latency_s
+        self.sample_rate = sample_rate
+        self.closed_streams = 0
+
+    def generate_audio(self, text: str) -> bytes:
+        return b"".join(self.generate_audio_stream(text))
+
+    def generate_audio_stream(self, text: str) -> Iterator[bytes]:
+        try:
+            for character in text:
+                time.sleep(self.chunk_latency_s)
+                yield character.encode() * 2
+        finally:
+            self.closed_streams += 1
+
+    def get_sample_rate(self) -> int:
+        return self.sample_rate
+
+
+class RecordingOutput:
+    def __init__(self):
+        self.frames: List[bytes] = []
+
+    def start_stream(self) -> None:
+        pass
+
+    def stop_stream(self) -> None:
+        pass
+
+    def write(self, frames: bytes, num_frames: int) -> None:
+        self.frames.append(frames)
+
+    def close(self) -> None:
+        pass
+
+
+def read_in_thread(buffer: JitterBuffer, stop: threading.Event) -> Tuple[List[bytes], threading.Thread]:
+    chunks: List[bytes] = []
+    thread = threading.Thread(target=lambda: chunks.extend(buffer.read(stop, 0.01)), daemon=True)
+    thread.start()
+    return chunks, thread
+
+
+def test_playback_starts_once_the_buffer_is_prefilled():
+    buffer = JitterBuffer(prefill_bytes=4)
+    chunks, reader = read_in_thread(buffer, threading.Event())
+
+    buffer.put(b"ab")
+    time.sleep(0.05)
+    assert chunks == []
+
+    buffer.put(b"cd")
+    buffer.put(b"ef")
+    buffer.close()
+    reader.join(1)
+    assert chunks == [b"ab", b"cd", b"ef"]
+
+
+def test_without_prefill_the_playback_waits_for_the_first_chunk():
+    buffer = JitterBuffer(prefill_bytes=0)
+    chunks, reader = read_in_thread(buffer, threading.Event())
+    time.sleep(0.05)
+    assert reader.is_alive()
+
+    buffer.put(b"ab")
+    buffer.close()
+    reader.join(1)
+    assert chunks == [b"ab"]
+
+
+def test_short_segment_is_played_once_closed():
+    buffer = JitterBuffer(prefill_bytes=100)
+    buffer.put(b"ab")
+    buffer.close()
+
+    assert list(buffer.read(threading.Event(), 0.01)) == [b"ab"]
+
+
+def test_underrun_waits_for_the_next_chunk():
+    buffer = JitterBuffer(prefill_bytes=2)
+    chunks, reader = read_in_thread(buffer, threading.Event())
+    buffer.put(b"ab")
+    time.sleep(0.05)
+
+    buffer.put(b"cd")
+    buffer.close()
+    reader.join(1)
+
+    assert chunks == [b"ab", b"cd"]
+    assert buffer.underruns == 1
+
+
+def test_synthesis_is_blocked_while_the_buffer_is_full():
+    buffer = JitterBuffer(prefill_bytes=2, max_bytes=4)
+    buffer.put(b"ab")
+    buffer.put(b"cd")
+    writer = threading.Thread(target=buffer.put, args=(b"ef",), daemon=True)
+    writer.start()
+    writer.join(0.05)
+    assert writer.is_alive()
+
+    reader = buffer.read(threading.Event(), 0.01)
+    assert next(reader) == b"ab"
+    writer.join(1)
+    assert not writer.is_alive()
+    assert buffer.buffered_bytes == 4
+
+
+def test_cancel_releases_a_blocked_synthesis_and_drops_its_chunks():
+    buffer = JitterBuffer(prefill_bytes=2, max_bytes=2)
+    buffer.put(b"ab")
+    writer = threading.Thread(target=buffer.put, args=(b"cd",), daemon=True)
+    writer.start()
+
+    buffer.cancel()
+    writer.join(1)
+
+    assert not writer.is_alive()
+    assert buffer.buffered_bytes == 0
+    assert not buffer.chunks
+
+
+def test_error_of_the_synthesis_is_raised_after_the_received_audio():
+    buffer = JitterBuffer(prefill_bytes=2)
+    buffer.put(b"ab")
+    buffer.close(RuntimeError("Synthesis failed"))
+
+    reader = buffer.read(threading.Event(), 0.01)
+    assert next(reader) == b"ab"
+    with pytest.raises(RuntimeError):
+        next(reader)
+
+
+def test_stop_ends_the_playback():
+    buffer = JitterBuffer(prefill_bytes=100)
+    stop = threading.Event()
+    chunks, reader = read_in_thread(buffer, stop)
+    buffer.put(b"ab")
+
+    stop.set()
+    reader.join(1)
+
+    assert not reader.is_alive()
+    assert chunks == []
+
+
+def test_streamed_audio_is_only_cached_once_complete(tmp_path):
+    generator = FakeAudioGenerator()
+    cache = CachedAudioGenerator(generator, cache_dir=str(tmp_path))
+
+    stream = cache.generate_audio_stream("Hallo")
+    assert next(stream) == b"HH"
+    stream.close()
+    assert cache.misses == 1 and generator.closed_streams == 1
+
+    assert b"".join(cache.generate_audio_stream("Hallo")) == b"HHaalllloo"
+    assert cache.misses == 2
+    assert list(cache.generate_audio_stream("Hallo")) == [b"HHaalllloo"]
+    assert cache.hits["memory"] == 1
+
+
+async def text_stream(*chunks: str) -> AsyncIterator[str]:
+    for chunk in chunks:
+        await asyncio.sleep(0)
+        yield chunk
+
+
+def test_segments_are_played_in_order_while_they_are_synthesized():
+    output = RecordingOutput()
+    manager = AudioGenerationManager(FakeAudioGenerator(chunk_latency_s=0.001), output_stream=output)
+    playback_started = threading.Event()
+
+    response = asyncio.run(
+        manager.speak(text_stream("Erster Satz. ", "Zweiter Satz."), on_playback_start=playback_started.set)
+    )
+    manager.close()
+
+    assert response == "Erster Satz. Zweiter Satz."
+    assert playback_started.is_set()
+    assert b"".join(output.frames) == b"".join(character.encode() * 2 for character in "Erster Satz.Zweiter Satz.")
+
+
+def test_stopped_playback_cancels_the_synthesis():
+    generator = FakeAudioGenerator(chunk_latency_s=0.01)
+    output = RecordingOutput()
+    manager = AudioGenerationManager(generator, jitter_buffer_ms=0, output_stream=output)
+
+    response = asyncio.run(
+        manager.speak(text_stream("Ein Satz, der lang genug ist, um gestoppt zu werden. "), manager.stop_playback)
+    )
+    time.sleep(0.1)
+    manager.close()
+
+    assert response.startswith("Ein Satz")
+    assert len(output.frames) < 5
+    assert generator.closed_streams == 1
@@ -0,0 +1,104 @@
+from typing import List
+
+import numpy as np
+
+from audio_detection.AudioKeywordDetector import IAudioKeywordDetector
+from audio_detection.KeywordGate import KeywordGate
+
+FRAME_SIZE = 512
+SAMPLE_RATE = 16000
+FRAMES_PER_SECOND = SAMPLE_RATE // FRAME_SIZE
+
+
+class RecordingDetector(IAudioKeywordDetector):
+    """Detects the keyword in frames marked with a sample value, and records every frame it sees."""
+
+    KEYWORD_MARK = 12345
+
+    def __init__(self):
+        self.frames: List[np.ndarray] = []
+        self.skipped_samples = 0
+
+    def detect_keyword(self, audio_frame: np.ndarray) -> bool:
+        self.frames.append(audio_frame.copy())
+        return bool(audio_frame[0] == self.KEYWORD_MARK)
+
+    def skip(self, sample_count: int) -> None:
+        self.skipped_samples += sample_count
+
+
+def noise(seconds: float, level_db: float, rng: np.random.Generator) -> List[np.ndarray]:
+    amplitude = 32768 * 10 ** (level_db / 20)
+    samples = rng.normal(0, amplitude, int(seconds * FRAMES_PER_SECOND) * FRAME_SIZE)
+    return list(np.clip(samples, -32768, 32767).astype(np.int16).reshape(-1, FRAME_SIZE))
+
+
+def babble(seconds: float, level_db: float, rng: np.random.Generator) -> List[np.ndarray]:
+    """Speech-like noise, with syllables of about 200 ms at `level_db` and gaps 4 dB quieter between them."""
+    frames = noise(seconds, level_db, rng)
+    envelope = 0.63 + 0.37 * (np.sin(np.arange(len(frames)) * 2 * np.pi / (0.4 * FRAMES_PER_SECOND)) > 0)
+    return [(frame * gain).astype(np.int16) for frame, gain in zip(frames, envelope)]
+
+
+def keyword(level_db: float, rng: np.random.Generator) -> List[np.ndarray]:
+    frames = noise(0.6, level_db, rng)
+    frames[len(frames) // 2][0] = RecordingDetector.KEYWORD_MARK
+    return frames
+
+
+def run(gate: KeywordGate, frames: List[np.ndarray]) -> int:
+    return sum(gate.detect_keyword(frame) for frame in frames)
+
+
+def test_silence_is_skipped_and_keyword_detected():
+    rng = np.random.default_rng(0)
+    detector = RecordingDetector()
+    gate = KeywordGate(detector, FRAME_SIZE, SAMPLE_RATE)
+
+    assert run(gate, noise(10, -70, rng)) == 0
+    assert gate.skipped_fraction > 0.99
+    assert run(gate, keyword(-30, rng)) == 1
+
+
+def test_keyword_at_the_level_of_sustained_speech_is_detected():
+    rng = np.random.default_rng(1)
+    detector = RecordingDetector()
+    gate = KeywordGate(detector, FRAME_SIZE, SAMPLE_RATE)
+
+    run(gate, noise(2, -65, rng))
+    # A minute of TV at the level of the keyword would raise an unbounded floor to the level of speech
+    run(gate, babble(60, -30, rng))
+
+    assert gate.noise_floor_db <= gate.max_floor_db
+    # Spoken over the TV
+    frames = babble(0.6, -30, rng)
+    frames[len(frames) // 2][0] = RecordingDetector.KEYWORD_MARK
+    assert run(gate, frames) == 1
+
+
+def test_floor_follows_stationary_noise_below_the_cap():
+    rng = np.random.default_rng(2)
+    gate = KeywordGate(RecordingDetector(), FRAME_SIZE, SAMPLE_RATE)
+
+    run(gate, noise(2, -70, rng))
+    # Just below the threshold, so the floor rises slowly instead of being held
+    run(gate, noise(30, -67, rng))
+
+    assert -68.5 < gate.noise_floor_db < -66
+    frames = noise(5, -67, rng)
+    run(gate, frames)
+    assert gate.skipped_count > 0.9 * len(frames)
+
+
+def test_pre_roll_reaches_detector_and_skipped_samples_are_reported():
+    rng = np.random.default_rng(3)
+    detector = RecordingDetector()
+    gate = KeywordGate(detector, FRAME_SIZE, SAMPLE_RATE, pre_roll_ms=100.0)
+    silence = noise(2, -70, rng)
+
+    run(gate, silence)
+    run(gate, keyword(-30, rng))
+
+    pre_roll_frames = len(gate.pre_roll)
+    assert all(np.array_equal(a, b) for a, b in zip(detector.frames, silence[-pre_roll_frames:]))
+    assert detector.skipped_samples == (len(silence) - pre_roll_frames) * FRAME_SIZE
@@ -0,0 +1,25 @@
+import pytest
+
+from provider_registry import ProviderRegistry
+
+
+def test_options_of_the_config_file_are_passed_and_the_load_is_recorded():
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("silero_vad")
+    registry = ProviderRegistry({"vad": {"provider": "silero", "options": {"backend": "onnx", "sample_rate": 8000}}})
+
+    vad = registry.create("vad", sample_rate=16000)
+
+    assert vad.backend == "onnx"
+    assert vad.sample_rate == 16000
+    (load,) = registry.loads
+    assert (load.kind, load.name) == ("vad", "silero")
+    assert load.init_s > 0
+
+
+def test_options_do_not_apply_to_other_providers_of_the_kind():
+    registry = ProviderRegistry({"vad": {"provider": "silero", "options": {"backend": "onnx"}}})
+
+    vad = registry.create("vad", "webrtc", sample_rate=16000)
+
+    assert vad.sample_rate == 16000
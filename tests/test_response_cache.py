@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from response_generation.ResponseCache import ResponseCache
+
+
+@pytest.fixture
+def cache() -> ResponseCache:
+    return ResponseCache()
+
+
+def test_exact_hit_ignores_case_punctuation_and_filler_words(cache):
+    cache.put("Was ist die Hauptstadt von Frankreich?", "Paris.")
+    assert cache.get("was ist bitte die Hauptstadt von Frankreich") == "Paris."
+
+
+def test_fuzzy_hit_of_a_similar_query(cache):
+    cache.put("Wie wird das Wetter morgen in Berlin?", "Sonnig bei 20 Grad.")
+    assert cache.get("Wie wird denn das Wetter morgen in Berlin") == "Sonnig bei 20 Grad."
+    assert cache.get("Wie wird das Wetter morgen so in Berlin") == "Sonnig bei 20 Grad."
+
+
+@pytest.mark.parametrize(
+    "cached_query, query",
+    [
+        ("Wie wird das Wetter in Berlin?", "Wie wird das Wetter in Bern?"),
+        ("Wie viel sind 21 Grad in Fahrenheit?", "Wie viel sind 22 Grad in Fahrenheit?"),
+        ("Wie viel sind drei Meilen in Kilometern?", "Wie viel sind zwei Meilen in Kilometern?"),
+        ("Ist Kaffee gesund für Kinder?", "Ist Kaffee nicht gesund für Kinder?"),
+        ("Wie schalte ich den Fernseher an?", "Wie schalte ich den Fernseher aus?"),
+    ],
+)
+def test_no_fuzzy_hit_if_the_meaning_differs(cache, cached_query, query):
+    cache.put(cached_query, "Antwort")
+    assert cache.get(query) is None
+
+
+@pytest.mark.parametrize(
+    "cached_query, query",
+    [
+        ("Mach das Licht an.", "Mach das Licht aus."),
+        ("Mach das Licht an.", "Mach das Licht an."),
+        ("Stell die Heizung auf 21 Grad.", "Stell die Heizung auf 22 Grad."),
+    ],
+)
+def test_device_commands_are_never_cached(cache, cached_query, query):
+    cache.put(cached_query, "Okay.")
+    assert cache.get(query) is None
+    assert not cache.entries
+
+
+def test_responses_of_tools_with_side_effects_are_not_cached(cache):
+    cache.put("Spiel etwas von Queen", "Okay.", tools=["play_music"])
+    cache.put("Wer hat Bohemian Rhapsody geschrieben?", "Freddie Mercury.", tools=["web_search"])
+    assert cache.get("Spiel etwas von Queen") is None
+    assert cache.get("Wer hat Bohemian Rhapsody geschrieben?") == "Freddie Mercury."
+
+
+def test_time_sensitive_and_follow_up_queries_bypass_the_cache(cache):
+    cache.put("Wie spät ist es?", "Es ist 12 Uhr.")
+    cache.put("Und warum?", "Darum.")
+    assert cache.get("Wie spät ist es?") is None
+    assert cache.get("Und warum?") is None
+    assert cache.metrics()["bypasses"] == 2
+
+
+def test_expired_entries_are_not_served(cache, monkeypatch):
+    cache.put("Wie wird das Wetter in Berlin?", "Sonnig.")
+    now = cache.entries["wie wird das wetter in berlin"].expires_at
+    monkeypatch.setattr(time, "time", lambda: now + 1)
+    assert cache.get("Wie wird das Wetter in Berlin?") is None
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "Wie alt ist er?",
+        "Wo wohnt sie?",
+        "Wie wird das Wetter dort morgen?",
+        "Was kostet ein Hotel da?",
+        "Wann wurde dieser Film gedreht?",
+        "Wie hoch ist jener Berg?",
+        "Wer ist seine Frau?",
+    ],
+)
+def test_queries_referring_to_the_conversation_bypass_the_cache(cache, query):
+    cache.put(query, "Antwort")
+    assert cache.get(query) is None
+    assert not cache.entries
@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("pyaudio")
+
+from audio_generation.SentenceSegmenter import SentenceSegmenter  # noqa: E402
+
+
+def test_sentences_are_released_as_they_complete():
+    segmenter = SentenceSegmenter()
+
+    assert segmenter.push("Das Wetter in Berlin ist sonnig. Morgen") == ["Das Wetter in Berlin ist sonnig."]
+    assert segmenter.push(" regnet es, bei 12 Grad. ") == ["Morgen regnet es, bei 12 Grad."]
+    assert segmenter.flush() is None
+
+
+def test_abbreviations_and_short_sentences_are_not_cut():
+    segmenter = SentenceSegmenter()
+
+    assert segmenter.push("Ja. Das ist z.B. am 3. Mai der Fall. ") == ["Ja. Das ist z.B. am 3. Mai der Fall."]
+
+
+def test_long_sentence_is_cut_at_a_clause():
+    segmenter = SentenceSegmenter(max_length=50)
+
+    segments = segmenter.push("Das ist ein sehr langer Satz, der einfach nicht enden will und immer weiter geht")
+
+    assert segments == ["Das ist ein sehr langer Satz,"]
+    assert segmenter.flush() == "der einfach nicht enden will und immer weiter geht"
+
+
+def test_empty_segment_does_not_stop_the_scan():
+    segmenter = SentenceSegmenter(max_length=50)
+
+    segments = segmenter.push(
+        " " * 60 + "Das ist ein sehr langer Satz, der einfach nicht enden will und immer weiter geht"
+    )
+
+    assert segments == ["Das ist ein sehr langer Satz,"]
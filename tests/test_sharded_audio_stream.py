@@ -0,0 +1,84 @@
+import threading
+from typing import Any, List, Tuple
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pyaudio")
+
+from server.shard_worker import ShardCommand, ShardEvent  # noqa: E402
+from server.ShardedAudioStream import ShardedAudioStream  # noqa: E402
+from state_manager import StateManager  # noqa: E402
+
+
+class FakePool:
+    """Records the commands instead of sending them to a worker process."""
+
+    def __init__(self):
+        self.commands: List[Tuple[Any, ...]] = []
+        self.removed: List[ShardedAudioStream] = []
+
+    def send(self, shard: int, command: Tuple[Any, ...]) -> None:
+        self.commands.append(command)
+
+    def remove_stream(self, stream: ShardedAudioStream) -> None:
+        self.removed.append(stream)
+
+
+@pytest.fixture
+def stream() -> ShardedAudioStream:
+    stream = ShardedAudioStream(
+        FakePool(),
+        0,
+        0,
+        recorded_audio_callback=lambda *args, **kwargs: None,
+        state_manager=StateManager(),
+        ring_buffer_duration_s=31.0,
+    )
+    yield stream
+    stream.release()
+
+
+def samples(count: int) -> np.ndarray:
+    return np.arange(count, dtype=np.int16)
+
+
+def test_recorded_audio_is_read_from_the_ring_buffer(stream: ShardedAudioStream):
+    recorded = []
+    stream.recorded_audio_callback = lambda audio, **kwargs: recorded.append(audio)
+
+    stream.write(samples(1024))
+    stream.handle_event(ShardEvent.ENDPOINT, 100, 600, 200, False)
+
+    assert stream.pool.commands[-1] == (ShardCommand.AUDIO, 0, 1024)
+    assert recorded[0].frame_data == samples(1024)[100:600].tobytes()
+    assert recorded[0].speech_start == 100
+
+
+def test_events_after_release_are_ignored(stream: ShardedAudioStream):
+    recorded = []
+    stream.recorded_audio_callback = lambda audio, **kwargs: recorded.append(audio)
+    stream.write(samples(1024))
+
+    stream.handle_event(ShardEvent.CLOSED)
+    stream.write(samples(1024))
+    stream.handle_event(ShardEvent.ENDPOINT, 100, 600, 200, False)
+    stream.handle_event(ShardEvent.CLOSED)
+
+    assert recorded == []
+    assert [command[0] for command in stream.pool.commands] == [ShardCommand.AUDIO]
+    assert stream.pool.removed == [stream]
+
+
+def test_release_wakes_a_throttled_write(stream: ShardedAudioStream):
+    stream.write(samples(stream.max_lag))
+    writer = threading.Thread(target=stream.write, args=(samples(1024),))
+    writer.start()
+    writer.join(0.1)
+    assert writer.is_alive()
+
+    stream.handle_event(ShardEvent.CLOSED)
+    writer.join(1.0)
+
+    assert not writer.is_alive()
+    assert len(stream.pool.commands) == 1
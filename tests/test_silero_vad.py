@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("onnxruntime")
+
+from audio_detection.VoiceActivityDetector.SileroVAD import SileroVAD  # noqa: E402
+
+if SileroVAD._packaged_model("silero_vad.jit") is None or SileroVAD._packaged_model("silero_vad.onnx") is None:
+    pytest.skip("The silero-vad package with its models is not installed", allow_module_level=True)
+
+WINDOW_SIZE = 512
+
+
+@pytest.fixture(scope="module")
+def audio() -> np.ndarray:
+    """Two seconds of voiced, syllable-like harmonics followed by a second of low noise."""
+    rng = np.random.default_rng(0)
+    t = np.arange(2 * 16000) / 16000
+    harmonics = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 6))
+    voiced = 6000 * harmonics * (np.sin(2 * np.pi * 4 * t) > 0)
+    samples = np.concatenate((voiced, rng.normal(0, 50, 16000))).astype(np.int16)
+    return samples[: len(samples) // WINDOW_SIZE * WINDOW_SIZE]
+
+
+def test_onnx_backend_matches_jit_backend(audio: np.ndarray):
+    jit = SileroVAD(backend="jit", normalize_input=True)
+    onnx = SileroVAD(backend="onnx", normalize_input=True)
+
+    jit_probabilities = jit.speech_probabilities(audio)
+    onnx_probabilities = onnx.speech_probabilities(audio)
+
+    np.testing.assert_allclose(onnx_probabilities, jit_probabilities, atol=1e-3)
+    assert jit_probabilities.max() > 0.8
+    assert jit_probabilities[-10:].max() < 0.1
+
+
+@pytest.mark.parametrize("backend", ["jit", "onnx"])
+def test_state_and_context_are_carried_across_calls(audio: np.ndarray, backend: str):
+    vad = SileroVAD(backend=backend, normalize_input=True)
+    in_one_call = vad.speech_probabilities(audio)
+
+    vad.reset_states()
+    split = 7 * WINDOW_SIZE
+    in_two_calls = np.concatenate((vad.speech_probabilities(audio[:split]), vad.speech_probabilities(audio[split:])))
+
+    np.testing.assert_allclose(in_two_calls, in_one_call, atol=1e-6)
+
+
+def test_defaults_keep_the_earlier_threshold_and_input():
+    vad = SileroVAD(backend="onnx")
+
+    assert vad.probability_threshold == 0.8
+    assert vad.input_scale == 1.0
@@ -0,0 +1,42 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_detection.SpeculationLimiter import SpeculationLimiter
+
+
+def test_running_speculations_are_limited_and_counted():
+    limiter = SpeculationLimiter(max_running=2)
+    release = threading.Event()
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = []
+        for _ in range(2):
+            assert limiter.can_start()
+            futures.append(executor.submit(release.wait))
+            limiter.started(futures[-1])
+        # Both keep running after they were discarded
+        for future in futures:
+            limiter.discard(future)
+        assert not limiter.can_start()
+
+        release.set()
+        for future in futures:
+            future.result()
+        assert limiter.can_start()
+
+    assert limiter.stats() == {"started": 2, "discarded": 2, "wasted": 2}
+
+
+def test_queued_speculation_is_cancelled_and_not_wasted():
+    limiter = SpeculationLimiter()
+    release = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        running = executor.submit(release.wait)
+        queued = executor.submit(release.wait)
+        limiter.started(queued)
+
+        limiter.discard(queued)
+        release.set()
+        running.result()
+
+    assert queued.cancelled()
+    assert limiter.stats() == {"started": 1, "discarded": 1, "wasted": 0}
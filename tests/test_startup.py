@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from provider_registry import ProviderRegistry
+from startup import ParallelStartup
+
+
+def test_independent_components_are_initialized_concurrently():
+    # Each of them only returns once the other one is initialized as well
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meet(name: str) -> str:
+        barrier.wait()
+        return name
+
+    startup = ParallelStartup()
+    startup.add("transcriber", lambda: meet("transcriber"))
+    startup.add("agent", lambda: meet("agent"))
+    startup.add("pipeline", lambda transcriber, agent: (transcriber, agent), depends_on=["transcriber", "agent"])
+
+    startup.start()
+
+    assert startup.wait(timeout=5)["pipeline"] == ("transcriber", "agent")
+    transcriber, agent, pipeline = (startup.components[name] for name in ("transcriber", "agent", "pipeline"))
+    assert agent.start < transcriber.end and transcriber.start < agent.end
+    assert pipeline.start >= max(transcriber.end, agent.end)
+
+
+def test_failure_is_reported_to_all_dependents():
+    error = RuntimeError("No API key")
+    startup = ParallelStartup()
+
+    def fail():
+        raise error
+
+    startup.add("agent", fail)
+    startup.add("pipeline", lambda agent: agent, depends_on=["agent"])
+    startup.add("app", lambda pipeline: pipeline, depends_on=["pipeline"])
+    startup.add("transcriber", lambda: "transcriber")
+    startup.start()
+
+    for name in ("agent", "pipeline", "app"):
+        with pytest.raises(RuntimeError) as exc_info:
+            startup.result(name, timeout=5)
+        assert exc_info.value is error
+    assert startup.result("transcriber", timeout=5) == "transcriber"
+    assert startup.is_done()
+    assert "failed" in next(line for line in startup.report().splitlines() if "agent" in line)
+
+
+@pytest.mark.parametrize("depends_on, message", [(["tts"], "unknown"), (["pipeline"], "Cyclic")])
+def test_invalid_dependencies_are_rejected(depends_on, message):
+    startup = ParallelStartup()
+    startup.add("pipeline", lambda **kwargs: None, depends_on=["agent"])
+    startup.add("agent", lambda **kwargs: None, depends_on=depends_on)
+
+    with pytest.raises(ValueError, match=message):
+        startup.start()
+
+
+def test_listening_first_returns_before_the_other_components(monkeypatch):
+    pytest.importorskip("pyaudio")
+    from audio_detection import AudioDetectionManager
+    from benchmark import (
+        FakeAgent,
+        FakeAudioGenerator,
+        FakeKeywordDetector,
+        FakeSearchTool,
+        FakeTranscriber,
+        NullAudioOutput,
+        ReplayAudioListener,
+    )
+    from main import App
+
+    # The agent is initialized until it is released
+    release_agent = threading.Event()
+    create = ProviderRegistry.create
+
+    def create_slow_agent(self, kind, name=None, **options):
+        if kind == "agent":
+            assert release_agent.wait(10)
+            return FakeAgent()
+        return create(self, kind, name, **options)
+
+    monkeypatch.setattr(ProviderRegistry, "create", create_slow_agent)
+    listener = ReplayAudioListener(AudioDetectionManager.SAMPLE_RATE, AudioDetectionManager.frame_length)
+    audio_generator = FakeAudioGenerator()
+
+    app = App(
+        listener=listener,
+        detector=FakeKeywordDetector(listener),
+        transcriber=FakeTranscriber(lambda: None),
+        tools=[FakeSearchTool()],
+        audio_generator=audio_generator,
+        audio_output=NullAudioOutput(audio_generator.get_sample_rate()),
+        use_response_cache=False,
+        listening_first=True,
+    )
+
+    assert app.audio_detection_manager is not None
+    assert app.llm_pipeline_manager is None
+    assert not app.startup.components["agent"].future.done()
+
+    release_agent.set()
+    app.finish_startup()
+    assert app.llm_pipeline_manager is not None
+    assert app.audio_generation_manager is not None
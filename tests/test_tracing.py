@@ -0,0 +1,40 @@
+import logging
+
+from state_manager import State, StateManager
+from tracing import Tracer
+
+logger = logging.getLogger(__name__)
+
+
+def test_running_request_does_not_mark_or_finish_the_next_trace():
+    tracer = Tracer()
+    state_manager = StateManager(tracer)
+    state_manager.set_state(State.KEYWORD_DETECTED, logger)
+    first = tracer.current
+
+    # The next keyword is detected while the first request is still played
+    state_manager.set_state(State.KEYWORD_DETECTED, logger)
+    second = tracer.current
+    state_manager.set_state(State.PLAYING_RESPONSE, logger, first)
+    state_manager.set_state(State.REQUEST_FINISHED, logger, first)
+    state_manager.set_state(State.VOICE_DETECTED, logger)
+
+    assert tracer.current is second
+    assert list(second.marks) == ["wake", "voice_start"]
+    assert list(first.marks) == ["wake", "playback_start", "playback_end"]
+    assert list(tracer.completed) == [first]
+
+
+def test_trace_is_only_finished_once():
+    tracer = Tracer()
+    trace = tracer.start_trace()
+    tracer.mark("wake", trace)
+    tracer.mark("endpoint", trace)
+
+    assert tracer.finish_trace(trace) is trace
+    assert tracer.finish_trace(trace) is None
+    tracer.mark("playback_end", trace)
+
+    assert tracer.trace_count == 1
+    assert tracer.summary()["intervals"]["wake->endpoint"]["count"] == 1
+    assert "playback_end" not in trace.marks
@@ -0,0 +1,115 @@
+import subprocess
+
+import numpy as np
+import pytest
+import speech_recognition as sr
+
+from audio_transcription.SpeechAudioData import SpeechAudioData
+from audio_transcription.UploadEncoder import UploadEncoder
+
+SAMPLE_RATE = 16000
+
+
+def speech_audio(speech_start: int, speech_end: int, sample_count: int = SAMPLE_RATE) -> SpeechAudioData:
+    """A recording of `sample_count` samples whose values are their index, so that trimmed samples can be checked."""
+    samples = np.arange(sample_count, dtype=np.int16)
+    return SpeechAudioData(samples.tobytes(), SAMPLE_RATE, 2, speech_start, speech_end)
+
+
+def samples_of(audio_data: sr.AudioData) -> np.ndarray:
+    return np.frombuffer(audio_data.get_raw_data(), dtype=np.int16)
+
+
+def test_trimmed_keeps_the_padding_around_the_speech():
+    trimmed = speech_audio(4000, 8000).trimmed(0.1)
+
+    np.testing.assert_array_equal(samples_of(trimmed), np.arange(2400, 9600))
+
+
+@pytest.mark.parametrize(
+    "speech_start, speech_end, expected_start, expected_end",
+    [
+        (0, 8000, 0, 9600),  # Speech from the start
+        (4000, None, 2400, SAMPLE_RATE),  # Speech until the end
+        (1000, 15000, 0, SAMPLE_RATE),  # The padding exceeds both ends
+        (0, None, 0, SAMPLE_RATE),
+    ],
+)
+def test_trimmed_padding_is_clipped_at_the_edges(speech_start, speech_end, expected_start, expected_end):
+    trimmed = speech_audio(speech_start, speech_end).trimmed(0.1)
+
+    np.testing.assert_array_equal(samples_of(trimmed), np.arange(expected_start, expected_end))
+
+
+def test_speech_bounds_are_clipped_to_the_audio():
+    audio = speech_audio(2 * SAMPLE_RATE, 3 * SAMPLE_RATE)
+
+    assert (audio.speech_start, audio.speech_end) == (SAMPLE_RATE, SAMPLE_RATE)
+    assert samples_of(audio.trimmed()).size == 0
+
+
+def test_only_speech_audio_data_is_trimmed():
+    encoder = UploadEncoder(codec="wav", padding_ms=100)
+    plain = sr.AudioData(b"\0\0" * SAMPLE_RATE, SAMPLE_RATE, 2)
+
+    assert encoder.trim(plain) is plain
+    assert len(encoder.trim(speech_audio(4000, 8000)).get_raw_data()) == 2 * 7200
+    assert UploadEncoder(codec="wav", trim_silence=False).trim(speech_audio(4000, 8000)).get_raw_data() == (
+        speech_audio(4000, 8000).get_raw_data()
+    )
+
+
+@pytest.mark.parametrize(
+    "codec, file_name, mime_type",
+    [("flac", "audio.flac", "audio/flac"), ("opus", "audio.ogg", "audio/ogg"), ("wav", "audio.wav", "audio/wav")],
+)
+def test_file_name_and_mime_type_of_the_codec(codec, file_name, mime_type):
+    encoder = UploadEncoder(codec=codec)
+
+    assert (encoder.file_name, encoder.mime_type) == (file_name, mime_type)
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        UploadEncoder(codec="mp3")
+
+
+def test_flac_is_lossless_and_trimmed():
+    audio = speech_audio(4000, 8000)
+
+    encoded = UploadEncoder(codec="flac", padding_ms=100).encode(audio)
+
+    assert encoded[:4] == b"fLaC"
+    decoded = subprocess.run(
+        [sr.get_flac_converter(), "--stdout", "--totally-silent", "--decode", "--force-raw-format"]
+        + ["--endian=little", "--sign=signed", "-"],
+        input=encoded,
+        capture_output=True,
+        check=True,
+    ).stdout
+    np.testing.assert_array_equal(np.frombuffer(decoded, dtype=np.int16), np.arange(2400, 9600))
+
+
+def test_wav_is_trimmed():
+    encoded = UploadEncoder(codec="wav", padding_ms=100).encode(speech_audio(4000, 8000))
+
+    assert encoded[:4] == b"RIFF"
+    assert np.array_equal(np.frombuffer(encoded[-2 * 7200 :], dtype=np.int16), np.arange(2400, 9600))
+
+
+def test_opus_is_an_ogg_stream():
+    pytest.importorskip("soundfile")
+    rng = np.random.default_rng(0)
+    samples = (3000 * rng.standard_normal(SAMPLE_RATE)).astype(np.int16)
+
+    encoded = UploadEncoder(codec="opus", trim_silence=False).encode(sr.AudioData(samples.tobytes(), SAMPLE_RATE, 2))
+
+    assert encoded[:4] == b"OggS"
+    assert b"OpusHead" in encoded[:64]
+
+
+def test_google_cloud_speech_has_an_encoding_for_every_codec():
+    pytest.importorskip("google.cloud.speech")
+    from audio_transcription.AudioTranscriber.GoogleCloudSpeech import GoogleCloudSpeech
+
+    assert set(GoogleCloudSpeech.ENCODINGS) == set(UploadEncoder.CODECS)
@@ -0,0 +1,194 @@
+import asyncio
+import importlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from response_generation.tools.web_search import http_client
+from response_generation.tools.web_search.AzureBingAPIv7 import AzureBingAPIv7
+from response_generation.tools.web_search.HedgedWebSearch import HedgedWebSearch
+from response_generation.tools.web_search.search_cache import search_cache
+from response_generation.tools.web_search.TavilyAPI import TavilyAPI
+from response_generation.tools.web_search.YouAPI import YouAPI
+
+# The package exports the class under the name of its module
+azure_module = importlib.import_module("response_generation.tools.web_search.AzureBingAPIv7")
+
+BING_RESPONSE = {
+    "webPages": {
+        "value": [
+            {
+                "id": "https://api.bing.microsoft.com/api/v7/#WebPages.0",
+                "url": "https://wetter.de",
+                "snippet": "Sonnig, 21 Grad",
+            }
+        ]
+    }
+}
+TAVILY_RESPONSE = {"results": [{"url": "https://wetter.de", "content": "Sonnig, 21 Grad", "score": 0.9}]}
+YOU_RESPONSE = {"hits": [{"url": "https://wetter.de", "snippets": ["Sonnig, 21 Grad"]}]}
+
+
+class StubSearchHandler(BaseHTTPRequestHandler):
+    """Answers like the search APIs, keeping connections alive so that their reuse can be observed."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        self.server.requests.append({"path": url.path, "query": parse_qs(url.query), "client": self.client_address})
+        if url.path == "/bing/v7.0/search":
+            self._send_json(BING_RESPONSE)
+        elif url.path == "/you/search":
+            self._send_json(YOU_RESPONSE)
+        else:
+            self._send_json({}, status=404)
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append({"path": self.path, "body": body, "client": self.client_address})
+        self._send_json(TAVILY_RESPONSE if self.path == "/tavily/search" else {}, status=200)
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def stub_server() -> Iterator[ThreadingHTTPServer]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSearchHandler)
+    server.requests: List[Dict[str, Any]] = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    # The callback plays a sound
+    monkeypatch.setattr(azure_module, "web_search_callback", lambda: None)
+    search_cache.entries.clear()
+    yield
+    search_cache.entries.clear()
+    http_client.close_sessions()
+
+
+def base_url(server: ThreadingHTTPServer) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def create_tools(server: ThreadingHTTPServer) -> List[Any]:
+    return [
+        AzureBingAPIv7(endpoint_url=base_url(server) + "/bing", subscription_key="key"),
+        TavilyAPI(endpoint_url=base_url(server) + "/tavily", api_key="key"),
+        YouAPI(endpoint_url=base_url(server) + "/you", api_key="key"),
+    ]
+
+
+@pytest.mark.parametrize("index", range(3))
+def test_sync_search_hits_stub_server(stub_server: ThreadingHTTPServer, index: int):
+    tool = create_tools(stub_server)[index]
+    results = tool.invoke({"query": "Wetter in Berlin"})
+
+    assert results[0]["url"] == "https://wetter.de"
+    assert len(stub_server.requests) == 1
+    request = stub_server.requests[0]
+    if "query" in request:
+        assert "Wetter in Berlin" in (request["query"].get("q") or request["query"]["query"])
+    else:
+        assert request["body"]["query"] == "Wetter in Berlin"
+
+
+@pytest.mark.parametrize("index", range(3))
+def test_async_search_hits_stub_server(stub_server: ThreadingHTTPServer, index: int):
+    tool = create_tools(stub_server)[index]
+
+    async def search() -> Any:
+        try:
+            return await tool.ainvoke({"query": "Wetter in Berlin"})
+        finally:
+            await http_client.close_async_session()
+
+    results = asyncio.run(search())
+
+    assert results[0]["url"] == "https://wetter.de"
+    assert len(stub_server.requests) == 1
+
+
+def test_cached_results_skip_the_request(stub_server: ThreadingHTTPServer):
+    tool = create_tools(stub_server)[0]
+
+    first = tool.invoke({"query": "Wetter in Berlin"})
+    second = tool.invoke({"query": "wetter in  berlin?"})
+
+    assert second == first
+    assert len(stub_server.requests) == 1
+
+
+def test_sync_connections_are_reused(stub_server: ThreadingHTTPServer):
+    for i, tool in enumerate(create_tools(stub_server)):
+        tool.invoke({"query": f"Wetter {i}"})
+
+    assert len(stub_server.requests) == 3
+    assert len({request["client"] for request in stub_server.requests}) == 1
+
+
+def test_async_connections_are_reused(stub_server: ThreadingHTTPServer):
+    tools = create_tools(stub_server)
+
+    async def search() -> None:
+        try:
+            for i, tool in enumerate(tools):
+                await tool.ainvoke({"query": f"Wetter {i}"})
+        finally:
+            await http_client.close_async_session()
+
+    asyncio.run(search())
+
+    assert len(stub_server.requests) == 3
+    assert len({request["client"] for request in stub_server.requests}) == 1
+
+
+def test_sync_hedged_searches_reuse_the_loop_and_its_connections(stub_server: ThreadingHTTPServer):
+    hedged = HedgedWebSearch(providers=create_tools(stub_server)[1:], adaptive=False)
+
+    for i in range(3):
+        hedged.invoke({"query": f"Wetter {i}"})
+    loop = http_client._loop
+
+    assert len(stub_server.requests) == 3
+    assert len({request["client"] for request in stub_server.requests}) == 1
+    assert list(http_client._async_sessions) == [loop]
+
+    http_client.close_sessions()
+
+    assert loop.is_closed()
+    assert http_client._loop is None
+
+
+def test_close_sessions_closes_sessions_of_idle_loops(stub_server: ThreadingHTTPServer):
+    tool = create_tools(stub_server)[2]
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(tool.ainvoke({"query": "Wetter"}))
+        session = http_client._async_sessions[loop]
+
+        http_client.close_sessions()
+
+        assert session.closed
+        assert loop not in http_client._async_sessions
+    finally:
+        loop.close()